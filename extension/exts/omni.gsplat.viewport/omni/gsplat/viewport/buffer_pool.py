@@ -0,0 +1,79 @@
+"""
+Pool of reusable torch tensors, so that the render loop does not allocate new buffers every frame.
+
+Buffers are keyed by (tag, shape, dtype, device, pin_memory). The tag distinguishes buffers with the same
+shape that are in use at the same time, e.g., the RGB images of different views in a multi-view request.
+
+The pool is not capped by the number of buffers, since every buffer used in a frame is needed again in the
+next frame, however many views there are. Instead, the caller marks the start of each frame with `next_frame`,
+and buffers that were not used in the last `max_idle_frames` frames are freed, e.g., after the resolution,
+the tile size or the number of views changes.
+
+Same as `vanillags_renderer/src/buffer_pool.py`. The extension and the renderer run in different containers,
+each of which only mounts its own directory (see `compose.yaml`), so they cannot import a shared module.
+The renderer tests check that both copies stay the same.
+"""
+
+from collections import OrderedDict
+
+import torch
+
+
+class BufferPool:
+    def __init__(self, max_idle_frames=100):
+        self.max_idle_frames = max_idle_frames
+        # Maps each key to its buffer and the last frame it was used in, from the least to the most recently used
+        self._buffers = OrderedDict()
+        self.frame = 0
+        # Statistics
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.hits = 0
+        self._warm_allocations = None
+
+    def get(self, shape, dtype, device="cpu", pin_memory=False, tag=None):
+        """
+        Return a buffer with the given properties. The content of the buffer is undefined, and the buffer
+        is returned again by subsequent calls with the same arguments.
+        """
+        key = (tag, tuple(shape), dtype, str(device), pin_memory)
+        entry = self._buffers.pop(key, None)
+        if entry is not None:
+            buffer = entry[0]
+            self.hits += 1
+        else:
+            # Pinned host memory allows faster (and asynchronous) transfers between host and device
+            buffer = torch.empty(shape, dtype=dtype, device=device, pin_memory=pin_memory)
+            self.allocations += 1
+            self.allocated_bytes += buffer.numel() * buffer.element_size()
+        self._buffers[key] = (buffer, self.frame)
+        return buffer
+
+    def next_frame(self):
+        """Mark the start of a new frame, and free the buffers that were not used in the last `max_idle_frames` frames."""
+        self.frame += 1
+        while self._buffers:
+            key, (buffer, last_used) = next(iter(self._buffers.items()))
+            if self.frame - last_used <= self.max_idle_frames:
+                break
+            del self._buffers[key]
+            self.allocated_bytes -= buffer.numel() * buffer.element_size()
+
+    def mark_warm(self):
+        """Mark the end of the warm-up phase. Allocations after this point are counted separately."""
+        self._warm_allocations = self.allocations
+
+    @property
+    def allocations_after_warm_up(self):
+        if self._warm_allocations is None:
+            return 0
+        return self.allocations - self._warm_allocations
+
+    def stats(self):
+        return {
+            'buffers': len(self._buffers),
+            'allocations': self.allocations,
+            'allocations_after_warm_up': self.allocations_after_warm_up,
+            'allocated_bytes': self.allocated_bytes,
+            'hits': self.hits,
+        }
@@ -0,0 +1,63 @@
+"""
+Late compositing of the splat layer against the newest Replicator background.
+
+For layer requests, the renderer skips the background and returns the premultiplied RGB, the alpha and the
+alpha-weighted inverse depth of the splats alone. The layer is then depth tested and blended against the
+background captured while the splats were rendering, instead of the (older) background of the request.
+Since the layer has a single depth per pixel, splats are either entirely in front of or behind the background
+at each pixel, similar to `composite_layers` in the renderer's `compositing.py` with a single layer.
+"""
+
+import numpy as np
+import torch as th
+
+
+def composite_layer_np(rgb, alpha, inv_depth, bg_rgb, bg_depth):
+    """
+    NumPy reference of `composite_layer`.
+
+    Args:
+        rgb: (H, W, 3) float32 premultiplied RGB in [0, 1].
+        alpha: (H, W) float32 alpha.
+        inv_depth: (H, W) float32 alpha-weighted inverse depth.
+        bg_rgb: (H, W, 3) float32 background RGB in [0, 1].
+        bg_depth: (H, W) float32 background depth.
+
+    Returns:
+        The composited (H, W, 3) RGB and the (H, W) alpha-weighted inverse depth of the visible splats,
+        following the same convention as the renderer output.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        depth = np.where((alpha > 0) & (inv_depth > 0), alpha / inv_depth, np.inf)
+    # Splats behind the background are occluded
+    visible = depth < bg_depth
+    rgb = np.where(visible[..., np.newaxis], rgb + (1 - alpha[..., np.newaxis]) * bg_rgb, bg_rgb)
+    return rgb, np.where(visible, inv_depth, 0)
+
+
+def composite_layer(rgb, alpha, inv_depth, bg_rgb, bg_depth):
+    """Same as `composite_layer_np`, but for torch tensors, e.g., on the GPU."""
+    depth = th.where((alpha > 0) & (inv_depth > 0), alpha / inv_depth, th.full_like(alpha, float('inf')))
+    visible = depth < bg_depth
+    rgb = th.where(visible.unsqueeze(-1), rgb + (1 - alpha.unsqueeze(-1)) * bg_rgb, bg_rgb)
+    return rgb, th.where(visible, inv_depth, th.zeros_like(inv_depth))
+
+
+def pack_layer(rgb, alpha, inv_depth, out_layer, out_depth):
+    """
+    Pack a splat layer into an (H, W, 4) image of the premultiplied RGB and the alpha, and the (H, W) depth of
+    the splats (infinite where there are none), so that it can be warped with `reproject` and `fill_holes` like
+    a composited frame and composited against another background afterwards. Returns `out_layer` and `out_depth`.
+    """
+    out_layer[..., :3].copy_(rgb)
+    out_layer[..., 3].copy_(alpha)
+    th.div(alpha, inv_depth, out=out_depth)
+    out_depth.masked_fill_((alpha <= 0) | (inv_depth <= 0), float('inf'))
+    return out_layer, out_depth
+
+
+def unpack_layer(layer, depth):
+    """Inverse of `pack_layer`. Returns the premultiplied RGB, the alpha and the alpha-weighted inverse depth."""
+    alpha = layer[..., 3]
+    inv_depth = th.where(th.isfinite(depth), alpha / depth, th.zeros_like(alpha))
+    return layer[..., :3], alpha, inv_depth
@@ -1,4 +1,6 @@
+import json
 import threading
+import time
 
 import numpy as np
 import omni.ext
@@ -11,8 +13,11 @@ import omni.replicator.core as rep
 from omni.kit.viewport.utility import get_active_viewport, get_active_viewport_window
 from omni.ui import scene as sc
 from pxr import Gf, Usd, UsdGeom
-from PIL import Image
-from io import BytesIO
+
+from .buffer_pool import BufferPool
+from .compositing import composite_layer, pack_layer, unpack_layer
+from .reprojection import ReprojectionScheduler, fill_holes, reproject
+from .staging import stage_background, upload_frame, upload_render
 
 
 @wp.kernel
@@ -47,15 +52,48 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
         # Replicator annotators
         self.rep_depth_annotator = None
         self.rep_rgba_annotator = None
+        # Extra cameras rendered in the same multi-view request as the viewport camera
+        self.camera_prim_paths: list = []
+        self.camera_annotators: dict = {}
+        """Maps camera prim path to (render product path, depth annotator, RGBA annotator)."""
+        self.camera_frames: dict = {}
+        """Maps camera prim path to (camera to object position, rotation, RGBA image, depth image)."""
+        self.camera_3dgs: dict = {}
+        """Maps camera prim path to the rendered (RGB, depth) tensors with shape (H, W, 3) and (H, W)."""
+        self.batch_render_time: float = None
+        """Server render time of the last multi-view request, shown in the UI."""
+        self.batch_num_views: int = None
         # Initialize ZMQ context and socket
         self.zmq_context = None
         self.zmq_socket = None
+        # Requests older than this are dropped by the renderer instead of being rendered late
+        self.max_request_age = 0.5
+        # Give up waiting for a reply after this timeout, and reconnect
+        self.request_timeout = 5.0
+        # Don't send requests before this time when the renderer reports that it is overloaded or loading
+        self.retry_at = 0.0
+        # Ping the renderer until it reports that it is ready, instead of blocking on the first render request
+        self.renderer_ready = False
+        self.renderer_state = None
+        self.ping_interval = 0.5
+        # Number of frames to profile in the renderer, sent by the worker thread since it owns the socket
+        self.profile_frames: int = None
         # Initialize worker thread and event
         self.render_event = threading.Event()
         self.worker_thread = None
         self.should_stop = False
+        # Stream ID under which the renderer publishes the frames rendered for this extension
+        self.stream_id = "viewport"
         # Only used when rendering depth
         self.z_far = 5
+        # Temporal reprojection of the last full render (keyframe)
+        self.reprojection_enabled = False
+        self.reprojection_scheduler = ReprojectionScheduler()
+        self.reprojection_keyframe = None
+        # Late compositing: only request the splat layer, and composite it against the newest background
+        self.late_compositing_enabled = False
+        self.latest_background = None
+        """Replicator (RGBA, depth) images captured while the splats were rendering."""
 
     # ext_id is current extension id. It can be used with extension manager to query additional information, like where
     # this extension is located on filesystem.
@@ -92,6 +130,11 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
         self.depth_rep = wp.zeros((self.rgba_h, self.rgba_w), dtype=wp.float32, device="cuda")
         self.rgb_3dgs = th.zeros((self.rgba_h, self.rgba_w, 3), dtype=th.uint8, device="cuda")
         self.depth_3dgs = th.full((self.rgba_h, self.rgba_w), float('inf'), dtype=th.float32, device="cuda")
+        # Fallback background images when the Replicator data is not available
+        self.rgba_rep_fallback = wp.zeros((self.rgba_h, self.rgba_w, 4), dtype=wp.uint8, device="cuda")
+        self.depth_rep_fallback = wp.zeros((self.rgba_h, self.rgba_w), dtype=wp.float32, device="cuda")
+        # Pinned staging buffers and per-camera results reused across frames
+        self.buffer_pool = BufferPool()
         # Init warp and disable verbose output
         wp.init()
         # Init ZMQ connection
@@ -106,10 +149,54 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
 
     def init_zmq(self):
         """Initialize ZMQ connection"""
-        self.zmq_context = zmq.Context()
+        if self.zmq_context is None:
+            self.zmq_context = zmq.Context()
         self.zmq_socket = self.zmq_context.socket(zmq.REQ)
+        # Don't block on close if the renderer is unresponsive
+        self.zmq_socket.setsockopt(zmq.LINGER, 0)
         self.zmq_socket.connect("ipc:///tmp/omni-3dgs-extension/vanillags_renderer")
 
+    def _request(self, metadata, frames, timeout=None):
+        """Send a request to the renderer. Return the reply frames, or None if the renderer didn't reply in time."""
+        metadata['sent_at'] = time.time()
+        metadata['max_age'] = self.max_request_age
+        self.zmq_socket.send_multipart([json.dumps(metadata).encode()] + frames)
+        if not self.zmq_socket.poll((timeout or self.request_timeout) * 1000):
+            # A REQ socket cannot send again before receiving the reply, so reconnect
+            if self.renderer_ready:
+                print("[omni.gsplat.viewport] Renderer didn't reply in time, reconnecting")
+            self.zmq_socket.close()
+            self.init_zmq()
+            self.renderer_ready = False
+            return None
+        # Receive metadata and image data of each view without copying the frames
+        return self.zmq_socket.recv_multipart(copy=False)
+
+    def _check_renderer_ready(self):
+        """Ping the renderer, and return whether it is ready to render."""
+        response = self._request({'type': 'ping'}, [], timeout=self.ping_interval)
+        status = json.loads(response[0].bytes) if response is not None else {'state': 'unreachable'}
+        state = status.get('state')
+        if state != self.renderer_state:
+            print(f"[omni.gsplat.viewport] Renderer state: {state} {status.get('message', '')}")
+            self.renderer_state = state
+        self.renderer_ready = state == 'ready'
+        if not self.renderer_ready:
+            self.retry_at = time.time() + self.ping_interval
+        return self.renderer_ready
+
+    def _start_profiling(self):
+        """Ask the renderer to profile the next frames."""
+        frames, self.profile_frames = self.profile_frames, None
+        response = self._request({'type': 'profile', 'action': 'start', 'frames': frames}, [])
+        if response is None:
+            return
+        reply = json.loads(response[0].bytes)
+        if 'error' in reply:
+            print(f"[omni.gsplat.viewport] Error from server: {reply['error']}")
+        else:
+            print(f"[omni.gsplat.viewport] Profiling {frames} frames, results in {reply['output_dir']} (renderer container)")
+
     def init_replicator(self):
         """Initialize Replicator connection"""
         # Disable anti-aliasing to avoid unwanted noise in simulated depth images
@@ -126,6 +213,33 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
         self.rep_rgba_annotator = rep.AnnotatorRegistry.get_annotator("LdrColor", device="cuda")
         self.rep_rgba_annotator.attach(self.render_product_path)
 
+    def update_camera_render_products(self):
+        """Create or remove Replicator render products so that they match the extra camera prims."""
+        for cam_prim_path in list(self.camera_annotators.keys()):
+            if cam_prim_path in self.camera_prim_paths:
+                continue
+            render_product_path, depth_annotator, rgba_annotator = self.camera_annotators.pop(cam_prim_path)
+            depth_annotator.detach([render_product_path])
+            rgba_annotator.detach([render_product_path])
+            self.camera_3dgs.pop(cam_prim_path, None)
+        for cam_prim_path in self.camera_prim_paths:
+            if cam_prim_path in self.camera_annotators:
+                continue
+            render_product_path = rep.create.render_product(
+                cam_prim_path,
+                resolution=(self.rgba_w, self.rgba_h),
+            ).path
+            print(f"[omni.gsplat.viewport] Replicator render product path for {cam_prim_path}: {render_product_path}")
+            depth_annotator = rep.AnnotatorRegistry.get_annotator("distance_to_camera", device="cuda")
+            depth_annotator.attach(render_product_path)
+            rgba_annotator = rep.AnnotatorRegistry.get_annotator("LdrColor", device="cuda")
+            rgba_annotator.attach(render_product_path)
+            self.camera_annotators[cam_prim_path] = (render_product_path, depth_annotator, rgba_annotator)
+
+    def get_camera_render(self, camera_prim_path):
+        """Return the latest 3DGS (RGB, depth) tensors of an extra camera, or None if not rendered yet."""
+        return self.camera_3dgs.get(camera_prim_path)
+
     def build_ui(self, ext_id):
         """Build the UI. Should be called upon startup."""
         # Please refer to the `Omni::UI Doc` tab in Omniverse Code for efficient development.
@@ -163,11 +277,45 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
                             clicked_fn=self._on_btn_set_click,
                             tooltip="Get From Selection",
                         )
+                    # UI for setting extra cameras, e.g., the cameras mounted on a robot
+                    with ui.HStack():
+                        ui.Label("Cameras", width=65)
+                        self._camera_prims_model = ui.SimpleStringModel()
+                        ui.StringField(model=self._camera_prims_model)
+                        ui.Button(
+                            " S ",
+                            width=0,
+                            height=0,
+                            clicked_fn=self._on_btn_set_cameras_click,
+                            tooltip="Get From Selection (Comma-Separated)",
+                        )
                     ui.Button("Reset Camera", width=20, clicked_fn=self._on_btn_reset_click)
                     with ui.HStack():
                         ui.Label("Viewport Overlay", width=100)
                         model = ui.CheckBox().model
                         model.add_value_changed_fn(self._on_checkbox_value_changed)
+                    with ui.HStack():
+                        ui.Label("Reprojection", width=100)
+                        model = ui.CheckBox().model
+                        model.add_value_changed_fn(self._on_reprojection_checkbox_value_changed)
+                    with ui.HStack():
+                        ui.Label("Late Compositing", width=100)
+                        model = ui.CheckBox().model
+                        model.add_value_changed_fn(self._on_late_compositing_checkbox_value_changed)
+                    # UI for profiling the renderer without restarting it
+                    with ui.HStack():
+                        ui.Label("Profile Frames", width=100)
+                        self._profile_frames_model = ui.SimpleIntModel(100)
+                        ui.IntField(model=self._profile_frames_model)
+                        ui.Button(
+                            " Profile ",
+                            width=0,
+                            height=0,
+                            clicked_fn=self._on_btn_profile_click,
+                            tooltip="Profile the renderer for the given number of frames",
+                        )
+                    # Render time of the viewport camera and the extra cameras in a single request
+                    self.ui_lbl_batch_render_time = ui.Label("", height=0)
 
         # Camera Viewport
         # Ref: https://docs.omniverse.nvidia.com/kit/docs/omni.kit.viewport.docs/latest/overview.html#simplest-example
@@ -217,6 +365,12 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
     def _on_btn_set_click(self):
         self._mesh_prim_model.as_string = self._get_selected_prim_path()
 
+    def _on_btn_set_cameras_click(self):
+        self._camera_prims_model.as_string = ','.join(self.usd_context.get_selection().get_selected_prim_paths())
+
+    def _on_btn_profile_click(self):
+        self.profile_frames = self._profile_frames_model.get_value_as_int()
+
     def _on_btn_reset_click(self):
         # TODO: Allow resetting the camera to a specific position
         # Below doesn't seem to work
@@ -233,6 +387,15 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
         value = model.get_value_as_bool()
         self.configure_viewport_overlay(value)
 
+    def _on_reprojection_checkbox_value_changed(self, model):
+        self.reprojection_enabled = model.get_value_as_bool()
+        self.reprojection_scheduler.reset()
+        self.reprojection_keyframe = None
+
+    def _on_late_compositing_checkbox_value_changed(self, model):
+        self.late_compositing_enabled = model.get_value_as_bool()
+        self.latest_background = None
+
     def _get_selected_prim_path(self):
         """Get the selected prim. Return '' if no prim is selected."""
         # Ref: https://docs.omniverse.nvidia.com/workflows/latest/extensions/object_info.html#step-5-get-the-selected-prims-data
@@ -241,12 +404,7 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
             return ''
         return selected_prim_paths[0]
 
-    def _get_camera_pose(self):
-        viewport_api = get_active_viewport()
-        # We chose to use Viewport instead of Isaac Sim's Camera Sensor to avoid dependency on Isaac Sim.
-        # We want the extension to work with any Omniverse app, not just Isaac Sim.
-        # Ref: https://docs.omniverse.nvidia.com/isaacsim/latest/features/sensors_simulation/isaac_sim_sensors_camera.html
-        camera_to_world_mat: Gf.Matrix4d = viewport_api.transform
+    def _get_camera_pose(self, camera_to_world_mat: Gf.Matrix4d):
         object_to_world_mat: Gf.Matrix4d = Gf.Matrix4d()
         if self._mesh_prim_model.as_string != '':
             stage: Usd.Stage = self.usd_context.get_stage()
@@ -285,51 +443,175 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
         #     return
         self.prev_camera_to_object_pos = camera_to_object_pos
         self.prev_camera_to_object_rot = camera_to_object_rot
-        
+        pose = (np.array(camera_to_object_pos), np.deg2rad(np.array(camera_to_object_rot)))
+        camera_frames = self.camera_frames
+        if not camera_frames and self._reproject_3dgs_buffers(pose):
+            return
+        if time.time() < self.retry_at:
+            # Shed load while the renderer is overloaded or loading, keeping the previous frame
+            return
+        if not self.renderer_ready and not self._check_renderer_ready():
+            return
+        if self.profile_frames is not None:
+            self._start_profiling()
+        # Free the pooled buffers of views and resolutions that are no longer rendered
+        self.buffer_pool.next_frame()
+
         # Prepare camera pose data
         pose_data = {
             'position': list(camera_to_object_pos),
             'rotation': list(np.deg2rad(camera_to_object_rot))
         }
-
-        # Convert rgba_rep and depth_rep to numpy arrays
-        rgb_np = (wp.to_torch(self.rgba_rep)[:,:,:3]).cpu().numpy()  # Convert to numpy array
-        depth_np = wp.to_torch(self.depth_rep).cpu().numpy()  # Convert to numpy array
-
-        # Convert numpy arrays to PIL Images
-        rgb_img = Image.fromarray(rgb_np.astype(np.uint8))
-        depth_img = Image.fromarray(depth_np, mode='F')  # 'F' mode for float32
-
-        # Compress as TIFF
-        rgb_buffer = BytesIO()
-        depth_buffer = BytesIO()
-        rgb_img.save(rgb_buffer, format='TIFF')
-        depth_img.save(depth_buffer, format='TIFF')
+        # Extra cameras are always composited by the renderer
+        late_compositing = self.late_compositing_enabled and not camera_frames
+        if late_compositing:
+            # Skip the background upload, and only request the splat layer
+            pose_data['layer'] = True
+            frames = []
+        else:
+            frames = self._encode_background(self.rgba_rep, self.depth_rep, "viewport")
+        if camera_frames:
+            # Render the viewport camera and all extra cameras in a single multi-view request
+            views = [pose_data]
+            for cam_prim_path, (camera_to_object_pos, camera_to_object_rot, rgba_rep, depth_rep) in camera_frames.items():
+                views.append({
+                    'position': list(camera_to_object_pos),
+                    'rotation': list(np.deg2rad(camera_to_object_rot))
+                })
+                if not self.timeline_is_playing:
+                    rgba_rep, depth_rep = None, None
+                frames += self._encode_background(rgba_rep, depth_rep, cam_prim_path)
+            pose_data = {'views': views}
+        # Send raw images to avoid encoding and decoding overhead
+        pose_data['encoding'] = 'raw'
+        # Let other viewers watch the rendered frames if the renderer publishes them
+        pose_data['stream'] = self.stream_id
 
         # Send multipart message
-        self.zmq_socket.send_json(pose_data, zmq.SNDMORE)
-        self.zmq_socket.send(rgb_buffer.getvalue(), zmq.SNDMORE)
-        self.zmq_socket.send(depth_buffer.getvalue())
-        
-        # Receive metadata and image data separately
-        metadata = self.zmq_socket.recv_json()
-        render_bytes = self.zmq_socket.recv()
-        inv_depth_bytes = self.zmq_socket.recv()
-        
-        if 'error' in metadata:
+        response = self._request(pose_data, frames)
+        if response is None:
+            return
+        metadata = json.loads(response[0].bytes)
+
+        if metadata.get('status') == 'overloaded':
+            self.retry_at = time.time() + metadata['retry_after']
+        elif metadata.get('status') == 'loading':
+            # The renderer has been restarted, wait until it is ready again
+            self.renderer_ready = False
+            self.retry_at = time.time() + metadata['retry_after']
+        elif metadata.get('status') == 'expired':
+            pass
+        elif 'error' in metadata:
             print(f"[omni.gsplat.viewport] Error from server: {metadata['error']}")
+        elif late_compositing:
+            layer = self._composite_layer(response[1], response[2], response[3])
+            self._store_reprojection_keyframe(pose, layer)
+        else:
+            upload_render(self.buffer_pool, response[1], response[2], self.rgb_3dgs, self.depth_3dgs, "viewport")
+            for i, cam_prim_path in enumerate(camera_frames):
+                camera_rgb = self.buffer_pool.get((self.rgba_h, self.rgba_w, 3), th.uint8, "cuda", tag=cam_prim_path)
+                camera_depth = self.buffer_pool.get((self.rgba_h, self.rgba_w), th.float32, "cuda", tag=cam_prim_path)
+                upload_render(self.buffer_pool, response[3 + 2 * i], response[4 + 2 * i], camera_rgb, camera_depth, cam_prim_path)
+                self.camera_3dgs[cam_prim_path] = (camera_rgb, camera_depth)
+            if 'views' in metadata:
+                self.batch_render_time = metadata['render_time']
+                self.batch_num_views = len(metadata['views'])
+            else:
+                self.batch_render_time = None
+            self._store_reprojection_keyframe(pose)
+
+    def _store_reprojection_keyframe(self, pose, layer=None):
+        """
+        Keep a copy of the 3DGS buffers on the GPU as the keyframe for reprojection, or of the splat layer
+        with late compositing, so that the reprojected layer can be composited against the current background.
+        """
+        if not self.reprojection_enabled:
+            return
+        # Copy the buffers, since they are overwritten by the next frame
+        if layer is None:
+            keyframe_rgb = self.buffer_pool.get(self.rgb_3dgs.shape, th.uint8, "cuda", tag="keyframe").copy_(self.rgb_3dgs)
+            keyframe_depth = self.buffer_pool.get(self.depth_3dgs.shape, th.float32, "cuda", tag="keyframe").copy_(self.depth_3dgs)
         else:
-            # Decompress render image
-            render_buffer = BytesIO(render_bytes)
-            render_img = Image.open(render_buffer)
-            render_np = np.array(render_img) # HWC
-            self.rgb_3dgs[:] = th.from_numpy(render_np).to("cuda") # HWC
-
-            # Decompress inverse depth image
-            inv_depth_buffer = BytesIO(inv_depth_bytes)
-            inv_depth_img = Image.open(inv_depth_buffer)
-            inv_depth_np = np.array(inv_depth_img) # HW
-            self.depth_3dgs[:] = 1 / th.from_numpy(inv_depth_np).to("cuda") # HW
+            keyframe_rgb, keyframe_depth = pack_layer(
+                *layer,
+                self.buffer_pool.get((*self.depth_3dgs.shape, 4), th.float32, "cuda", tag="keyframe"),
+                self.buffer_pool.get(self.depth_3dgs.shape, th.float32, "cuda", tag="keyframe"),
+            )
+        self.reprojection_keyframe = (keyframe_rgb, keyframe_depth, pose, layer is not None)
+        self.reprojection_scheduler.on_full_render(pose)
+
+    def _encode_background(self, rgba_rep, depth_rep, tag):
+        """Copy the Replicator RGBA and depth images into pooled pinned buffers, and return them as raw frames."""
+        if rgba_rep is None or depth_rep is None or \
+            depth_rep.shape != (self.rgba_h, self.rgba_w) or \
+            rgba_rep.shape != (self.rgba_h, self.rgba_w, 4):
+            # Don't use background image feature if not available
+            rgba_rep, depth_rep = self._get_fallback_background()
+        return stage_background(self.buffer_pool, wp.to_torch(rgba_rep), wp.to_torch(depth_rep), tag)
+
+    def _composite_layer(self, render_frame, alpha_frame, inv_depth_frame):
+        """
+        Composite the raw splat layer frames against the newest Replicator background into the 3DGS buffers.
+        Returns the premultiplied RGB, the alpha and the inverse depth of the layer.
+        """
+        shape = (self.rgba_h, self.rgba_w)
+        rgb = upload_frame(self.buffer_pool, render_frame, (*shape, 3), th.uint8, "layer/rgb")
+        alpha = upload_frame(self.buffer_pool, alpha_frame, shape, th.float32, "layer/alpha")
+        inv_depth = upload_frame(self.buffer_pool, inv_depth_frame, shape, th.float32, "layer/inv_depth")
+        rgb = rgb.float() / 255
+        self._composite_against_background(rgb, alpha, inv_depth)
+        return rgb, alpha, inv_depth
+
+    def _composite_against_background(self, rgb, alpha, inv_depth):
+        """Composite a splat layer against the newest Replicator background into the 3DGS buffers."""
+        shape = alpha.shape
+        # Prefer the background captured while the splats were rendering
+        rgba_rep, depth_rep = self.latest_background or (self.rgba_rep, self.depth_rep)
+        if not self.timeline_is_playing or \
+            depth_rep.shape != shape or \
+            rgba_rep.shape != (*shape, 4):
+            rgba_rep, depth_rep = self._get_fallback_background()
+        rgb, inv_depth = composite_layer(
+            rgb, alpha, inv_depth,
+            wp.to_torch(rgba_rep)[:, :, :3].float() / 255, wp.to_torch(depth_rep),
+        )
+        self.rgb_3dgs.copy_(rgb.clamp_(0, 1).mul_(255)) # HWC, truncated to uint8
+        self.depth_3dgs.copy_(inv_depth).reciprocal_() # HW
+
+    def _get_fallback_background(self):
+        """Return an empty background, i.e., black at infinite depth."""
+        self.rgba_rep_fallback.zero_()
+        self.depth_rep_fallback.fill_(float('inf'))
+        return self.rgba_rep_fallback, self.depth_rep_fallback
+
+    def _reproject_3dgs_buffers(self, pose):
+        """Warp the keyframe to the current pose. Return False if a full render is required instead."""
+        if not self.reprojection_enabled or self.reprojection_keyframe is None:
+            return False
+        keyframe_rgb, keyframe_depth, keyframe_pose, is_layer = self.reprojection_keyframe
+        # A composited keyframe contains the Replicator background, which changes while the timeline is playing,
+        # e.g., with moving robots. Only a splat layer keyframe (late compositing) can be reprojected then, since
+        # it is composited against the current background after warping
+        if self.timeline_is_playing and not is_layer:
+            return False
+        if self.reprojection_scheduler.needs_full_render(pose):
+            return False
+        # Warp on the GPU, since the NumPy reference is slower than a full render at 1280x720
+        start_time = time.perf_counter()
+        rgb, depth, holes = reproject(keyframe_rgb, keyframe_depth, keyframe_pose, pose)
+        if not self.reprojection_scheduler.accept(holes.float().mean().item()):
+            return False
+        fill_holes(rgb, depth, holes)
+        if is_layer:
+            self._composite_against_background(*unpack_layer(rgb, depth))
+        else:
+            self.rgb_3dgs.copy_(rgb) # HWC
+            self.depth_3dgs.copy_(depth) # HW
+        th.cuda.synchronize()
+        self.reprojection_scheduler.record_time(time.perf_counter() - start_time)
+        if self.reprojection_scheduler.reprojected_frames % 100 == 0:
+            print(f"[omni.gsplat.viewport] Reprojection: {self.reprojection_scheduler.stats()}")
+        return True
 
     def _render_worker(self):
         """Worker thread that processes render requests when event is set"""
@@ -346,8 +628,7 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
                 self.depth_rep.shape != (self.rgba_h, self.rgba_w) or \
                 self.rgba_rep.shape != (self.rgba_h, self.rgba_w, 4):
                 # Don't use background image feature if not available
-                self.rgba_rep = wp.from_torch(th.zeros((self.rgba_h, self.rgba_w, 4), dtype=th.uint8, device="cuda"))
-                self.depth_rep = wp.from_torch(th.full((self.rgba_h, self.rgba_w), float('inf'), dtype=th.float32, device="cuda"))
+                self.rgba_rep, self.depth_rep = self._get_fallback_background()
             try:
                 # No need to check event type, since there is only one event type: `NEW_FRAME`.
                 self._fill_3dgs_buffers()
@@ -403,6 +684,9 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
         if self.rep_depth_annotator is None:
             self.init_replicator()
         if self.render_event.is_set():
+            if self.late_compositing_enabled and self.timeline_is_playing:
+                # Keep capturing the background while the splats are rendering, to composite against the newest one
+                self.latest_background = (self.rep_rgba_annotator.get_data(), self.rep_depth_annotator.get_data())
             return
         # Update UI to show the rendered image of the previous render event
         # Know issues:
@@ -410,14 +694,38 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
         # - after stopping the timeline while the mesh prim is visible.
         # - after making the mesh prim invisible while the timeline is playing.
         self.ui_3dgs_provider.set_bytes_data_from_gpu(self.rgba.data_ptr(), (self.rgba_w, self.rgba_h))
+        batch_render_time = self.batch_render_time
+        self.ui_lbl_batch_render_time.text = "" if batch_render_time is None else \
+            f"Batch Render: {self.batch_num_views} views in {batch_render_time * 1000:.1f} ms"
 
         # Prepare data for the next render event
         # Get all scene-related data in the main (UI) thread to prevent race condition and synchronization issues
         # Get Replicator data
         self.depth_rep = self.rep_depth_annotator.get_data() # is warp array with shape (H, W)
         self.rgba_rep = self.rep_rgba_annotator.get_data() # is warp array with shape (H, W, 4)
+        self.latest_background = None
         # Get camera pose
-        self.camera_to_object_pos, self.camera_to_object_rot = self._get_camera_pose()
+        # We chose to use Viewport instead of Isaac Sim's Camera Sensor to avoid dependency on Isaac Sim.
+        # We want the extension to work with any Omniverse app, not just Isaac Sim.
+        # Ref: https://docs.omniverse.nvidia.com/isaacsim/latest/features/sensors_simulation/isaac_sim_sensors_camera.html
+        self.camera_to_object_pos, self.camera_to_object_rot = self._get_camera_pose(get_active_viewport().transform)
+        # Get extra camera poses and Replicator data
+        stage: Usd.Stage = self.usd_context.get_stage()
+        self.camera_prim_paths = [
+            path.strip() for path in self._camera_prims_model.as_string.split(',')
+            if path.strip() != '' and stage.GetPrimAtPath(path.strip()).IsValid()
+        ]
+        self.update_camera_render_products()
+        camera_frames = {}
+        for cam_prim_path, (_, depth_annotator, rgba_annotator) in self.camera_annotators.items():
+            cam_xform: UsdGeom.Xformable = UsdGeom.Xformable(stage.GetPrimAtPath(cam_prim_path))
+            camera_to_world_mat: Gf.Matrix4d = cam_xform.ComputeLocalToWorldTransform(Usd.TimeCode.Default())
+            camera_frames[cam_prim_path] = (
+                *self._get_camera_pose(camera_to_world_mat),
+                rgba_annotator.get_data(), # is warp array with shape (H, W, 4)
+                depth_annotator.get_data(), # is warp array with shape (H, W)
+            )
+        self.camera_frames = camera_frames
         self.mesh_prim_path = self._mesh_prim_model.as_string
         if self.mesh_prim_path != '':
             prim: Usd.Prim = self.usd_context.get_stage().GetPrimAtPath(self.mesh_prim_path)
@@ -435,6 +743,10 @@ class OmniGSplatViewportExtension(omni.ext.IExt):
             self.rep_rgba_annotator.detach([self.render_product_path])
         self.rep_depth_annotator = None
         self.rep_rgba_annotator = None
+        # Detach Replicator annotators of extra cameras
+        self.camera_prim_paths = []
+        self.update_camera_render_products()
+        self.camera_frames = {}
         self.configure_viewport_overlay(False)
 
     def on_shutdown(self):
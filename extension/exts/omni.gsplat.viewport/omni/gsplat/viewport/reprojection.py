@@ -0,0 +1,268 @@
+"""
+Depth-based temporal reprojection of 3DGS renders.
+
+The renderer returns both the RGB image and the inverse depth of every frame, which is enough to warp the
+last fully rendered frame (the keyframe) to a nearby camera pose without a round trip to the renderer.
+The extension warps the keyframe on the GPU with `reproject` and `fill_holes`, and the NumPy versions
+`reproject_np` and `fill_holes_np` are kept as the reference implementation.
+
+Camera poses follow the same convention as the requests sent to `vanillags_renderer`: a position and XYZ
+euler angles (in radians) of the camera in Isaac Sim convention (+X Right, +Y Up, -Z Forward).
+Depth maps follow the GS/COLMAP convention (+X Right, -Y Up, +Z Forward) and store the view-space Z.
+"""
+
+import numpy as np
+import torch as th
+
+# Isaac Sim camera defaults, see `create_camera_from_pose` in `vanillags_renderer/src/renderer.py`
+DEFAULT_FOVX = np.radians(60)
+DEFAULT_FOVY = np.radians(35.98339777135764)
+
+ISAAC_SIM_TO_GS_CONVENTION = np.diag([1.0, -1.0, -1.0, 1.0])
+
+
+def euler_to_matrix(euler_angles):
+    """Same as `Rotation.from_euler('xyz', euler_angles).as_matrix()` without depending on SciPy."""
+    x, y, z = euler_angles
+    cx, sx = np.cos(x), np.sin(x)
+    cy, sy = np.cos(y), np.sin(y)
+    cz, sz = np.cos(z), np.sin(z)
+    Rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    Ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    Rz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    # Lowercase 'xyz' denotes extrinsic rotations, i.e., rotate around X first, then Y, then Z
+    return Rz @ Ry @ Rx
+
+
+def camera_to_world(position, euler_angles):
+    """Return the 4x4 camera-to-world matrix of a camera in GS convention."""
+    C2W = np.eye(4)
+    C2W[:3, :3] = euler_to_matrix(euler_angles)
+    C2W[:3, 3] = position
+    # Flip the camera axes from Isaac Sim convention to GS convention
+    return C2W @ ISAAC_SIM_TO_GS_CONVENTION
+
+
+def intrinsics(width, height, fovx=DEFAULT_FOVX, fovy=DEFAULT_FOVY):
+    """Return (fx, fy, cx, cy) in pixels, following the pinhole model used by the 3DGS rasterizer."""
+    fx = width / (2 * np.tan(fovx / 2))
+    fy = height / (2 * np.tan(fovy / 2))
+    return fx, fy, width / 2, height / 2
+
+
+def pose_delta(pose_a, pose_b):
+    """Return the translation distance and the rotation angle (in radians) between two poses."""
+    translation = np.linalg.norm(np.asarray(pose_b[0]) - np.asarray(pose_a[0]))
+    R = euler_to_matrix(pose_a[1]).T @ euler_to_matrix(pose_b[1])
+    angle = np.arccos(np.clip((np.trace(R) - 1) / 2, -1.0, 1.0))
+    return translation, angle
+
+
+def reproject_np(rgb, depth, src_pose, dst_pose, fovx=DEFAULT_FOVX, fovy=DEFAULT_FOVY):
+    """
+    Forward-warp an RGB image and its depth map from `src_pose` to `dst_pose`.
+
+    Every source pixel is unprojected with its depth and splatted to the nearest destination pixel, keeping
+    the closest one when several pixels land on the same location. Pixels with infinite depth (no splats)
+    are treated as points at infinity, so they only follow the camera rotation.
+
+    Returns the warped RGB (H, W, 3), the warped depth (H, W) and a boolean hole mask (H, W) marking the
+    destination pixels that received no source pixel. Holes are filled with zeros and infinite depth.
+    """
+    height, width = depth.shape
+    fx, fy, cx, cy = intrinsics(width, height, fovx, fovy)
+    # Pixel centers of the source image
+    v, u = np.mgrid[0:height, 0:width]
+    x = ((u + 0.5 - cx) / fx).ravel()
+    y = ((v + 0.5 - cy) / fy).ravel()
+    z = depth.ravel().astype(np.float64)
+    finite = np.isfinite(z) & (z > 0)
+    # Homogeneous points in source camera space, with w = 0 for points at infinity
+    z_or_one = np.where(finite, z, 1.0)
+    points = np.stack([x * z_or_one, y * z_or_one, z_or_one, finite.astype(np.float64)])
+    # Transform from source camera to destination camera in a single matrix
+    src_to_dst = np.linalg.inv(camera_to_world(*dst_pose)) @ camera_to_world(*src_pose)
+    points = src_to_dst @ points
+    z_dst = points[2]
+    in_front = z_dst > 1e-6
+    z_safe = np.where(in_front, z_dst, 1.0)
+    u_dst = np.floor(points[0] / z_safe * fx + cx).astype(np.int64)
+    v_dst = np.floor(points[1] / z_safe * fy + cy).astype(np.int64)
+    valid = in_front & (u_dst >= 0) & (u_dst < width) & (v_dst >= 0) & (v_dst < height)
+    src_index = np.flatnonzero(valid)
+    dst_index = v_dst[valid] * width + u_dst[valid]
+    dst_depth = np.where(finite[valid], z_dst[valid], np.inf)
+    # Z-buffer: sort by destination pixel, then by depth, and keep the closest source pixel of each group
+    order = np.lexsort((dst_depth, dst_index))
+    dst_index, first = np.unique(dst_index[order], return_index=True)
+    winners = order[first]
+    out_rgb = np.zeros_like(rgb).reshape(-1, rgb.shape[-1])
+    out_depth = np.full(height * width, np.inf, dtype=depth.dtype)
+    out_rgb[dst_index] = rgb.reshape(-1, rgb.shape[-1])[src_index[winners]]
+    out_depth[dst_index] = dst_depth[winners]
+    holes = np.ones(height * width, dtype=bool)
+    holes[dst_index] = False
+    return out_rgb.reshape(rgb.shape), out_depth.reshape(depth.shape), holes.reshape(depth.shape)
+
+
+def fill_holes_np(rgb, depth, holes, iterations=8):
+    """
+    Fill disocclusion holes in-place by repeatedly copying the farthest of the 4-neighbours.
+
+    Disocclusions reveal surfaces that were hidden behind the foreground, so the background (farthest)
+    neighbour is a better guess than the foreground one. Returns the mask of the remaining holes.
+    """
+    holes = holes.copy()
+    for _ in range(iterations):
+        if not holes.any():
+            break
+        # Neighbour depths, with holes treated as unavailable
+        masked_depth = np.where(holes, -np.inf, depth)
+        padded_depth = np.pad(masked_depth, 1, constant_values=-np.inf)
+        padded_rgb = np.pad(rgb, ((1, 1), (1, 1), (0, 0)))
+        shifts = [(0, 1), (2, 1), (1, 0), (1, 2)]
+        neighbour_depth = np.stack([padded_depth[i:i + depth.shape[0], j:j + depth.shape[1]] for i, j in shifts])
+        best = np.argmax(neighbour_depth, axis=0)
+        best_depth = np.take_along_axis(neighbour_depth, best[np.newaxis], axis=0)[0]
+        fillable = holes & (best_depth > -np.inf)
+        rows, cols = np.nonzero(fillable)
+        offsets = np.array(shifts)[best[rows, cols]]
+        rgb[rows, cols] = padded_rgb[rows + offsets[:, 0], cols + offsets[:, 1]]
+        depth[rows, cols] = best_depth[rows, cols]
+        holes &= ~fillable
+    return holes
+
+
+def reproject(rgb, depth, src_pose, dst_pose, fovx=DEFAULT_FOVX, fovy=DEFAULT_FOVY):
+    """
+    Same as `reproject_np`, but for torch tensors, e.g., on the GPU. The z-buffer is resolved with scatter
+    reductions instead of sorting: the closest depth of each destination pixel is found first, and ties are
+    broken by the lowest source pixel index, as in `reproject_np`.
+    """
+    height, width = depth.shape
+    fx, fy, cx, cy = intrinsics(width, height, fovx, fovy)
+    device = depth.device
+    dtype = depth.dtype if depth.dtype == th.float64 else th.float32
+    # Pixel centers of the source image
+    v, u = th.meshgrid(
+        th.arange(height, device=device, dtype=dtype), th.arange(width, device=device, dtype=dtype), indexing='ij'
+    )
+    x = ((u + 0.5 - cx) / fx).flatten()
+    y = ((v + 0.5 - cy) / fy).flatten()
+    z = depth.flatten().to(dtype)
+    finite = th.isfinite(z) & (z > 0)
+    # Homogeneous points in source camera space, with w = 0 for points at infinity
+    z_or_one = th.where(finite, z, th.ones_like(z))
+    points = th.stack([x * z_or_one, y * z_or_one, z_or_one, finite.to(dtype)])
+    # Transform from source camera to destination camera in a single matrix
+    src_to_dst = np.linalg.inv(camera_to_world(*dst_pose)) @ camera_to_world(*src_pose)
+    points = th.from_numpy(src_to_dst).to(device, dtype) @ points
+    z_dst = points[2]
+    in_front = z_dst > 1e-6
+    z_safe = th.where(in_front, z_dst, th.ones_like(z_dst))
+    u_dst = th.floor(points[0] / z_safe * fx + cx).long()
+    v_dst = th.floor(points[1] / z_safe * fy + cy).long()
+    valid = in_front & (u_dst >= 0) & (u_dst < width) & (v_dst >= 0) & (v_dst < height)
+    src_index = th.nonzero(valid)[:, 0]
+    dst_index = v_dst[valid] * width + u_dst[valid]
+    dst_depth = th.where(finite[valid], z_dst[valid], th.full_like(z_dst[valid], float('inf')))
+    # Z-buffer: closest depth of each destination pixel, then the first source pixel at that depth
+    closest = th.full((height * width,), float('inf'), device=device, dtype=dtype)
+    closest.scatter_reduce_(0, dst_index, dst_depth, 'amin')
+    is_closest = dst_depth == closest[dst_index]
+    winners = th.full((height * width,), height * width, device=device, dtype=th.long)
+    winners.scatter_reduce_(0, dst_index[is_closest], src_index[is_closest], 'amin')
+    covered = winners < height * width
+    out_rgb = th.zeros_like(rgb).reshape(-1, rgb.shape[-1])
+    out_rgb[covered] = rgb.reshape(-1, rgb.shape[-1])[winners[covered]]
+    out_depth = th.where(covered, closest, th.full_like(closest, float('inf'))).to(depth.dtype)
+    return out_rgb.reshape(rgb.shape), out_depth.reshape(depth.shape), ~covered.reshape(depth.shape)
+
+
+def fill_holes(rgb, depth, holes, iterations=8):
+    """
+    Same as `fill_holes_np`, but for torch tensors, e.g., on the GPU. Only the neighbours of the remaining
+    holes are gathered, so each iteration costs time proportional to the number of holes.
+    """
+    height, width = depth.shape
+    holes = holes.clone()
+    shifts = th.tensor([(-1, 0), (1, 0), (0, -1), (0, 1)], device=depth.device)
+    for _ in range(iterations):
+        rows, cols = th.nonzero(holes, as_tuple=True)
+        if len(rows) == 0:
+            break
+        neighbour_rows = rows.unsqueeze(0) + shifts[:, :1]
+        neighbour_cols = cols.unsqueeze(0) + shifts[:, 1:]
+        inside = (neighbour_rows >= 0) & (neighbour_rows < height) & (neighbour_cols >= 0) & (neighbour_cols < width)
+        neighbour_rows, neighbour_cols = neighbour_rows.clamp(0, height - 1), neighbour_cols.clamp(0, width - 1)
+        # Neighbour depths, with holes and pixels outside the image treated as unavailable
+        available = inside & ~holes[neighbour_rows, neighbour_cols]
+        unavailable = th.full(neighbour_rows.shape, -float('inf'), dtype=depth.dtype, device=depth.device)
+        neighbour_depth = th.where(available, depth[neighbour_rows, neighbour_cols], unavailable)
+        # The first of the farthest neighbours, as `np.argmax`
+        best = th.argmax(neighbour_depth, dim=0, keepdim=True)
+        best_depth = neighbour_depth.gather(0, best)[0]
+        fillable = best_depth > -float('inf')
+        rows, cols = rows[fillable], cols[fillable]
+        best_rows = neighbour_rows.gather(0, best)[0][fillable]
+        best_cols = neighbour_cols.gather(0, best)[0][fillable]
+        # Read all neighbours before writing, so that holes filled in this iteration are not used yet
+        rgb[rows, cols] = rgb[best_rows, best_cols]
+        depth[rows, cols] = best_depth[fillable]
+        holes[rows, cols] = False
+    return holes
+
+
+class ReprojectionScheduler:
+    """
+    Decide whether a frame can be reprojected from the keyframe or requires a full render.
+
+    A full render is requested every `keyframe_interval` frames, when the pose moved too far from the
+    keyframe pose, or when the reprojected frame has too many holes.
+    """
+
+    def __init__(self, keyframe_interval=4, max_hole_fraction=0.05, max_translation=0.1, max_rotation=np.radians(5)):
+        self.keyframe_interval = keyframe_interval
+        self.max_hole_fraction = max_hole_fraction
+        self.max_translation = max_translation
+        self.max_rotation = max_rotation
+        self.keyframe_pose = None
+        self.frames_since_keyframe = 0
+        # Statistics
+        self.full_renders = 0
+        self.reprojected_frames = 0
+        self.reprojection_time = 0.0
+
+    def needs_full_render(self, pose):
+        if self.keyframe_pose is None or self.frames_since_keyframe + 1 >= self.keyframe_interval:
+            return True
+        translation, rotation = pose_delta(self.keyframe_pose, pose)
+        return translation > self.max_translation or rotation > self.max_rotation
+
+    def accept(self, hole_fraction):
+        """Record a reprojected frame if its hole fraction is acceptable."""
+        if hole_fraction > self.max_hole_fraction:
+            return False
+        self.frames_since_keyframe += 1
+        self.reprojected_frames += 1
+        return True
+
+    def record_time(self, elapsed):
+        """Record the time in seconds spent warping and filling an accepted frame."""
+        self.reprojection_time += elapsed
+
+    def stats(self):
+        return {
+            'full_renders': self.full_renders,
+            'reprojected_frames': self.reprojected_frames,
+            'mean_reprojection_ms': self.reprojection_time / max(self.reprojected_frames, 1) * 1000,
+        }
+
+    def on_full_render(self, pose):
+        self.keyframe_pose = pose
+        self.frames_since_keyframe = 0
+        self.full_renders += 1
+
+    def reset(self):
+        self.keyframe_pose = None
+        self.frames_since_keyframe = 0
@@ -0,0 +1,47 @@
+"""
+Transfers of the request and response images between the GPU and the renderer through the buffer pool.
+
+The Replicator background is copied into pooled pinned host buffers that are sent as raw frames, and the raw
+frames of the response are copied into pooled pinned host buffers and uploaded to pooled CUDA tensors, so
+that the render loop doesn't allocate new buffers every frame (see `buffer_pool.py`).
+"""
+
+import numpy as np
+import torch as th
+
+
+def stage_background(pool, rgba, depth, tag):
+    """
+    Copy the RGB channels of an (H, W, 4) uint8 RGBA image and an (H, W) float32 depth image into pooled
+    pinned host buffers, and return them as raw frames.
+    """
+    height, width = depth.shape
+    rgb_host = pool.get((height, width, 3), th.uint8, pin_memory=True, tag=tag)
+    depth_host = pool.get((height, width), th.float32, pin_memory=True, tag=tag)
+    rgb_host.copy_(rgba[:, :, :3])
+    depth_host.copy_(depth)
+    return [rgb_host.numpy(), depth_host.numpy()]
+
+
+def upload_frame(pool, frame, shape, dtype, tag):
+    """Copy a raw frame into a pooled CUDA tensor through a pooled pinned host buffer."""
+    host = pool.get(shape, dtype, pin_memory=True, tag=tag)
+    host_np = host.numpy()
+    np.copyto(host_np, np.frombuffer(frame.buffer, dtype=host_np.dtype).reshape(shape))
+    device = pool.get(shape, dtype, "cuda", tag=tag)
+    device.copy_(host)
+    return device
+
+
+def upload_render(pool, render_frame, inv_depth_frame, rgb_out, depth_out, tag):
+    """
+    Copy the raw rendered RGB (HWC) and inverse depth (HW) frames into the given CUDA tensors, converting
+    the inverse depth to depth.
+    """
+    render_host = pool.get(rgb_out.shape, th.uint8, pin_memory=True, tag=f"{tag}/render")
+    inv_depth_host = pool.get(depth_out.shape, th.float32, pin_memory=True, tag=f"{tag}/render")
+    render_np, inv_depth_np = render_host.numpy(), inv_depth_host.numpy()
+    np.copyto(render_np, np.frombuffer(render_frame.buffer, dtype=np.uint8).reshape(render_np.shape))
+    np.copyto(inv_depth_np, np.frombuffer(inv_depth_frame.buffer, dtype=np.float32).reshape(inv_depth_np.shape))
+    rgb_out.copy_(render_host) # HWC
+    depth_out.copy_(inv_depth_host).reciprocal_() # HW
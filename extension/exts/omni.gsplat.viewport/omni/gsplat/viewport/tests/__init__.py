@@ -1 +1,4 @@
-from .test_hello_world import *
\ No newline at end of file
+from .test_hello_world import *
+from .test_buffer_pool import *
+from .test_compositing import *
+from .test_reprojection import *
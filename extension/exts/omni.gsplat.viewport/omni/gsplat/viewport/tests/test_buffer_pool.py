@@ -0,0 +1,73 @@
+import numpy as np
+import omni.kit.test
+import torch as th
+import zmq
+
+from omni.gsplat.viewport.buffer_pool import BufferPool
+from omni.gsplat.viewport.staging import stage_background, upload_frame, upload_render
+
+
+class TestBufferPool(omni.kit.test.AsyncTestCase):
+    shape = (72, 128)
+
+    def _response_frames(self, rng):
+        """Raw frames of a rendered view, as received from the renderer."""
+        rgb = rng.integers(0, 256, (*self.shape, 3), dtype=np.uint8)
+        inv_depth = rng.uniform(0.1, 1, self.shape).astype(np.float32)
+        return rgb, inv_depth, [zmq.Frame(rgb.tobytes()), zmq.Frame(inv_depth.tobytes())]
+
+    def _render_frame(self, pool, rng, cameras):
+        """Go through the same staging as the render worker for the viewport and each extra camera."""
+        pool.next_frame()
+        rgba = th.from_numpy(rng.integers(0, 256, (*self.shape, 4), dtype=np.uint8)).cuda()
+        depth = th.from_numpy(rng.uniform(1, 10, self.shape).astype(np.float32)).cuda()
+        for tag in ["viewport"] + cameras:
+            rgb_np, depth_np = stage_background(pool, rgba, depth, tag)
+            np.testing.assert_array_equal(rgb_np, rgba[:, :, :3].cpu().numpy())
+            np.testing.assert_array_equal(depth_np, depth.cpu().numpy())
+            rgb, inv_depth, frames = self._response_frames(rng)
+            rgb_out = pool.get((*self.shape, 3), th.uint8, "cuda", tag=tag)
+            depth_out = pool.get(self.shape, th.float32, "cuda", tag=tag)
+            upload_render(pool, *frames, rgb_out, depth_out, tag)
+            np.testing.assert_array_equal(rgb_out.cpu().numpy(), rgb)
+            np.testing.assert_allclose(depth_out.cpu().numpy(), 1 / inv_depth, rtol=1e-6)
+
+    async def test_no_allocations_after_warm_up(self):
+        pool = BufferPool()
+        rng = np.random.default_rng(0)
+        cameras = ["/World/Camera_Left", "/World/Camera_Right"]
+        self._render_frame(pool, rng, cameras)
+        pool.mark_warm()
+        for _ in range(10):
+            self._render_frame(pool, rng, cameras)
+        self.assertEqual(pool.allocations_after_warm_up, 0)
+        # Pinned RGB and depth for the background and the render, and the CUDA RGB and depth, for each view
+        self.assertEqual(pool.allocations, 18)
+
+    async def test_upload_frame_reuses_buffers(self):
+        pool = BufferPool()
+        rng = np.random.default_rng(1)
+        for _ in range(3):
+            alpha = rng.uniform(0, 1, self.shape).astype(np.float32)
+            uploaded = upload_frame(pool, zmq.Frame(alpha.tobytes()), self.shape, th.float32, "layer/alpha")
+            self.assertEqual(uploaded.device.type, "cuda")
+            np.testing.assert_array_equal(uploaded.cpu().numpy(), alpha)
+        self.assertEqual(pool.allocations, 2)
+
+    async def test_buffers_are_reused(self):
+        pool = BufferPool()
+        buffer = pool.get((720, 1280), th.float32, tag="viewport")
+        self.assertIs(pool.get((720, 1280), th.float32, tag="viewport"), buffer)
+        self.assertIsNot(pool.get((720, 1280), th.float32, tag="/World/Camera"), buffer)
+        self.assertIsNot(pool.get((720, 1280), th.uint8, tag="viewport"), buffer)
+
+    async def test_idle_buffers_are_freed(self):
+        pool = BufferPool(max_idle_frames=2)
+        rng = np.random.default_rng(2)
+        cameras = [f"/World/Camera_{i}" for i in range(8)]
+        self._render_frame(pool, rng, cameras)
+        # The extra cameras are removed, and only the viewport keeps being rendered
+        for _ in range(3):
+            self._render_frame(pool, rng, [])
+        self.assertEqual(pool.stats()['buffers'], 6)
+        self.assertEqual(pool.allocations, 6 * 9)
@@ -0,0 +1,61 @@
+import numpy as np
+import omni.kit.test
+import torch as th
+
+from omni.gsplat.viewport.compositing import composite_layer, composite_layer_np, pack_layer, unpack_layer
+from omni.gsplat.viewport.reprojection import fill_holes, reproject
+
+
+class TestCompositing(omni.kit.test.AsyncTestCase):
+    def _random_layer(self, rng, shape=(4, 5)):
+        alpha = rng.uniform(0, 1, shape).astype(np.float32)
+        alpha[0, 0] = 0 # Empty pixel
+        depth = rng.uniform(0.5, 2, shape).astype(np.float32)
+        rgb = (rng.uniform(0, 1, (*shape, 3)) * alpha[..., np.newaxis]).astype(np.float32)
+        bg_rgb = rng.uniform(0, 1, (*shape, 3)).astype(np.float32)
+        bg_depth = rng.uniform(0.5, 2, shape).astype(np.float32)
+        bg_depth[0, 1] = np.inf
+        return rgb, alpha, alpha / depth, bg_rgb, bg_depth
+
+    async def test_depth_test(self):
+        rgb, alpha, inv_depth, bg_rgb, bg_depth = self._random_layer(np.random.default_rng(0))
+        out_rgb, out_inv_depth = composite_layer_np(rgb, alpha, inv_depth, bg_rgb, bg_depth)
+        visible = (alpha > 0) & (alpha / np.maximum(inv_depth, 1e-12) < bg_depth)
+        np.testing.assert_allclose(out_rgb[~visible], bg_rgb[~visible])
+        expected = rgb + (1 - alpha[..., np.newaxis]) * bg_rgb
+        np.testing.assert_allclose(out_rgb[visible], expected[visible], rtol=1e-6)
+        np.testing.assert_array_equal(out_inv_depth[~visible], 0)
+        self.assertFalse(visible[0, 0])
+        self.assertTrue(visible[0, 1])
+
+    async def test_torch_matches_numpy(self):
+        layer = self._random_layer(np.random.default_rng(1), shape=(16, 32))
+        expected_rgb, expected_inv_depth = composite_layer_np(*layer)
+        out_rgb, out_inv_depth = composite_layer(*(th.from_numpy(array) for array in layer))
+        np.testing.assert_allclose(out_rgb.numpy(), expected_rgb, rtol=1e-6)
+        np.testing.assert_allclose(out_inv_depth.numpy(), expected_inv_depth, rtol=1e-6)
+
+    def _pack(self, rgb, alpha, inv_depth):
+        return pack_layer(rgb, alpha, inv_depth, th.empty((*alpha.shape, 4)), th.empty(alpha.shape))
+
+    async def test_pack_layer_round_trip(self):
+        rgb, alpha, inv_depth, _, _ = (th.from_numpy(array) for array in self._random_layer(np.random.default_rng(2)))
+        layer, depth = self._pack(rgb, alpha, inv_depth)
+        self.assertEqual(depth[0, 0].item(), float('inf'))
+        out_rgb, out_alpha, out_inv_depth = unpack_layer(layer, depth)
+        np.testing.assert_array_equal(out_rgb.numpy(), rgb.numpy())
+        np.testing.assert_array_equal(out_alpha.numpy(), alpha.numpy())
+        np.testing.assert_allclose(out_inv_depth.numpy(), inv_depth.numpy(), rtol=1e-6)
+
+    async def test_reprojected_layer_uses_the_current_background(self):
+        # The keyframe layer is warped, then composited against the background of the current frame, e.g.,
+        # with moving robots while the timeline is playing
+        rgb, alpha, inv_depth, _, _ = (th.from_numpy(array) for array in self._random_layer(np.random.default_rng(3), shape=(16, 32)))
+        _, _, _, bg_rgb, bg_depth = (th.from_numpy(array) for array in self._random_layer(np.random.default_rng(4), shape=(16, 32)))
+        pose = (np.array([0.1, 0.2, 0.3]), np.array([0.1, -0.2, 0.3]))
+        layer, depth = reproject(*self._pack(rgb, alpha, inv_depth), pose, pose)[:2]
+        fill_holes(layer, depth, th.zeros(depth.shape, dtype=th.bool))
+        out_rgb, out_inv_depth = composite_layer(*unpack_layer(layer, depth), bg_rgb, bg_depth)
+        expected_rgb, expected_inv_depth = composite_layer(rgb, alpha, inv_depth, bg_rgb, bg_depth)
+        np.testing.assert_allclose(out_rgb.numpy(), expected_rgb.numpy(), rtol=1e-5)
+        np.testing.assert_allclose(out_inv_depth.numpy(), expected_inv_depth.numpy(), rtol=1e-5)
@@ -0,0 +1,120 @@
+import numpy as np
+import omni.kit.test
+import torch as th
+
+from omni.gsplat.viewport.reprojection import (
+    ReprojectionScheduler, fill_holes, fill_holes_np, intrinsics, reproject, reproject_np,
+)
+
+
+class TestReprojection(omni.kit.test.AsyncTestCase):
+    def _keyframe(self, rng, shape=(32, 64)):
+        rgb = rng.integers(0, 256, (*shape, 3), dtype=np.uint8)
+        depth = rng.uniform(1, 3, shape)
+        depth[0, :] = np.inf # Pixels without splats
+        return rgb, depth
+
+    async def test_identity_pose_returns_keyframe(self):
+        rgb, depth = self._keyframe(np.random.default_rng(0))
+        pose = (np.array([0.1, 0.2, 0.3]), np.array([0.1, -0.2, 0.3]))
+        out_rgb, out_depth, holes = reproject_np(rgb, depth, pose, pose)
+        np.testing.assert_array_equal(out_rgb, rgb)
+        np.testing.assert_allclose(out_depth, depth)
+        self.assertFalse(holes.any())
+
+    async def test_translation_shifts_pixels(self):
+        rgb, _ = self._keyframe(np.random.default_rng(1))
+        depth = np.full(rgb.shape[:2], 2.0)
+        fx, _, _, _ = intrinsics(rgb.shape[1], rgb.shape[0])
+        # Moving the camera to the right (+X) by this distance moves a plane at depth 2 by 3 pixels to the left
+        shift = 3
+        src_pose = (np.zeros(3), np.zeros(3))
+        dst_pose = (np.array([shift * 2.0 / fx, 0, 0]), np.zeros(3))
+        out_rgb, out_depth, holes = reproject_np(rgb, depth, src_pose, dst_pose)
+        np.testing.assert_array_equal(out_rgb[:, :-shift], rgb[:, shift:])
+        np.testing.assert_allclose(out_depth[:, :-shift], 2.0)
+        self.assertTrue(holes[:, -shift:].all())
+        self.assertFalse(holes[:, :-shift].any())
+
+    async def test_closest_pixel_wins(self):
+        rgb = np.zeros((32, 64, 3), dtype=np.uint8)
+        rgb[:, 30] = 255
+        depth = np.full((32, 64), 4.0)
+        # Column 30 is in front of its neighbours, and must stay visible when warped over them
+        depth[:, 30] = 1.0
+        src_pose = (np.zeros(3), np.zeros(3))
+        fx, _, _, _ = intrinsics(64, 32)
+        dst_pose = (np.array([-2.0 / fx, 0, 0]), np.zeros(3))
+        out_rgb, out_depth, _ = reproject_np(rgb, depth, src_pose, dst_pose)
+        self.assertTrue((out_rgb[:, 32] == 255).all())
+        np.testing.assert_allclose(out_depth[:, 32], 1.0)
+
+    async def test_fill_holes_uses_farthest_neighbour(self):
+        rgb = np.zeros((3, 3, 3), dtype=np.uint8)
+        depth = np.ones((3, 3))
+        rgb[0, 1], depth[0, 1] = 10, 1.0
+        rgb[2, 1], depth[2, 1] = 20, 4.0
+        rgb[1, 0], depth[1, 0] = 30, 2.0
+        rgb[1, 2], depth[1, 2] = 40, 3.0
+        holes = np.zeros((3, 3), dtype=bool)
+        holes[1, 1] = True
+        remaining = fill_holes_np(rgb, depth, holes)
+        self.assertFalse(remaining.any())
+        np.testing.assert_array_equal(rgb[1, 1], 20)
+        self.assertEqual(depth[1, 1], 4.0)
+
+    async def test_fill_holes_leaves_isolated_holes(self):
+        rgb = np.zeros((4, 4, 3), dtype=np.uint8)
+        depth = np.ones((4, 4))
+        holes = np.ones((4, 4), dtype=bool)
+        remaining = fill_holes_np(rgb, depth, holes, iterations=2)
+        self.assertTrue(remaining.all())
+
+    async def test_torch_matches_numpy(self):
+        rng = np.random.default_rng(2)
+        rgb, depth = self._keyframe(rng, shape=(48, 80))
+        src_pose = (np.zeros(3), np.zeros(3))
+        dst_pose = (np.array([0.05, -0.02, 0.03]), np.array([0.01, 0.03, -0.02]))
+        expected = reproject_np(rgb, depth, src_pose, dst_pose)
+        out = reproject(th.from_numpy(rgb), th.from_numpy(depth), src_pose, dst_pose)
+        for actual, reference in zip(out, expected):
+            np.testing.assert_array_equal(actual.numpy(), reference)
+        expected_rgb, expected_depth = expected[0].copy(), expected[1].copy()
+        expected_holes = fill_holes_np(expected_rgb, expected_depth, expected[2])
+        out_rgb, out_depth = out[0].clone(), out[1].clone()
+        out_holes = fill_holes(out_rgb, out_depth, out[2])
+        np.testing.assert_array_equal(out_rgb.numpy(), expected_rgb)
+        np.testing.assert_array_equal(out_depth.numpy(), expected_depth)
+        np.testing.assert_array_equal(out_holes.numpy(), expected_holes)
+
+
+class TestReprojectionScheduler(omni.kit.test.AsyncTestCase):
+    async def test_full_render_without_keyframe(self):
+        scheduler = ReprojectionScheduler()
+        self.assertTrue(scheduler.needs_full_render((np.zeros(3), np.zeros(3))))
+
+    async def test_pose_thresholds(self):
+        scheduler = ReprojectionScheduler(max_translation=0.1, max_rotation=np.radians(5))
+        scheduler.on_full_render((np.zeros(3), np.zeros(3)))
+        self.assertFalse(scheduler.needs_full_render((np.array([0.05, 0, 0]), np.zeros(3))))
+        self.assertTrue(scheduler.needs_full_render((np.array([0.2, 0, 0]), np.zeros(3))))
+        self.assertFalse(scheduler.needs_full_render((np.zeros(3), np.array([0, np.radians(4), 0]))))
+        self.assertTrue(scheduler.needs_full_render((np.zeros(3), np.array([0, np.radians(6), 0]))))
+
+    async def test_hole_threshold(self):
+        scheduler = ReprojectionScheduler(max_hole_fraction=0.05)
+        scheduler.on_full_render((np.zeros(3), np.zeros(3)))
+        self.assertFalse(scheduler.accept(0.06))
+        self.assertEqual(scheduler.reprojected_frames, 0)
+        self.assertTrue(scheduler.accept(0.04))
+        self.assertEqual(scheduler.reprojected_frames, 1)
+
+    async def test_keyframe_interval(self):
+        scheduler = ReprojectionScheduler(keyframe_interval=3)
+        pose = (np.zeros(3), np.zeros(3))
+        scheduler.on_full_render(pose)
+        self.assertFalse(scheduler.needs_full_render(pose))
+        scheduler.accept(0.0)
+        self.assertFalse(scheduler.needs_full_render(pose))
+        scheduler.accept(0.0)
+        self.assertTrue(scheduler.needs_full_render(pose))
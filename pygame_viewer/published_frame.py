@@ -0,0 +1,32 @@
+"""
+Decoder of the frames published by the renderer, see `vanillags_renderer/src/publisher.py` for the format.
+
+This is a copy of `decode_published_frame` in `publisher.py`, since this container only mounts its own
+directory, and only depends on NumPy so that the renderer tests can check it against the encoder.
+"""
+
+import json
+import struct
+import zlib
+
+import numpy as np
+
+
+def decode_published_frame(frame):
+    """Decode a published message. Returns the metadata and a list of images, one list per view."""
+    topic_end = frame.index(b'\0')
+    (header_length,) = struct.unpack_from('<I', frame, topic_end + 1)
+    offset = topic_end + 1 + 4
+    header = json.loads(frame[offset:offset + header_length])
+    offset += header_length
+    views = []
+    for header_images in header['views']:
+        view = []
+        for image in header_images:
+            data = frame[offset:offset + image['size']]
+            offset += image['size']
+            if header['compression'] == 'zlib':
+                data = zlib.decompress(data)
+            view.append(np.frombuffer(data, dtype=image['dtype']).reshape(image['shape']))
+        views.append(view)
+    return header['metadata'], views
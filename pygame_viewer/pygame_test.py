@@ -8,20 +8,53 @@ import pygame
 import zmq
 from PIL import Image
 
+from published_frame import decode_published_frame
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument('--socket-url', type=str, 
                         default="ipc:///tmp/omni-3dgs-extension/vanillags_renderer",
                         help="ZMQ socket URL to connect to")
+    parser.add_argument('--subscribe-url', type=str, default=None,
+                        help="Watch the frames published by the renderer at this ZMQ socket URL instead of requesting frames")
+    parser.add_argument('--stream', type=str, default="viewport", help="Stream ID to watch")
+    parser.add_argument('--tier', type=str, default="half", choices=['full', 'half', 'preview'],
+                        help="Resolution and compression tier to watch")
     args = parser.parse_args()
     return args
 
+def wait_until_ready(context, socket_url, interval=0.5):
+    """Ping the renderer until it reports that it is ready, instead of blocking on the first frame."""
+    last_state = None
+    while True:
+        socket = context.socket(zmq.REQ)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.connect(socket_url)
+        socket.send_json({'type': 'ping'})
+        status = socket.recv_json() if socket.poll(interval * 1000) else {'state': 'unreachable'}
+        # A REQ socket cannot send again before receiving the reply, so always use a new socket
+        socket.close()
+        if status['state'] == 'ready':
+            return
+        if status['state'] != last_state:
+            print(f"Waiting for renderer: {status['state']} {status.get('message', '')}")
+            last_state = status['state']
+        time.sleep(interval)
+
 def main(args):
     # Initialize ZMQ
     context = zmq.Context()
-    socket = context.socket(zmq.REQ)
-    socket.connect(args.socket_url)
+    if args.subscribe_url is not None:
+        # Watch the frames rendered for another client, keeping only the latest frame
+        socket = context.socket(zmq.SUB)
+        socket.setsockopt(zmq.CONFLATE, 1)
+        socket.setsockopt(zmq.SUBSCRIBE, f"{args.stream}/{args.tier}".encode() + b'\0')
+        socket.connect(args.subscribe_url)
+    else:
+        wait_until_ready(context, args.socket_url)
+        socket = context.socket(zmq.REQ)
+        socket.connect(args.socket_url)
 
     # Initialize Pygame
     pygame.init()
@@ -50,59 +83,66 @@ def main(args):
             if event.type == pygame.QUIT:
                 running = False
 
-        # Prepare camera pose data
-        pose_data = {
-            'position': camera_position,
-            'rotation': camera_rotation
-        }
-
-        try:
-            # Create example background RGB (blue) and depth (all 1.2)
-            bg_rgb_np = np.ones((720, 1280, 3), dtype=np.float32) * np.array([0.0, 0.0, 1.0])
-            bg_depth_np = np.full((720, 1280), 1.2, dtype=np.float32)
+        if args.subscribe_url is not None:
+            # Show the latest published frame, if any
+            if socket.poll(0):
+                _, views = decode_published_frame(socket.recv())
+                image = cv2.resize(views[0][0], (width, height), interpolation=cv2.INTER_LINEAR).transpose(1, 0, 2)
+                screen_buffer[:] = image
+        else:
+            # Prepare camera pose data
+            pose_data = {
+                'position': camera_position,
+                'rotation': camera_rotation
+            }
+
+            try:
+                # Create example background RGB (blue) and depth (all 1.2)
+                bg_rgb_np = np.ones((720, 1280, 3), dtype=np.float32) * np.array([0.0, 0.0, 1.0])
+                bg_depth_np = np.full((720, 1280), 1.2, dtype=np.float32)
             
-            # Convert numpy arrays to PIL Images
-            bg_rgb_img = Image.fromarray((bg_rgb_np * 255).astype(np.uint8))
-            bg_depth_img = Image.fromarray(bg_depth_np, mode='F')  # 'F' mode for float32
+                # Convert numpy arrays to PIL Images
+                bg_rgb_img = Image.fromarray((bg_rgb_np * 255).astype(np.uint8))
+                bg_depth_img = Image.fromarray(bg_depth_np, mode='F')  # 'F' mode for float32
             
-            # Compress as TIFF
-            bg_rgb_buffer = io.BytesIO()
-            bg_depth_buffer = io.BytesIO()
-            bg_rgb_img.save(bg_rgb_buffer, format='TIFF')
-            bg_depth_img.save(bg_depth_buffer, format='TIFF')
-
-            # Send multipart message
-            socket.send_json(pose_data, zmq.SNDMORE)
-            socket.send(bg_rgb_buffer.getvalue(), zmq.SNDMORE)
-            socket.send(bg_depth_buffer.getvalue())
-
-            # Receive multipart response
-            metadata = socket.recv_json()
-            compressed_render = socket.recv()
-            compressed_inv_depth = socket.recv()
-
-            if 'error' in metadata:
-                print(f"Error from server: {metadata['error']}")
-            else:
-                # Decode TIFF images using PIL
-                render_img = Image.open(io.BytesIO(compressed_render))
-                inv_depth_img = Image.open(io.BytesIO(compressed_inv_depth))
+                # Compress as TIFF
+                bg_rgb_buffer = io.BytesIO()
+                bg_depth_buffer = io.BytesIO()
+                bg_rgb_img.save(bg_rgb_buffer, format='TIFF')
+                bg_depth_img.save(bg_depth_buffer, format='TIFF')
+
+                # Send multipart message
+                socket.send_json(pose_data, zmq.SNDMORE)
+                socket.send(bg_rgb_buffer.getvalue(), zmq.SNDMORE)
+                socket.send(bg_depth_buffer.getvalue())
+
+                # Receive multipart response
+                metadata = socket.recv_json()
+                compressed_render = socket.recv()
+                compressed_inv_depth = socket.recv()
+
+                if 'error' in metadata:
+                    print(f"Error from server: {metadata['error']}")
+                else:
+                    # Decode TIFF images using PIL
+                    render_img = Image.open(io.BytesIO(compressed_render))
+                    inv_depth_img = Image.open(io.BytesIO(compressed_inv_depth))
                 
-                # Convert to numpy arrays
-                render_np = np.array(render_img) # HWC
-                inv_depth_np = np.array(inv_depth_img) # HW
-                image = render_np
-                # Uncomment below to see depth image
-                # z_far = 5
-                # normalized_depth = np.minimum(1 / inv_depth_np, z_far) / z_far
-                # image = (normalized_depth * 255)[..., np.newaxis].repeat(3, axis=-1)
-
-                # Resize and process image
-                image = cv2.resize(image, (width, height), interpolation=cv2.INTER_LINEAR).transpose(1, 0, 2)
-                screen_buffer[:] = image
-
-        except Exception as e:
-            print(f"Error during communication: {e}")
+                    # Convert to numpy arrays
+                    render_np = np.array(render_img) # HWC
+                    inv_depth_np = np.array(inv_depth_img) # HW
+                    image = render_np
+                    # Uncomment below to see depth image
+                    # z_far = 5
+                    # normalized_depth = np.minimum(1 / inv_depth_np, z_far) / z_far
+                    # image = (normalized_depth * 255)[..., np.newaxis].repeat(3, axis=-1)
+
+                    # Resize and process image
+                    image = cv2.resize(image, (width, height), interpolation=cv2.INTER_LINEAR).transpose(1, 0, 2)
+                    screen_buffer[:] = image
+
+            except Exception as e:
+                print(f"Error during communication: {e}")
 
         animation_progress = (np.sin(camera_curve_time) + 1) / 2
 
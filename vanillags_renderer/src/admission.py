@@ -0,0 +1,102 @@
+"""
+Admission control for render requests.
+
+Requests may carry a deadline, either as an absolute `deadline` (UNIX time in seconds) or as a `max_age` in
+seconds relative to `sent_at` (UNIX time in seconds, defaults to the time the request was received).
+Requests that cannot be finished before their deadline are refused with an `overloaded` status, and
+requests that expired before they are received or while waiting in the queue are dropped with an
+`expired` status. Both responses
+contain an `error` key, so that clients unaware of these statuses treat them as errors.
+"""
+
+import time
+from collections import deque, namedtuple
+
+PendingRequest = namedtuple('PendingRequest', ['identity', 'frames', 'metadata', 'received_at', 'deadline'])
+
+
+class AdmissionController:
+    def __init__(self, max_queue_depth=4, smoothing=0.2, clock=time.time):
+        self.max_queue_depth = max_queue_depth
+        self.smoothing = smoothing
+        self.clock = clock
+        self.queue = deque()
+        self.render_time = None
+        """Exponential moving average of the time to serve a request in seconds."""
+        # Counters
+        self.served = 0
+        self.rejected = 0
+        self.expired = 0
+
+    def get_deadline(self, metadata, received_at):
+        """Return the absolute deadline of a request, or None if it doesn't have one."""
+        deadlines = []
+        if 'deadline' in metadata:
+            deadlines.append(metadata['deadline'])
+        if 'max_age' in metadata:
+            deadlines.append(metadata.get('sent_at', received_at) + metadata['max_age'])
+        return min(deadlines) if deadlines else None
+
+    def retry_after(self):
+        """Estimated time in seconds until the queue has room for another request."""
+        return (len(self.queue) + 1) * (self.render_time or 0)
+
+    def overloaded_response(self):
+        self.rejected += 1
+        retry_after = self.retry_after()
+        return {
+            'status': 'overloaded',
+            'error': f"Server overloaded, retry after {retry_after:.3f} s",
+            'retry_after': retry_after,
+            'queue_depth': len(self.queue),
+        }
+
+    def expired_response(self):
+        self.expired += 1
+        return {
+            'status': 'expired',
+            'error': "Request expired before rendering",
+            'retry_after': 0,
+            'queue_depth': len(self.queue),
+        }
+
+    def admit(self, identity, frames, metadata):
+        """Queue a request. Returns None if the request is admitted, or the metadata of the rejection."""
+        now = self.clock()
+        deadline = self.get_deadline(metadata, now)
+        # Requests that expired on the way are not retried, so don't ask the client to retry them
+        if deadline is not None and now > deadline:
+            return self.expired_response()
+        if len(self.queue) >= self.max_queue_depth:
+            return self.overloaded_response()
+        # Refuse work that cannot be finished in time, given the requests ahead in the queue
+        if deadline is not None and now + (len(self.queue) + 1) * (self.render_time or 0) > deadline:
+            return self.overloaded_response()
+        self.queue.append(PendingRequest(identity, frames, metadata, now, deadline))
+        return None
+
+    def pop(self):
+        """
+        Dequeue the next request. Returns the request and None, or the request and the metadata of the
+        expiry response if the request can no longer be finished before its deadline.
+        """
+        request = self.queue.popleft()
+        if request.deadline is not None and self.clock() + (self.render_time or 0) > request.deadline:
+            return request, self.expired_response()
+        return request, None
+
+    def record_render_time(self, elapsed):
+        self.served += 1
+        if self.render_time is None:
+            self.render_time = elapsed
+        else:
+            self.render_time += self.smoothing * (elapsed - self.render_time)
+
+    def stats(self):
+        return {
+            'served': self.served,
+            'rejected': self.rejected,
+            'expired': self.expired,
+            'queue_depth': len(self.queue),
+            'render_time': self.render_time,
+        }
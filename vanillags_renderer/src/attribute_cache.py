@@ -0,0 +1,146 @@
+"""
+Per-Gaussian attributes derived from the model parameters, computed once at load time instead of every frame.
+
+`GaussianModel` stores the raw parameters, and its `get_*` properties apply the activations on every access,
+i.e., every frame: the exponential of the scales, the normalization of the rotations, the sigmoid of the
+opacities and the concatenation of the SH coefficients. Since the model is static while rendering, the
+`CachedGaussianModel` computes these once, along with the 3D covariances, so that the rasterizer is given
+the precomputed covariances (`compute_cov3D_python`) and each frame only pays for the view-dependent work.
+
+The SH coefficients make up most of the model, so the raw DC and rest coefficients are replaced by views of
+the concatenated coefficients instead of being kept alongside them. The cache then only adds the activated
+scales, rotations and opacities and the covariances, i.e., 14 floats per splat on top of the 59 of the model.
+
+The cache can be persisted next to the checkpoint (`<checkpoint>.attributes.pt`), and is only reused while
+the checkpoint is unchanged (same size and modification time).
+"""
+
+import os
+import sys
+
+import torch
+
+from quality import PER_SPLAT_ATTRIBUTES
+
+# Assume running in the pre-built gaussian-splatting container
+sys.path.append('/workspace/gaussian-splatting')
+
+from scene.gaussian_model import GaussianModel
+
+CACHE_VERSION = 1
+CACHED_ATTRIBUTES = ['scaling', 'rotation', 'opacity', 'features', 'covariance']
+
+
+def cache_path(checkpoint):
+    return f"{checkpoint}.attributes.pt"
+
+
+def checkpoint_signature(checkpoint):
+    """Identify the version of a checkpoint, so that a stale cache is not reused."""
+    stat = os.stat(checkpoint)
+    return {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class CachedGaussianModel(GaussianModel):
+    def __init__(self, sh_degree):
+        super().__init__(sh_degree)
+        # Maps each name in `CACHED_ATTRIBUTES` to a tensor with one entry per splat, or None if not built
+        self.cache = None
+
+    def build_cache(self):
+        with torch.no_grad():
+            self._set_cache({
+                'scaling': super().get_scaling.contiguous(),
+                'rotation': super().get_rotation.contiguous(),
+                'opacity': super().get_opacity.contiguous(),
+                'features': super().get_features.contiguous(),
+                # Upper triangle of the symmetric 3x3 covariance, as expected by the rasterizer
+                'covariance': super().get_covariance(1.0).contiguous(),
+            })
+
+    def _set_cache(self, cache):
+        self.cache = cache
+        # Share the memory of the SH coefficients with the cache, which frees the raw coefficients
+        num_dc = self._features_dc.shape[1]
+        self._features_dc = cache['features'][:, :num_dc]
+        self._features_rest = cache['features'][:, num_dc:]
+
+    def load_cache(self, path, signature):
+        """
+        Load a persisted cache. Returns False if it is missing, unreadable, or was built from another checkpoint.
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            # Only load tensors, since the cache file may not come from a trusted source
+            data = torch.load(path, map_location="cuda", weights_only=True)
+            attributes = data['attributes']
+            num_features = self._features_dc.shape[1] + self._features_rest.shape[1]
+            if data.get('signature') != signature or set(attributes) != set(CACHED_ATTRIBUTES) or \
+                    any(value.shape[0] != self._xyz.shape[0] for value in attributes.values()) or \
+                    attributes['features'].shape[1] != num_features:
+                return False
+        except Exception as e:
+            # e.g., a truncated file or a cache written by an incompatible version of torch
+            print(f"Could not load cached attributes from {path}: {e}")
+            return False
+        self._set_cache(attributes)
+        return True
+
+    def save_cache(self, path, signature):
+        torch.save({'signature': signature, 'attributes': {name: value.cpu() for name, value in self.cache.items()}}, path)
+
+    @property
+    def get_scaling(self):
+        return self.cache['scaling'] if self.cache is not None else super().get_scaling
+
+    @property
+    def get_rotation(self):
+        return self.cache['rotation'] if self.cache is not None else super().get_rotation
+
+    @property
+    def get_opacity(self):
+        return self.cache['opacity'] if self.cache is not None else super().get_opacity
+
+    @property
+    def get_features(self):
+        return self.cache['features'] if self.cache is not None else super().get_features
+
+    def get_covariance(self, scaling_modifier=1):
+        if self.cache is not None and scaling_modifier == 1:
+            return self.cache['covariance']
+        return super().get_covariance(scaling_modifier)
+
+
+def model_bytes(gaussians):
+    """Size of the per-splat tensors of a model and its cache in bytes, counting shared memory once."""
+    tensors = [getattr(gaussians, name) for name in PER_SPLAT_ATTRIBUTES]
+    if getattr(gaussians, 'cache', None) is not None:
+        tensors += list(gaussians.cache.values())
+    storages = {tensor.untyped_storage().data_ptr(): tensor.untyped_storage().nbytes() for tensor in tensors}
+    return sum(storages.values())
+
+
+def load_cached_model(checkpoint, sh_degree=3, persist=False):
+    """
+    Load a checkpoint and build (or, if `persist` is set, load) the cache of derived attributes.
+    If `persist` is set and there is no valid cache next to the checkpoint, the built cache is written there.
+    """
+    gaussians = CachedGaussianModel(sh_degree=sh_degree)
+    gaussians.load_ply(checkpoint)
+    if persist:
+        path = cache_path(checkpoint)
+        signature = checkpoint_signature(checkpoint)
+        if gaussians.load_cache(path, signature):
+            print(f"Loaded cached attributes from {path}")
+            return gaussians
+        gaussians.build_cache()
+        try:
+            gaussians.save_cache(path, signature)
+            print(f"Saved cached attributes to {path}")
+        except OSError as e:
+            # e.g., a read-only checkpoint directory, the in-memory cache still works
+            print(f"Could not save cached attributes to {path}: {e}")
+        return gaussians
+    gaussians.build_cache()
+    return gaussians
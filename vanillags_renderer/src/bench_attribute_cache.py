@@ -0,0 +1,83 @@
+"""
+Compare the time per frame with and without the cache of derived per-Gaussian attributes (see `attribute_cache.py`).
+
+The same views are rendered from the model as loaded (attributes activated every frame) and from the cached
+model (attributes and 3D covariances computed once), and the images are compared to check that the cache
+doesn't change the result beyond floating-point noise. Example:
+
+    python /src/bench_attribute_cache.py --checkpoint /workspace/data/splat.ply --report /tmp/attribute_cache.json
+"""
+
+import argparse
+import json
+import time
+
+import torch
+
+from attribute_cache import load_cached_model, model_bytes
+from image_metrics import max_abs_diff, psnr
+from prune import load_model, render_images, sample_poses
+from renderer import PipelineParamsNoparse, create_camera_from_pose
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checkpoint', type=str,
+                        default="/workspace/data/exports/poster/splatfacto/DATE_TIME/splat/splat.ply",
+                        help="Path to the 3DGS PLY file")
+    parser.add_argument('--log-dir', type=str, default=None, help="Use the camera poses of a recorded session")
+    parser.add_argument('--num-views', type=int, default=20, help="Maximum number of views")
+    parser.add_argument('--radius', type=float, default=0.5, help="Radius of the circle of views, if no log is given")
+    parser.add_argument('--num-repeats', type=int, default=10, help="Number of times each view is rendered")
+    parser.add_argument('--report', type=str, default=None, help="Path to write a JSON report to")
+    args = parser.parse_args()
+    return args
+
+def main(args):
+    cameras = [create_camera_from_pose(position, euler_angles) for position, euler_angles in sample_poses(args)]
+    background = torch.tensor([0, 0, 0], dtype=torch.float32, device="cuda")
+
+    start_time = time.perf_counter()
+    gaussians = load_model(args.checkpoint)
+    load_time = time.perf_counter() - start_time
+    pipeline = PipelineParamsNoparse()
+    # Warm up, then measure
+    render_images(gaussians, pipeline, background, cameras[:1], 1)
+    images, render_time = render_images(gaussians, pipeline, background, cameras, args.num_repeats)
+    num_gaussians = gaussians.get_xyz.shape[0]
+    uncached_bytes = model_bytes(gaussians)
+    del gaussians
+
+    start_time = time.perf_counter()
+    cached = load_cached_model(args.checkpoint)
+    cached_load_time = time.perf_counter() - start_time
+    cached_pipeline = PipelineParamsNoparse()
+    cached_pipeline.compute_cov3D_python = True
+    render_images(cached, cached_pipeline, background, cameras[:1], 1)
+    cached_images, cached_render_time = render_images(cached, cached_pipeline, background, cameras, args.num_repeats)
+    # Count the model parameters too, since the cache shares the memory of the SH coefficients with them
+    cached_bytes = model_bytes(cached)
+    cache_bytes = cached_bytes - uncached_bytes
+
+    report = {
+        'gaussians': num_gaussians,
+        'views': len(cameras),
+        'model_bytes': {'without_cache': uncached_bytes, 'with_cache': cached_bytes},
+        'cache_bytes': cache_bytes,
+        'load_time': {'without_cache': load_time, 'with_cache': cached_load_time},
+        'render_ms': {'without_cache': render_time * 1000, 'with_cache': cached_render_time * 1000},
+        'speedup': render_time / cached_render_time,
+        'min_psnr': min(psnr(image, reference) for image, reference in zip(cached_images, images)),
+        'max_abs_diff': max(max_abs_diff(image, reference) for image, reference in zip(cached_images, images)),
+    }
+    print(f"{num_gaussians} Gaussians, {len(cameras)} views, model of {uncached_bytes / 2 ** 20:.1f} MiB, "
+          f"{cached_bytes / 2 ** 20:.1f} MiB with the cache (+{cache_bytes / 2 ** 20:.1f} MiB)")
+    print(f"Without cache: {render_time * 1000:.2f} ms/frame (loaded in {load_time:.2f} s)")
+    print(f"With cache:    {cached_render_time * 1000:.2f} ms/frame (loaded in {cached_load_time:.2f} s)")
+    print(f"Speedup: {report['speedup']:.2f}x, min PSNR {report['min_psnr']:.2f} dB, max abs diff {report['max_abs_diff']:.0f}")
+    if args.report is not None:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main(parse_args())
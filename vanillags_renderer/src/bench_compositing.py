@@ -0,0 +1,81 @@
+"""
+Benchmark the depth compositing of splat layers with synthetic layers.
+
+Does not require a running renderer. If `--socket-url` is given, the render time of layer requests is also
+compared against regular requests on a running renderer, since each layer is rendered in two passes (the
+colors and depth, then the alpha, see `render_layer` in `renderer.py`).
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import zmq
+
+from compositing import composite_layers
+from protocol import decode_response, encode_views, wait_until_ready
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--width', type=int, default=1280, help="Image width")
+    parser.add_argument('--height', type=int, default=720, help="Image height")
+    parser.add_argument('--num-layers', type=int, nargs='+', default=[1, 2, 4, 8], help="Numbers of layers to benchmark")
+    parser.add_argument('--num-frames', type=int, default=20, help="Number of frames to measure")
+    parser.add_argument('--socket-url', type=str, default=None,
+                        help="ZMQ socket URL of a running renderer to measure the render time of layer requests")
+    args = parser.parse_args()
+    return args
+
+def measure_render_time(socket, metadata, frames, num_frames):
+    """Return the mean render time in seconds reported by the renderer for a request."""
+    render_times = []
+    # Warm up, then measure
+    for i in range(num_frames + 1):
+        socket.send_multipart([json.dumps(metadata).encode()] + frames)
+        response, _ = decode_response(metadata, socket.recv_multipart())
+        if 'error' in response:
+            raise RuntimeError(f"Error from server: {response['error']}")
+        if i > 0:
+            render_times.append(response['render_time'])
+    return np.mean(render_times)
+
+def bench_layer_requests(args):
+    context = zmq.Context()
+    wait_until_ready(context, args.socket_url)
+    socket = context.socket(zmq.REQ)
+    socket.connect(args.socket_url)
+    # Use the multi-view format, so that the renderer reports the render time
+    pose = {'position': [0.0, 0.0, 1.0], 'rotation': [0.0, 0.0, 0.0]}
+    background = (np.zeros((720, 1280, 3), dtype=np.uint8), np.full((720, 1280), np.inf, dtype=np.float32))
+    render_time = measure_render_time(
+        socket, {'views': [pose], 'encoding': 'raw'}, encode_views([background], 'raw'), args.num_frames)
+    layer_time = measure_render_time(
+        socket, {'views': [pose], 'encoding': 'raw', 'layer': True}, [], args.num_frames)
+    print(f"Regular request: {render_time * 1000:.1f} ms/frame")
+    print(f"Layer request:   {layer_time * 1000:.1f} ms/frame ({layer_time / render_time:.2f}x)")
+    socket.close()
+    context.term()
+
+def main(args):
+    rng = np.random.default_rng(0)
+    shape = (args.height, args.width)
+    bg_rgb = rng.random((*shape, 3), dtype=np.float32)
+    bg_depth = rng.uniform(1, 10, shape).astype(np.float32)
+    for num_layers in args.num_layers:
+        alphas = rng.random((num_layers, *shape), dtype=np.float32)
+        rgbs = rng.random((num_layers, *shape, 3), dtype=np.float32) * alphas[..., np.newaxis]
+        inv_depths = alphas / rng.uniform(0.5, 10, (num_layers, *shape)).astype(np.float32)
+        # Warm up
+        composite_layers(rgbs, alphas, inv_depths, bg_rgb, bg_depth)
+        start_time = time.perf_counter()
+        for _ in range(args.num_frames):
+            composite_layers(rgbs, alphas, inv_depths, bg_rgb, bg_depth)
+        elapsed = (time.perf_counter() - start_time) / args.num_frames
+        print(f"{num_layers} layers at {args.width}x{args.height}: {elapsed * 1000:.1f} ms/frame")
+    if args.socket_url is not None:
+        bench_layer_requests(args)
+
+if __name__ == "__main__":
+    main(parse_args())
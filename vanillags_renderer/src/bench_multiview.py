@@ -0,0 +1,79 @@
+"""
+Compare the throughput of multi-view requests against issuing one request per view.
+
+Start the renderer first (`python /src/main.py`), then run this script in the same container.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import zmq
+
+from protocol import decode_views, encode_views, wait_until_ready
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket-url', type=str,
+                        default="ipc:///tmp/omni-3dgs-extension/vanillags_renderer",
+                        help="ZMQ socket URL to connect to")
+    parser.add_argument('--num-views', type=int, default=8, help="Number of cameras per frame")
+    parser.add_argument('--num-frames', type=int, default=50, help="Number of frames to measure")
+    args = parser.parse_args()
+    return args
+
+def request(socket, metadata, views):
+    socket.send_json(metadata, zmq.SNDMORE)
+    socket.send_multipart(encode_views(views))
+    frames = socket.recv_multipart()
+    metadata = json.loads(frames[0])
+    if 'error' in metadata:
+        raise RuntimeError(f"Error from server: {metadata['error']}")
+    return metadata, decode_views(frames[1:])
+
+def main(args):
+    context = zmq.Context()
+    # Don't measure the startup of the renderer
+    wait_until_ready(context, args.socket_url)
+    socket = context.socket(zmq.REQ)
+    socket.connect(args.socket_url)
+
+    # Cameras spread along the X axis, e.g., the cameras mounted on a robot
+    poses = [
+        {'position': [0.1 * i, 0.0, 1.0], 'rotation': [0.0, 0.0, 0.0]}
+        for i in range(args.num_views)
+    ]
+    bg_rgb_np = np.zeros((720, 1280, 3), dtype=np.uint8)
+    bg_depth_np = np.full((720, 1280), np.inf, dtype=np.float32)
+    backgrounds = [(bg_rgb_np, bg_depth_np)] * args.num_views
+
+    # Warm up
+    request(socket, {'views': poses}, backgrounds)
+
+    start_time = time.perf_counter()
+    for _ in range(args.num_frames):
+        for pose, background in zip(poses, backgrounds):
+            request(socket, pose, [background])
+    separate_time = time.perf_counter() - start_time
+
+    server_time = 0
+    start_time = time.perf_counter()
+    for _ in range(args.num_frames):
+        metadata, _ = request(socket, {'views': poses}, backgrounds)
+        server_time += metadata['render_time']
+    batched_time = time.perf_counter() - start_time
+
+    num_renders = args.num_frames * args.num_views
+    print(f"{args.num_views} views x {args.num_frames} frames")
+    print(f"Separate requests: {num_renders / separate_time:.1f} views/s ({separate_time / args.num_frames * 1000:.1f} ms/frame)")
+    print(f"Batched requests:  {num_renders / batched_time:.1f} views/s ({batched_time / args.num_frames * 1000:.1f} ms/frame)")
+    print(f"Batched server render time: {server_time / args.num_frames * 1000:.1f} ms/frame")
+    print(f"Speedup: {separate_time / batched_time:.2f}x")
+
+    socket.close()
+    context.term()
+
+if __name__ == '__main__':
+    main(parse_args())
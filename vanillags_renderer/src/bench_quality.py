@@ -0,0 +1,88 @@
+"""
+Measure the render time and image quality of each quality tier (see `quality.py`).
+
+Start the renderer first (`python /src/main.py --checkpoint ...`), then run this script in the same container.
+The images of each tier are compared against the full quality render of the same view.
+"""
+
+import argparse
+
+import numpy as np
+import zmq
+
+from image_metrics import psnr
+from protocol import decode_response, encode_views, wait_until_ready
+from quality import QUALITY_TIERS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket-url', type=str,
+                        default="ipc:///tmp/omni-3dgs-extension/vanillags_renderer",
+                        help="ZMQ socket URL to connect to")
+    parser.add_argument('--num-views', type=int, default=20, help="Number of camera poses to render")
+    parser.add_argument('--num-repeats', type=int, default=5, help="Number of times each pose is rendered")
+    parser.add_argument('--radius', type=float, default=0.5, help="Radius of the circle the cameras move on")
+    args = parser.parse_args()
+    return args
+
+def request(socket, metadata, views):
+    socket.send_json(metadata, zmq.SNDMORE)
+    socket.send_multipart(encode_views(views, 'raw'))
+    response, views = decode_response(metadata, socket.recv_multipart())
+    if 'error' in response:
+        raise RuntimeError(f"Error from server: {response['error']}")
+    return response, views
+
+def render_tier(socket, quality, poses, background, num_repeats):
+    """Render all poses with the given quality. Returns the images, the server render times, and the splat count."""
+    images, render_times = [], []
+    num_splats = None
+    for pose in poses:
+        # Send single-view requests in the multi-view format, so that the server reports the render time
+        metadata = {'views': [pose], 'encoding': 'raw'}
+        if quality is not None:
+            metadata['quality'] = quality
+        for _ in range(num_repeats):
+            response, views = request(socket, metadata, [background])
+            render_times.append(response['render_time'])
+        num_splats = response.get('num_splats')
+        images.append(views[0][0].copy())
+    return images, render_times, num_splats
+
+def main(args):
+    context = zmq.Context()
+    wait_until_ready(context, args.socket_url)
+    socket = context.socket(zmq.REQ)
+    socket.connect(args.socket_url)
+
+    # Cameras on a horizontal circle, looking around
+    poses = []
+    for i in range(args.num_views):
+        angle = 2 * np.pi * i / args.num_views
+        poses.append({
+            'position': [args.radius * np.cos(angle), 0.0, args.radius * np.sin(angle)],
+            'rotation': [0.0, angle, 0.0],
+        })
+    background = (np.zeros((720, 1280, 3), dtype=np.uint8), np.full((720, 1280), np.inf, dtype=np.float32))
+
+    # Render the reference first, which also builds the cached tiers on the server before timing them
+    reference, reference_times, _ = render_tier(socket, None, poses, background, args.num_repeats)
+    for quality in QUALITY_TIERS:
+        request(socket, {'views': [poses[0]], 'encoding': 'raw', 'quality': quality}, [background])
+
+    print(f"{'Tier':<10}{'Splats':>12}{'ms/frame':>12}{'Speedup':>10}{'Mean PSNR':>12}{'Min PSNR':>12}")
+    reference_ms = np.mean(reference_times) * 1000
+    print(f"{'full':<10}{'':>12}{reference_ms:>12.2f}{1:>10.2f}{'':>12}{'':>12}")
+    for quality in QUALITY_TIERS:
+        images, render_times, num_splats = render_tier(socket, quality, poses, background, args.num_repeats)
+        psnrs = [psnr(image, reference_image) for image, reference_image in zip(images, reference)]
+        tier_ms = np.mean(render_times) * 1000
+        print(f"{quality:<10}{num_splats:>12}{tier_ms:>12.2f}{reference_ms / tier_ms:>10.2f}"
+              f"{np.mean(psnrs):>12.2f}{np.min(psnrs):>12.2f}")
+
+    socket.close()
+    context.term()
+
+if __name__ == '__main__':
+    main(parse_args())
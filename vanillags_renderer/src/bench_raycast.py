@@ -0,0 +1,115 @@
+"""
+Measure the throughput of ray queries (see `raycast.py`) from 1k to 1M rays, compared to rendering a full frame.
+
+Start the renderer first (`python /src/main.py`), then run this script in the same container. The rays
+start at `--origin` and are spread in a cone around `--direction`, similar to a lidar mounted on a robot.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import zmq
+
+from image_metrics import latency_summary
+from protocol import decode_ray_query_response, encode_ray_query, encode_views, wait_until_ready
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket-url', type=str,
+                        default="ipc:///tmp/omni-3dgs-extension/vanillags_renderer",
+                        help="ZMQ socket URL to connect to")
+    parser.add_argument('--num-rays', type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+                        help="Numbers of rays per query")
+    parser.add_argument('--num-repeats', type=int, default=10, help="Number of queries per ray count")
+    parser.add_argument('--origin', type=float, nargs=3, default=[0.0, 0.0, 0.0], help="Origin of the rays")
+    parser.add_argument('--direction', type=float, nargs=3, default=[0.0, 0.0, 1.0], help="Axis of the cone of rays")
+    parser.add_argument('--fov', type=float, default=60.0, help="Opening angle of the cone of rays in degrees")
+    parser.add_argument('--max-distance', type=float, default=10.0, help="Maximum distance along the rays")
+    parser.add_argument('--color', action='store_true', help="Also query the color of the rays")
+    parser.add_argument('--report', type=str, default=None, help="Path to write a JSON report to")
+    args = parser.parse_args()
+    return args
+
+def sample_rays(rng, num_rays, origin, direction, fov):
+    """Sample rays uniformly in a cone around `direction`."""
+    axis = np.asarray(direction, dtype=np.float64)
+    axis /= np.linalg.norm(axis)
+    # Orthonormal basis around the axis
+    helper = np.array([1.0, 0.0, 0.0]) if abs(axis[0]) < 0.9 else np.array([0.0, 1.0, 0.0])
+    u = np.cross(axis, helper)
+    u /= np.linalg.norm(u)
+    v = np.cross(axis, u)
+    cos_theta = 1 - rng.random(num_rays) * (1 - np.cos(np.radians(fov) / 2))
+    sin_theta = np.sqrt(1 - cos_theta ** 2)
+    phi = rng.random(num_rays) * 2 * np.pi
+    directions = (
+        cos_theta[:, None] * axis
+        + (sin_theta * np.cos(phi))[:, None] * u
+        + (sin_theta * np.sin(phi))[:, None] * v
+    )
+    origins = np.broadcast_to(np.asarray(origin, dtype=np.float32), (num_rays, 3))
+    return origins, directions.astype(np.float32)
+
+def request(socket, frames):
+    socket.send_multipart(frames)
+    return socket.recv_multipart()
+
+def main(args):
+    context = zmq.Context()
+    # Don't measure the startup of the renderer
+    wait_until_ready(context, args.socket_url)
+    socket = context.socket(zmq.REQ)
+    socket.connect(args.socket_url)
+    rng = np.random.default_rng(0)
+
+    # Baseline: a full frame with the inverse depth of every pixel
+    metadata = {'position': [0.0, 0.0, 0.0], 'rotation': [0.0, 0.0, 0.0], 'encoding': 'raw'}
+    background = (np.zeros((720, 1280, 3), dtype=np.uint8), np.full((720, 1280), np.inf, dtype=np.float32))
+    frames = [json.dumps(metadata).encode()] + encode_views([background], 'raw')
+    request(socket, frames)
+    latencies = []
+    for _ in range(args.num_repeats):
+        start_time = time.perf_counter()
+        request(socket, frames)
+        latencies.append(time.perf_counter() - start_time)
+    report = {'full_frame': latency_summary(latencies), 'queries': []}
+    print(f"Full frame (1280x720): {report['full_frame']['mean_ms']:.1f} ms")
+
+    for num_rays in args.num_rays:
+        origins, directions = sample_rays(rng, num_rays, args.origin, args.direction, args.fov)
+        frames = encode_ray_query(origins, directions, args.color, args.max_distance)
+        # Warm up
+        request(socket, frames)
+        latencies = []
+        query_times = []
+        for _ in range(args.num_repeats):
+            start_time = time.perf_counter()
+            response_metadata, depth, opacity, _ = decode_ray_query_response(request(socket, frames))
+            latencies.append(time.perf_counter() - start_time)
+            if 'error' in response_metadata:
+                raise RuntimeError(f"Error from server: {response_metadata['error']}")
+            query_times.append(response_metadata['query_time'])
+        result = {
+            'num_rays': num_rays,
+            **latency_summary(latencies),
+            'query_ms': float(np.mean(query_times)) * 1000,
+            'rays_per_second': num_rays / float(np.mean(latencies)),
+            'hit_fraction': float(np.mean(np.isfinite(depth))),
+            'mean_opacity': float(np.mean(opacity)),
+        }
+        report['queries'].append(result)
+        print(f"{num_rays:>8} rays: {result['mean_ms']:.2f} ms ({result['query_ms']:.2f} ms on the server), "
+              f"{result['rays_per_second'] / 1e6:.2f} M rays/s, {result['hit_fraction'] * 100:.0f}% hits")
+
+    if args.report is not None:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    socket.close()
+    context.term()
+
+if __name__ == '__main__':
+    main(parse_args())
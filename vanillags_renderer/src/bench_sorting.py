@@ -0,0 +1,77 @@
+"""
+Compare the time per frame of sorting the Gaussians by depth from scratch against incremental sorting
+(see `depth_sort.py`) along a camera path.
+
+The camera path is the poses of a recorded session (see `recorder.py`) if `--log-dir` is given, and a slow
+orbit around the origin otherwise. Example:
+
+    python /src/bench_sorting.py --log-dir /tmp/omni-3dgs-extension/logs/session
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+from plyfile import PlyData
+
+from depth_sort import IncrementalDepthSorter, is_sorted, view_depths
+from image_metrics import latency_summary
+from request_log import read_camera_poses
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checkpoint', type=str,
+                        default="/workspace/data/exports/poster/splatfacto/DATE_TIME/splat/splat.ply",
+                        help="Path to the 3DGS PLY file")
+    parser.add_argument('--log-dir', type=str, default=None, help="Use the camera path of a recorded session")
+    parser.add_argument('--num-frames', type=int, default=300, help="Number of frames of the orbit, if no log is given")
+    parser.add_argument('--radius', type=float, default=0.5, help="Radius of the orbit, if no log is given")
+    parser.add_argument('--report', type=str, default=None, help="Path to write a JSON report to")
+    args = parser.parse_args()
+    return args
+
+def camera_path(args):
+    if args.log_dir is not None:
+        return [(np.array(position), np.array(rotation)) for position, rotation in read_camera_poses(args.log_dir)]
+    # One revolution in `num_frames` frames, similar to a user orbiting in the viewport
+    angles = 2 * np.pi * np.arange(args.num_frames) / args.num_frames
+    return [
+        (np.array([args.radius * np.cos(angle), 0.0, args.radius * np.sin(angle)]), np.array([0.0, angle, 0.0]))
+        for angle in angles
+    ]
+
+def main(args):
+    vertices = PlyData.read(args.checkpoint).elements[0]
+    xyz = np.stack([vertices['x'], vertices['y'], vertices['z']], axis=1).astype(np.float32)
+    poses = camera_path(args)
+    print(f"Sorting {len(xyz)} Gaussians along a path of {len(poses)} frames")
+
+    report = {'num_gaussians': len(xyz), 'num_frames': len(poses)}
+    # Baseline: sort from scratch every frame
+    latencies = []
+    for position, euler_angles in poses:
+        start_time = time.perf_counter()
+        np.argsort(view_depths(xyz, position, euler_angles))
+        latencies.append(time.perf_counter() - start_time)
+    report['full'] = latency_summary(latencies)
+
+    for method in ('timsort', 'passes'):
+        sorter = IncrementalDepthSorter(method)
+        latencies = []
+        for position, euler_angles in poses:
+            start_time = time.perf_counter()
+            order = sorter.sort(xyz, position, euler_angles)
+            latencies.append(time.perf_counter() - start_time)
+            if not is_sorted(view_depths(xyz, position, euler_angles)[order]):
+                raise RuntimeError(f"Incremental sorting with {method} produced an unsorted order")
+        report[method] = {**latency_summary(latencies), **sorter.stats()}
+
+    print(json.dumps(report, indent=2))
+    if args.report is not None:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main(parse_args())
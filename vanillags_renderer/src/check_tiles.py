@@ -0,0 +1,78 @@
+"""
+Check that the frames stitched by the tile proxy (see `tile_proxy.py`) match the frames of a single renderer.
+
+Start the renderers and the tile proxy as described in `tile_proxy.py`, and a reference renderer on another
+socket URL, then run this script in the same container. Example:
+
+    python /src/main.py --socket-url ipc:///tmp/omni-3dgs-extension/vanillags_renderer_reference
+    python /src/check_tiles.py --reference-url ipc:///tmp/omni-3dgs-extension/vanillags_renderer_reference
+
+The splats far from the center of the frame are distorted with more than one band (see
+`get_tile_projection_matrix` in `projection.py`), so the frames are compared by PSNR instead of exactly.
+Exits with a non-zero status if any frame differs.
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+import zmq
+
+from image_metrics import max_abs_diff, psnr
+from protocol import decode_views, encode_views, wait_until_ready
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket-url', type=str,
+                        default="ipc:///tmp/omni-3dgs-extension/vanillags_renderer",
+                        help="ZMQ socket URL of the tile proxy")
+    parser.add_argument('--reference-url', type=str, required=True,
+                        help="ZMQ socket URL of a single renderer with the same checkpoint")
+    parser.add_argument('--num-views', type=int, default=8, help="Number of camera poses to compare")
+    parser.add_argument('--min-psnr', type=float, default=40.0, help="Minimum PSNR in dB of each stitched frame")
+    args = parser.parse_args()
+    return args
+
+def request(socket, metadata, views):
+    socket.send_json(metadata, zmq.SNDMORE)
+    socket.send_multipart(encode_views(views))
+    frames = socket.recv_multipart()
+    metadata = json.loads(frames[0])
+    if 'error' in metadata:
+        raise RuntimeError(f"Error from server: {metadata['error']}")
+    return decode_views(frames[1:])[0]
+
+def main(args):
+    context = zmq.Context()
+    for url in (args.socket_url, args.reference_url):
+        wait_until_ready(context, url)
+    proxy = context.socket(zmq.REQ)
+    proxy.connect(args.socket_url)
+    reference = context.socket(zmq.REQ)
+    reference.connect(args.reference_url)
+
+    # Put a plane in front of the splats on the left, so that the depth test is also compared
+    bg_rgb_np = np.zeros((720, 1280, 3), dtype=np.uint8)
+    bg_rgb_np[:, :320] = [255, 0, 0]
+    bg_depth_np = np.full((720, 1280), np.inf, dtype=np.float32)
+    bg_depth_np[:, :320] = 1.0
+
+    failed = False
+    for i in range(args.num_views):
+        angle = 2 * np.pi * i / args.num_views
+        pose = {'position': [0.5 * np.cos(angle), 0.5 * np.sin(angle), 1.0], 'rotation': [0.0, 0.0, angle]}
+        tiled_rgb, tiled_inv_depth = request(proxy, pose, [(bg_rgb_np, bg_depth_np)])
+        rgb, inv_depth = request(reference, pose, [(bg_rgb_np, bg_depth_np)])
+        rgb_psnr = psnr(tiled_rgb, rgb)
+        print(f"View {i}: PSNR {rgb_psnr:.2f} dB, max abs diff {max_abs_diff(tiled_rgb, rgb):.0f}, "
+              f"max inverse depth diff {max_abs_diff(tiled_inv_depth, inv_depth):.4f}")
+        failed |= rgb_psnr < args.min_psnr
+    if failed:
+        print(f"Some stitched frames are below {args.min_psnr} dB")
+        sys.exit(1)
+    print("All stitched frames match the reference renderer")
+
+if __name__ == "__main__":
+    main(parse_args())
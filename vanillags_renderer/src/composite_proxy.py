@@ -0,0 +1,107 @@
+"""
+Sort-last rendering across renderer processes that each hold a partition of the scene.
+
+The proxy speaks the same protocol as `main.py`. Each request is sent as a layer request to all renderer
+processes in parallel, and the returned layers are composited by depth against the request background.
+
+Example with two partitions created by `partition.py`:
+
+    python /src/main.py --socket-url ipc:///tmp/omni-3dgs-extension/vanillags_renderer_0 \
+        --checkpoint /workspace/data/partitions/partition_0.ply
+    python /src/main.py --socket-url ipc:///tmp/omni-3dgs-extension/vanillags_renderer_1 \
+        --checkpoint /workspace/data/partitions/partition_1.ply
+    python /src/composite_proxy.py --renderer-urls \
+        ipc:///tmp/omni-3dgs-extension/vanillags_renderer_0 \
+        ipc:///tmp/omni-3dgs-extension/vanillags_renderer_1
+"""
+
+import argparse
+import json
+
+import numpy as np
+import zmq
+
+from compositing import composite_layers
+from protocol import combine_status, connect, decode_views, encode_views, request_all
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket-url', type=str,
+                        default="ipc:///tmp/omni-3dgs-extension/vanillags_renderer",
+                        help="ZMQ socket URL to bind to")
+    parser.add_argument('--renderer-urls', type=str, nargs='+', required=True,
+                        help="ZMQ socket URLs of the renderer processes, one per partition")
+    parser.add_argument('--width', type=int, default=1280, help="Full image width")
+    parser.add_argument('--height', type=int, default=720, help="Full image height")
+    parser.add_argument('--timeout', type=float, default=5.0, help="Timeout in seconds for each renderer")
+    args = parser.parse_args()
+    return args
+
+def main(args):
+    context = zmq.Context()
+    receiver = context.socket(zmq.REP)
+    receiver.bind(args.socket_url)
+    renderers = [connect(context, url) for url in args.renderer_urls]
+
+    print(f"Composite proxy ready for requests, compositing {len(renderers)} partitions...")
+
+    while True:
+        try:
+            frames = receiver.recv_multipart()
+            metadata = json.loads(frames[0])
+            if metadata.get('type') in ('ping', 'status'):
+                # Only ready when all renderers are ready
+                results, _ = request_all(renderers, [frames] * len(renderers), args.timeout)
+                statuses = []
+                for i, socket in enumerate(list(renderers)):
+                    if socket not in results:
+                        socket.close()
+                        renderers[i] = connect(context, args.renderer_urls[i])
+                        statuses.append(None)
+                    else:
+                        statuses.append(json.loads(results[socket][0]))
+                receiver.send_json(combine_status(statuses))
+                continue
+            if 'views' in metadata:
+                raise ValueError("Multi-view requests are not supported by the composite proxy")
+            # Request the layers with the same encoding, and reply with it
+            encoding = metadata.get('encoding', 'tiff')
+            shape = (args.height, args.width)
+            ((bg_rgb_np, bg_depth_np),) = decode_views(frames[1:], encoding=encoding, shape=shape)
+
+            # Render the splat layer of each partition in parallel
+            layer_request = [json.dumps({**metadata, 'layer': True}).encode()]
+            results, _ = request_all(renderers, [layer_request] * len(renderers), args.timeout)
+            layers = []
+            errors = []
+            for i, socket in enumerate(list(renderers)):
+                if socket not in results:
+                    # Reconnect, since a REQ socket cannot send again before receiving the reply
+                    socket.close()
+                    renderers[i] = connect(context, args.renderer_urls[i])
+                    errors.append(f"{args.renderer_urls[i]} timed out")
+                    continue
+                layer_metadata = json.loads(results[socket][0])
+                if 'error' in layer_metadata:
+                    errors.append(f"{args.renderer_urls[i]}: {layer_metadata['error']}")
+                    continue
+                layers += decode_views(results[socket][1:], images_per_view=3, encoding=encoding, shape=shape)
+            if errors:
+                raise RuntimeError('; '.join(errors))
+
+            rgbs, alphas, inv_depths = (np.stack(images) for images in zip(*layers))
+            rgb, inv_depth_np = composite_layers(
+                rgbs.astype(np.float32) / 255, alphas, inv_depths,
+                bg_rgb_np.astype(np.float32) / 255, bg_depth_np,
+            )
+            render_np = (np.clip(rgb, 0, 1) * 255).astype(np.uint8)
+
+            receiver.send_json({'shape': render_np.shape}, zmq.SNDMORE)
+            receiver.send_multipart(encode_views([(render_np, inv_depth_np.astype(np.float32))], encoding))
+        except Exception as e:
+            print(f"Error during compositing: {e}")
+            receiver.send_json({'error': str(e)})
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,53 @@
+"""
+Depth compositing of splat layers rendered by different renderer processes.
+
+Each layer consists of the premultiplied RGB, the alpha and the alpha-weighted inverse depth returned by a
+layer request (see `protocol.py`). Layers are sorted per pixel by their depth and blended front to back,
+followed by the background, similar to how the rasterizer composites splats against `bg_rgb`/`bg_depth`.
+Since each layer only has a single depth per pixel, this is exact when the layers don't interleave in
+depth, e.g., for spatially disjoint partitions of the scene.
+"""
+
+import numpy as np
+
+
+def layer_depth(alpha, inv_depth):
+    """Return the depth of a layer, or infinity where the layer is empty."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        depth = alpha / inv_depth
+    return np.where((alpha > 0) & (inv_depth > 0), depth, np.inf)
+
+
+def composite_layers(rgbs, alphas, inv_depths, bg_rgb, bg_depth):
+    """
+    Composite K splat layers against a background.
+
+    Args:
+        rgbs: (K, H, W, 3) float32 premultiplied RGB in [0, 1].
+        alphas: (K, H, W) float32 alpha.
+        inv_depths: (K, H, W) float32 alpha-weighted inverse depth.
+        bg_rgb: (H, W, 3) float32 background RGB in [0, 1].
+        bg_depth: (H, W) float32 background depth.
+
+    Returns:
+        The composited (H, W, 3) RGB and the (H, W) alpha-weighted inverse depth of the splats,
+        following the same convention as the renderer output.
+    """
+    depths = layer_depth(alphas, inv_depths)
+    # Layers behind the background are occluded
+    visible = depths < bg_depth
+    alphas = np.where(visible, alphas, 0)
+    # Sort the layers front to back for each pixel
+    order = np.argsort(depths, axis=0)
+    alphas = np.take_along_axis(alphas, order, axis=0)
+    rgbs = np.take_along_axis(rgbs * visible[..., np.newaxis], order[..., np.newaxis], axis=0)
+    inv_depths = np.take_along_axis(np.where(visible, inv_depths, 0), order, axis=0)
+    # Transmittance in front of each layer
+    transmittance = np.cumprod(1 - alphas, axis=0)
+    transmittance = np.concatenate([np.ones_like(transmittance[:1]), transmittance[:-1]], axis=0)
+    rgb = (transmittance[..., np.newaxis] * rgbs).sum(axis=0)
+    inv_depth = (transmittance * inv_depths).sum(axis=0)
+    # The background is fully opaque and behind all visible layers
+    remaining = transmittance[-1] * (1 - alphas[-1])
+    rgb += remaining[..., np.newaxis] * bg_rgb
+    return rgb, inv_depth
@@ -0,0 +1,94 @@
+"""
+Reference implementation of temporally coherent depth sorting of Gaussians.
+
+Consecutive camera poses usually differ only slightly, so the depth order of the previous frame is nearly
+sorted for the next frame. Instead of sorting from scratch, the previous order is repaired with either:
+- `timsort`: NumPy's stable sort, which is adaptive and runs in close to linear time on nearly sorted input, or
+- `passes`: a bounded number of odd-even transposition passes, falling back to `timsort` if the order is
+  still not sorted afterwards.
+
+A full sort is done for the first frame and whenever the camera jumps. Note that the CUDA rasterizer of the
+gaussian-splatting backend sorts on the GPU and doesn't expose its sorting stage, so this module serves as
+the reference for a rasterizer-side implementation, and is measured by `bench_sorting.py`.
+"""
+
+import numpy as np
+from scipy.spatial.transform import Rotation
+
+
+def view_depths(xyz, position, euler_angles):
+    """Depth of each point along the viewing direction of a camera pose in Isaac Sim convention (-Z forward)."""
+    forward = Rotation.from_euler('xyz', euler_angles).apply([0, 0, -1])
+    return (xyz - position) @ forward
+
+
+def is_sorted(values):
+    return bool(np.all(values[1:] >= values[:-1]))
+
+
+def transposition_pass(order, sorted_depths, start):
+    """Swap the out-of-order pairs (i, i + 1) for i = start, start + 2, ... in place. Returns the number of swaps."""
+    i = np.arange(start, len(order) - 1, 2)
+    i = i[sorted_depths[i] > sorted_depths[i + 1]]
+    for values in (order, sorted_depths):
+        swapped = values[i].copy()
+        values[i] = values[i + 1]
+        values[i + 1] = swapped
+    return len(i)
+
+
+class IncrementalDepthSorter:
+    def __init__(self, method='timsort', max_passes=8, max_translation=0.1, max_rotation=np.radians(5)):
+        if method not in ('timsort', 'passes'):
+            raise ValueError(f"Unknown sorting method '{method}'")
+        self.method = method
+        self.max_passes = max_passes
+        # Sort from scratch if the camera moved further than this since the last frame
+        self.max_translation = max_translation
+        self.max_rotation = max_rotation
+        self.order = None
+        self.pose = None
+        # Statistics
+        self.full_sorts = 0
+        self.incremental_sorts = 0
+        self.fallbacks = 0
+
+    def reset(self):
+        self.order = None
+        self.pose = None
+
+    def is_jump(self, position, euler_angles):
+        prev_position, prev_euler_angles = self.pose
+        translation = np.linalg.norm(np.asarray(position) - prev_position)
+        rotation = (Rotation.from_euler('xyz', euler_angles) * Rotation.from_euler('xyz', prev_euler_angles).inv()).magnitude()
+        return translation > self.max_translation or rotation > self.max_rotation
+
+    def sort(self, xyz, position, euler_angles):
+        """Return the indices of the points sorted from near to far."""
+        depths = view_depths(xyz, position, euler_angles)
+        if self.order is None or len(self.order) != len(xyz) or self.is_jump(position, euler_angles):
+            self.full_sorts += 1
+            self.order = np.argsort(depths)
+        else:
+            self.incremental_sorts += 1
+            self.order = self._repair(self.order, depths[self.order])
+        self.pose = (np.asarray(position, dtype=np.float64), np.asarray(euler_angles, dtype=np.float64))
+        return self.order
+
+    def _repair(self, order, sorted_depths):
+        if self.method == 'passes':
+            order = order.copy()
+            for _ in range(self.max_passes):
+                if transposition_pass(order, sorted_depths, 0) + transposition_pass(order, sorted_depths, 1) == 0:
+                    return order
+            if is_sorted(sorted_depths):
+                return order
+            self.fallbacks += 1
+        return order[np.argsort(sorted_depths, kind='stable')]
+
+    def stats(self):
+        return {
+            'full_sorts': self.full_sorts,
+            'incremental_sorts': self.incremental_sorts,
+            'fallbacks': self.fallbacks,
+        }
@@ -0,0 +1,36 @@
+"""
+Image quality and latency metrics used by the benchmark and replay tools.
+"""
+
+import numpy as np
+
+
+def psnr(image, reference, data_range=255.0):
+    """Peak signal-to-noise ratio in dB. Returns infinity for identical images."""
+    mse = np.mean((image.astype(np.float64) - reference.astype(np.float64)) ** 2)
+    if mse == 0:
+        return float('inf')
+    return 10 * np.log10(data_range ** 2 / mse)
+
+
+def max_abs_diff(image, reference):
+    """Maximum absolute difference, ignoring pixels that are non-finite in both images."""
+    image = image.astype(np.float64)
+    reference = reference.astype(np.float64)
+    both_infinite = ~np.isfinite(image) & ~np.isfinite(reference) & (image == reference)
+    diff = np.abs(np.where(both_infinite, 0, image - reference))
+    return float(np.nan_to_num(diff, nan=np.inf).max()) if diff.size else 0.0
+
+
+def latency_summary(latencies):
+    """Return the mean and percentiles of a list of latencies in seconds, in milliseconds."""
+    latencies = np.asarray(latencies) * 1000
+    if latencies.size == 0:
+        return {}
+    return {
+        'mean_ms': float(latencies.mean()),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+    }
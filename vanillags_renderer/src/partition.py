@@ -0,0 +1,62 @@
+"""
+Partition a 3DGS PLY file spatially into several PLY files with k-d splits.
+
+Each partition can then be loaded by a separate renderer process (`main.py --checkpoint`), and the
+partial renders are merged by depth with `composite_proxy.py`.
+
+Example:
+
+    python /src/partition.py --num-partitions 4 --output-dir /workspace/data/partitions
+"""
+
+import argparse
+import os
+
+import numpy as np
+from plyfile import PlyData, PlyElement
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checkpoint', type=str,
+                        default="/workspace/data/exports/poster/splatfacto/DATE_TIME/splat/splat.ply",
+                        help="Path to the 3DGS PLY file")
+    parser.add_argument('--num-partitions', type=int, default=2, help="Number of partitions")
+    parser.add_argument('--output-dir', type=str, required=True, help="Directory to write the partitions to")
+    args = parser.parse_args()
+    return args
+
+def kd_partition(xyz, indices, num_partitions):
+    """
+    Recursively split the Gaussians along the axis with the largest extent, such that each partition
+    receives a similar number of Gaussians. Returns a list of index arrays.
+    """
+    if num_partitions == 1:
+        return [indices]
+    points = xyz[indices]
+    axis = np.argmax(points.max(axis=0) - points.min(axis=0))
+    # Support non-power-of-two partition counts by splitting proportionally
+    left_partitions = num_partitions // 2
+    k = len(indices) * left_partitions // num_partitions
+    order = np.argpartition(points[:, axis], k)
+    return (
+        kd_partition(xyz, indices[order[:k]], left_partitions) +
+        kd_partition(xyz, indices[order[k:]], num_partitions - left_partitions)
+    )
+
+def main(args):
+    plydata = PlyData.read(args.checkpoint)
+    vertices = plydata.elements[0]
+    xyz = np.stack([vertices['x'], vertices['y'], vertices['z']], axis=1)
+    partitions = kd_partition(xyz, np.arange(len(xyz)), args.num_partitions)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    print(f"Partitioning {len(xyz)} Gaussians into {len(partitions)} partitions")
+    for i, indices in enumerate(partitions):
+        path = os.path.join(args.output_dir, f"partition_{i}.ply")
+        PlyData([PlyElement.describe(vertices.data[np.sort(indices)], 'vertex')]).write(path)
+        bounds_min, bounds_max = xyz[indices].min(axis=0), xyz[indices].max(axis=0)
+        print(f"{path}: {len(indices)} Gaussians, bounds {bounds_min.round(3).tolist()} to {bounds_max.round(3).tolist()}")
+
+if __name__ == "__main__":
+    main(parse_args())
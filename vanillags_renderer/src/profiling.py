@@ -0,0 +1,149 @@
+"""
+On-demand profiling of the renderer, controlled over the renderer socket without restarting it.
+
+A `{"type": "profile", "action": "start", "frames": N}` request profiles the next N rendered frames with
+cProfile, and with the torch profiler if available. The capture stops after N frames, or earlier on a
+`{"type": "profile", "action": "stop"}` request, and is written to a timestamped directory containing:
+- `python.prof`: the cProfile stats, which can be opened with `snakeviz` or `pstats`
+- `python_top.txt`: the Python functions with the highest cumulative time
+- `torch_trace.json`: the torch profiler trace, which can be opened in `chrome://tracing` or Perfetto
+- `torch_top.txt`: the torch operators with the highest CUDA (or CPU) time
+- `summary.json`: the frame count, duration and top hot spots
+
+A `{"type": "profile", "action": "status"}` request reports whether a capture is running. When no capture is
+running, the render loop only checks `Profiler.active`, so profiling costs nothing when it is not enabled.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+
+NUM_HOT_SPOTS = 20
+
+
+class Profiler:
+    def __init__(self, output_root):
+        self.output_root = output_root
+        self.active = False
+        self.output_dir = None
+        self.num_frames = 0
+        self.max_frames = 0
+        self.start_time = None
+        self._python_profiler = None
+        self._torch_profiler = None
+
+    def handle(self, metadata):
+        """Handle a `profile` control message, and return the metadata of the reply."""
+        action = metadata.get('action')
+        if action == 'start':
+            if self.active:
+                return {'error': f"Already profiling to {self.output_dir}"}
+            max_frames = metadata.get('frames', 100)
+            if not isinstance(max_frames, int) or max_frames <= 0:
+                return {'error': f"Number of frames must be a positive integer, got {max_frames}"}
+            self.start(max_frames)
+            return self.status()
+        if action == 'stop':
+            if not self.active:
+                return {'error': "Not profiling"}
+            return self.stop()
+        if action == 'status':
+            return self.status()
+        return {'error': f"Unknown profile action '{action}', expected 'start', 'stop' or 'status'"}
+
+    def status(self):
+        return {
+            'profiling': self.active,
+            'output_dir': self.output_dir,
+            'frames': self.num_frames,
+            'max_frames': self.max_frames,
+        }
+
+    def start(self, max_frames):
+        self.output_dir = os.path.join(self.output_root, time.strftime('%Y%m%d-%H%M%S'))
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.num_frames = 0
+        self.max_frames = max_frames
+        self.start_time = time.perf_counter()
+        self._python_profiler = cProfile.Profile()
+        self._torch_profiler = None
+        try:
+            import torch
+            from torch.profiler import ProfilerActivity, profile
+            activities = [ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(ProfilerActivity.CUDA)
+            self._torch_profiler = profile(activities=activities, record_shapes=True)
+            self._torch_profiler.start()
+        except Exception as e:
+            self._torch_profiler = None
+            print(f"Torch profiler not available, only profiling Python: {e}")
+        self.active = True
+        print(f"Profiling {max_frames} frames to {self.output_dir}...")
+
+    def begin_frame(self):
+        self._python_profiler.enable()
+
+    def end_frame(self):
+        """Return the summary if this was the last frame of the capture, and None otherwise."""
+        self._python_profiler.disable()
+        if self._torch_profiler is not None:
+            self._torch_profiler.step()
+        self.num_frames += 1
+        if self.num_frames >= self.max_frames:
+            return self.stop()
+        return None
+
+    def stop(self):
+        """Stop the capture, write the results, and return the summary."""
+        self.active = False
+        duration = time.perf_counter() - self.start_time
+        summary = {
+            'output_dir': self.output_dir,
+            'frames': self.num_frames,
+            'duration': duration,
+            'python_hot_spots': self._write_python_results(),
+        }
+        if self._torch_profiler is not None:
+            summary['torch_hot_spots'] = self._write_torch_results()
+        with open(os.path.join(self.output_dir, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=2)
+        self._python_profiler = None
+        self._torch_profiler = None
+        print(f"Profiled {self.num_frames} frames in {duration:.2f} s, results written to {self.output_dir}")
+        return summary
+
+    def _write_python_results(self):
+        self._python_profiler.dump_stats(os.path.join(self.output_dir, 'python.prof'))
+        stream = io.StringIO()
+        stats = pstats.Stats(self._python_profiler, stream=stream).sort_stats('cumulative')
+        stats.print_stats(NUM_HOT_SPOTS)
+        with open(os.path.join(self.output_dir, 'python_top.txt'), 'w') as f:
+            f.write(stream.getvalue())
+        hot_spots = []
+        for (filename, line, function), (_, num_calls, total_time, cumulative_time, _) in stats.stats.items():
+            hot_spots.append({
+                'function': f"{os.path.basename(filename)}:{line}({function})",
+                'calls': num_calls,
+                'total_time': total_time,
+                'cumulative_time': cumulative_time,
+            })
+        hot_spots.sort(key=lambda hot_spot: hot_spot['cumulative_time'], reverse=True)
+        return hot_spots[:NUM_HOT_SPOTS]
+
+    def _write_torch_results(self):
+        self._torch_profiler.stop()
+        self._torch_profiler.export_chrome_trace(os.path.join(self.output_dir, 'torch_trace.json'))
+        events = self._torch_profiler.key_averages()
+        # Sort by CUDA time if CUDA activities were recorded
+        sort_by = 'cuda_time_total' if any(event.cuda_time_total > 0 for event in events) else 'cpu_time_total'
+        with open(os.path.join(self.output_dir, 'torch_top.txt'), 'w') as f:
+            f.write(events.table(sort_by=sort_by, row_limit=NUM_HOT_SPOTS))
+        events = sorted(events, key=lambda event: getattr(event, sort_by), reverse=True)
+        return [
+            {'name': event.key, 'calls': event.count, 'time': getattr(event, sort_by) / 1e6}
+            for event in events[:NUM_HOT_SPOTS]
+        ]
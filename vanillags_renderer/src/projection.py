@@ -0,0 +1,45 @@
+"""
+Projection matrices of the cameras, following the conventions of gaussian-splatting.
+
+This module only depends on torch, so that the matrices can be tested without the gaussian-splatting modules.
+"""
+
+import math
+
+import torch
+
+
+def get_tile_projection_matrix(znear, zfar, fovx, fovy, width, height, tile):
+    """
+    Same as `getProjectionMatrix` in gaussian-splatting, but only covers the pixels in
+    `tile = (x0, y0, x1, y1)` of the full `width` x `height` image, resulting in an off-center frustum.
+
+    The rasterizer still clamps the view-space direction of each splat to 1.3x the tangent of the half (tile)
+    FoV around the optical axis of the full image, before computing the Jacobian of its projected covariance.
+    For `N` horizontal bands of equal height, the splats in the rows farther than 1.3 / N of the half height
+    from the center are projected as if they were on that row: 35% of the rows with 2 bands, 57% with 3 and
+    68% with 4. At the top and bottom rows, with the 36 degree vertical FoV of Isaac Sim:
+    - isotropic splats are 2.8% shorter vertically with 2 bands, 4.0% with 3, 4.4% with 4, and up to 4.9%
+    - the vertical extent that splats elongated along the view direction get from their depth is scaled by
+      1.3 / N, i.e., 65% with 2 bands, 43% with 3 and 33% with 4
+    So split frames into at most 2 bands, and check more bands on the scene with `check_tiles.py`.
+    """
+    x0, y0, x1, y1 = tile
+    tan_half_fovx = math.tan(fovx / 2)
+    tan_half_fovy = math.tan(fovy / 2)
+    left = tan_half_fovx * (2 * x0 / width - 1) * znear
+    right = tan_half_fovx * (2 * x1 / width - 1) * znear
+    # Note that +Y is down in GS convention, so `top` corresponds to the bottom row of pixels
+    bottom = tan_half_fovy * (2 * y0 / height - 1) * znear
+    top = tan_half_fovy * (2 * y1 / height - 1) * znear
+    P = torch.zeros(4, 4)
+    z_sign = 1.0
+    P[0, 0] = 2.0 * znear / (right - left)
+    P[1, 1] = 2.0 * znear / (top - bottom)
+    # The signs differ from the usual OpenGL matrix, since the clip-space w is +z instead of -z
+    P[0, 2] = -(right + left) / (right - left)
+    P[1, 2] = -(top + bottom) / (top - bottom)
+    P[3, 2] = z_sign
+    P[2, 2] = z_sign * zfar / (zfar - znear)
+    P[2, 3] = -(zfar * znear) / (zfar - znear)
+    return P
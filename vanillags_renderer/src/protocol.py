@@ -0,0 +1,212 @@
+"""
+Helpers for the multipart messages exchanged with the renderer.
+
+A render request consists of a JSON metadata frame followed by a background RGB frame and a background
+depth frame for each view. A response consists of a JSON metadata frame followed by a rendered RGB frame
+and an inverse depth frame for each view. Images are encoded as (uncompressed) TIFF.
+
+Multi-view requests list the camera poses under the `views` key of the metadata, e.g.,
+`{'views': [{'position': [...], 'rotation': [...]}, ...]}`, while single-view requests directly contain
+the `position` and `rotation` keys. A view may also contain a `tile` key with the pixel bounds
+`[x0, y0, x1, y1]` of the full image to render, in which case the background images only cover the tile.
+
+Layer requests (`{'layer': True, ...}`) carry no background images. The splats are rendered alone, and the
+response contains the premultiplied RGB, the alpha and the (alpha-weighted) inverse depth of each view,
+which can be composited against any background afterwards.
+
+By default, images are encoded as TIFF. Requests with `{'encoding': 'raw', ...}` instead send and receive
+C-contiguous raw arrays, where the RGB images are (H, W, 3) uint8, the depth, alpha and inverse depth
+images are (H, W) float32, and (H, W) is the rendered resolution (or the tile size). Raw images can be
+decoded without allocating any intermediate buffers.
+
+Requests may carry a `deadline` or a `max_age` (see `admission.py`). When the renderer cannot render a
+request in time, it replies with only a metadata frame, containing `status` (`overloaded` or `expired`),
+`retry_after` in seconds and the current `queue_depth`.
+
+A `{"type": "ping"}` (or `{"type": "status"}`) request is answered with the startup progress of the
+renderer (see `startup.py`), and render requests received before the renderer is ready are answered with
+a `loading` status.
+
+Requests with a `stream` ID are also published by the renderer, so that any number of viewers can watch
+the frames rendered for a single client. The format of the published messages is defined in `publisher.py`.
+
+A `{"type": "query", "num_rays": N, ...}` request casts N rays against the Gaussians (see `raycast.py`)
+instead of rendering a frame, and is followed by the (N, 3) float32 origins and directions as raw arrays.
+The response contains the (N,) float32 expected depth, the (N,) float32 accumulated opacity and, if the
+request has `{"color": true}`, the (N, 3) float32 color of each ray (see `encode_ray_query`).
+"""
+
+import json
+import time
+from io import BytesIO
+
+import numpy as np
+import zmq
+from PIL import Image
+
+
+def encode_image(image_np, encoding='tiff'):
+    """Encode an (H, W, 3) uint8 image or an (H, W) float32 image as TIFF or as a raw buffer."""
+    if encoding == 'raw':
+        return memoryview(np.ascontiguousarray(image_np))
+    if image_np.ndim == 2:
+        image = Image.fromarray(image_np.astype(np.float32, copy=False), mode='F')  # 'F' mode for float32
+    else:
+        image = Image.fromarray(image_np.astype(np.uint8, copy=False))
+    buffer = BytesIO()
+    image.save(buffer, format='TIFF')
+    return buffer.getvalue()
+
+
+def decode_image(data, encoding='tiff', shape=None, dtype=None):
+    """
+    Decode a TIFF image or a raw buffer into a NumPy array. The shape and dtype are required for raw
+    buffers, in which case the returned array is a read-only view of `data`.
+    """
+    if encoding == 'raw':
+        return np.frombuffer(data, dtype=dtype).reshape(shape)
+    return np.array(Image.open(BytesIO(data)))
+
+
+def encode_views(views, encoding='tiff'):
+    """Encode a list of image tuples, e.g., (rgb, depth) pairs, into a flat list of frames."""
+    frames = []
+    for images in views:
+        frames += [encode_image(image_np, encoding) for image_np in images]
+    return frames
+
+
+def decode_views(frames, images_per_view=2, encoding='tiff', shape=None):
+    """
+    Decode a flat list of frames into a list of image tuples, e.g., (rgb, depth) pairs. Raw frames also
+    need the (H, W) `shape` of the images, where the first image of each view is RGB and the others float32.
+    """
+    views = []
+    for i in range(0, len(frames), images_per_view):
+        data = frames[i:i + images_per_view]
+        if encoding == 'raw':
+            rgb = decode_image(data[0], encoding, (*shape, 3), np.uint8)
+            views.append((rgb, *(decode_image(d, encoding, shape, np.float32) for d in data[1:])))
+        else:
+            views.append(tuple(decode_image(d) for d in data))
+    return views
+
+
+def decode_response(request_metadata, frames):
+    """
+    Decode the frames of the response to a request with the given metadata.
+    Returns the response metadata and a list of image tuples, one per view.
+    """
+    metadata = json.loads(bytes(frames[0]))
+    if 'error' in metadata or len(frames) == 1:
+        return metadata, []
+    encoding = request_metadata.get('encoding', 'tiff')
+    images_per_view = 3 if request_metadata.get('layer', False) else 2
+    shapes = [view['shape'] for view in metadata['views']] if 'views' in metadata else [metadata['shape']]
+    views = []
+    for i, shape in enumerate(shapes):
+        data = frames[1 + i * images_per_view:1 + (i + 1) * images_per_view]
+        rgb = decode_image(data[0], encoding, shape, np.uint8)
+        views.append((rgb, *(decode_image(d, encoding, shape[:2], np.float32) for d in data[1:])))
+    return metadata, views
+
+
+def encode_ray_query(origins, directions, color=False, max_distance=None):
+    """Encode a query of the rays with the given (N, 3) origins and directions in the frame of the model."""
+    metadata = {'type': 'query', 'num_rays': len(origins), 'color': color}
+    if max_distance is not None:
+        metadata['max_distance'] = max_distance
+    return [json.dumps(metadata).encode()] + [
+        encode_image(np.asarray(rays, dtype=np.float32), 'raw') for rays in (origins, directions)
+    ]
+
+
+def decode_ray_query_response(frames):
+    """
+    Decode the response to a ray query. Returns the metadata, the depth and the opacity of each ray, and
+    the color of each ray if requested (None otherwise).
+    """
+    metadata = json.loads(bytes(frames[0]))
+    if 'error' in metadata or len(frames) == 1:
+        return metadata, None, None, None
+    num_rays = metadata['num_rays']
+    depth = decode_image(frames[1], 'raw', (num_rays,), np.float32)
+    opacity = decode_image(frames[2], 'raw', (num_rays,), np.float32)
+    color = decode_image(frames[3], 'raw', (num_rays, 3), np.float32) if len(frames) > 3 else None
+    return metadata, depth, opacity, color
+
+
+def connect(context, url):
+    """Connect a REQ socket that can be closed immediately if the peer is unresponsive."""
+    socket = context.socket(zmq.REQ)
+    socket.setsockopt(zmq.LINGER, 0)
+    socket.connect(url)
+    return socket
+
+
+def request_all(sockets, requests, timeout):
+    """
+    Send a multipart request to each socket in parallel, and wait for the replies.
+
+    Returns a dict mapping each socket to its reply frames and a dict mapping each socket to the elapsed
+    time in seconds. Sockets that did not reply within `timeout` seconds are missing from both dicts, and
+    must be reconnected before sending again.
+    """
+    poller = zmq.Poller()
+    start_times = {}
+    for socket, frames in zip(sockets, requests):
+        socket.send_multipart(frames)
+        poller.register(socket, zmq.POLLIN)
+        start_times[socket] = time.perf_counter()
+    replies = {}
+    elapsed = {}
+    deadline = time.perf_counter() + timeout
+    while len(replies) < len(start_times):
+        timeout_ms = max(0, (deadline - time.perf_counter()) * 1000)
+        events = dict(poller.poll(timeout_ms))
+        if not events:
+            break
+        for socket in events:
+            replies[socket] = socket.recv_multipart()
+            elapsed[socket] = time.perf_counter() - start_times[socket]
+            poller.unregister(socket)
+    return replies, elapsed
+
+
+def combine_status(statuses):
+    """
+    Combine the startup status replies of several renderers into a single status, e.g., in the proxies.
+    Renderers that did not reply are given as None. The combined status is ready only if all renderers are.
+    """
+    statuses = [status if status is not None else {'state': 'unreachable', 'progress': 0.0} for status in statuses]
+    not_ready = [status for status in statuses if status['state'] != 'ready']
+    if not not_ready:
+        return {'state': 'ready', 'progress': 1.0, 'renderers': statuses}
+    # Report the renderer that is furthest from being ready
+    slowest = min(not_ready, key=lambda status: status.get('progress', 0.0))
+    return {**slowest, 'progress': slowest.get('progress', 0.0), 'renderers': statuses}
+
+
+def wait_until_ready(context, url, timeout=None, interval=0.5):
+    """
+    Ping the renderer at `url` until it reports that it is ready, printing the startup progress.
+    Returns the last status, or raises TimeoutError if the renderer is not ready within `timeout` seconds.
+    """
+    deadline = time.perf_counter() + timeout if timeout is not None else None
+    last_state = None
+    while deadline is None or time.perf_counter() < deadline:
+        socket = connect(context, url)
+        socket.send_json({'type': 'ping'})
+        status = socket.recv_json() if socket.poll(interval * 1000) else {'state': 'unreachable'}
+        # A REQ socket cannot send again before receiving the reply, so always use a new socket
+        socket.close()
+        if status['state'] == 'ready':
+            return status
+        if status['state'] == 'failed':
+            raise RuntimeError(f"Renderer at {url} failed to start: {status.get('error')}")
+        if status['state'] != last_state:
+            print(f"Waiting for renderer at {url}: {status['state']} {status.get('message', '')}")
+            last_state = status['state']
+        time.sleep(interval)
+    raise TimeoutError(f"Renderer at {url} not ready within {timeout} s")
+
@@ -0,0 +1,156 @@
+"""
+Prune the Gaussians that contribute little to the rendered images, and write a compacted PLY file.
+
+Each Gaussian is scored by either:
+- `weight`: its blending weight accumulated over all pixels of a set of sample views, which also catches
+  Gaussians that are hidden behind others or never seen, or
+- `opacity_area`: its opacity times the area of its two largest axes (see `quality.py`), which doesn't need
+  any views.
+
+The sample views are the camera poses of a recorded session (see `recorder.py`) if `--log-dir` is given, and
+cameras on a circle around the origin otherwise. The Gaussians with the lowest scores are removed, and the
+remaining rows of the PLY file are written unchanged, so that the compacted file keeps the original format.
+
+Example:
+
+    python /src/prune.py --keep-fraction 0.6 --output /workspace/data/pruned.ply --report /workspace/data/pruned.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import torch
+from plyfile import PlyData, PlyElement
+
+from image_metrics import psnr
+from quality import importance_scores, select_splats
+from renderer import GaussianModel, PipelineParamsNoparse, create_camera_from_pose, render
+from request_log import read_camera_poses
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checkpoint', type=str,
+                        default="/workspace/data/exports/poster/splatfacto/DATE_TIME/splat/splat.ply",
+                        help="Path to the 3DGS PLY file")
+    parser.add_argument('--output', type=str, required=True, help="Path to write the compacted PLY file to")
+    parser.add_argument('--score', type=str, choices=['weight', 'opacity_area'], default='weight',
+                        help="How to score the contribution of each Gaussian")
+    parser.add_argument('--keep-fraction', type=float, default=0.7, help="Fraction of the Gaussians to keep")
+    parser.add_argument('--min-score', type=float, default=None,
+                        help="Also remove the Gaussians with a score lower than this, e.g., 0 to remove unseen ones")
+    parser.add_argument('--log-dir', type=str, default=None,
+                        help="Use the camera poses of a recorded session as sample views")
+    parser.add_argument('--num-views', type=int, default=32, help="Maximum number of sample views")
+    parser.add_argument('--radius', type=float, default=0.5,
+                        help="Radius of the circle of sample views, if no log is given")
+    parser.add_argument('--num-repeats', type=int, default=5, help="Number of times each view is rendered for timing")
+    parser.add_argument('--report', type=str, default=None, help="Path to write a JSON report to")
+    args = parser.parse_args()
+    return args
+
+def sample_poses(args):
+    """Return the sample camera poses as (position, euler angles) pairs in Isaac Sim convention."""
+    if args.log_dir is None:
+        # Cameras on a horizontal circle, looking around
+        angles = 2 * np.pi * np.arange(args.num_views) / args.num_views
+        return [
+            (np.array([args.radius * np.cos(angle), 0.0, args.radius * np.sin(angle)]), np.array([0.0, angle, 0.0]))
+            for angle in angles
+        ]
+    poses = [(np.array(position), np.array(rotation)) for position, rotation in read_camera_poses(args.log_dir)]
+    if not poses:
+        raise ValueError(f"No camera poses found in {args.log_dir}")
+    # Spread the sample views evenly over the session
+    indices = np.linspace(0, len(poses) - 1, min(args.num_views, len(poses))).round().astype(int)
+    return [poses[i] for i in indices]
+
+def load_model(path):
+    gaussians = GaussianModel(sh_degree=3)
+    gaussians.load_ply(path)
+    return gaussians
+
+def accumulated_weights(gaussians, pipeline, background, cameras):
+    """
+    Sum the blending weight (alpha times transmittance) of each Gaussian over all pixels of all cameras.
+    When all Gaussians are rendered in a constant color, each pixel is the weighted sum of that color, so the
+    gradient of the sum of all pixels w.r.t. the color of a Gaussian is exactly its accumulated weight.
+    """
+    weights = torch.zeros(gaussians.get_xyz.shape[0], dtype=torch.float32, device="cuda")
+    for camera in cameras:
+        bg_rgb = torch.zeros((3, camera.image_height, camera.image_width), dtype=torch.float32, device="cuda")
+        bg_depth = torch.full((camera.image_height, camera.image_width), float('inf'), dtype=torch.float32, device="cuda")
+        color = torch.ones((weights.shape[0], 3), dtype=torch.float32, device="cuda", requires_grad=True)
+        render_res = render(camera, gaussians, pipeline, background, bg_rgb, bg_depth, override_color=color)
+        render_res["render"][0].sum().backward()
+        weights += color.grad[:, 0]
+    return weights
+
+def render_images(gaussians, pipeline, background, cameras, num_repeats):
+    """Render each camera `num_repeats` times. Returns the RGB images (HWC) and the mean render time in seconds."""
+    images = []
+    elapsed = 0
+    with torch.no_grad():
+        for camera in cameras:
+            bg_rgb = torch.zeros((3, camera.image_height, camera.image_width), dtype=torch.float32, device="cuda")
+            bg_depth = torch.full((camera.image_height, camera.image_width), float('inf'), dtype=torch.float32, device="cuda")
+            torch.cuda.synchronize()
+            start_time = time.perf_counter()
+            for _ in range(num_repeats):
+                render_res = render(camera, gaussians, pipeline, background, bg_rgb, bg_depth)
+            torch.cuda.synchronize()
+            elapsed += time.perf_counter() - start_time
+            images.append((render_res["render"].permute(1, 2, 0).clamp(0, 1) * 255).to(torch.uint8).cpu().numpy())
+    return images, elapsed / (len(cameras) * num_repeats)
+
+def main(args):
+    pipeline = PipelineParamsNoparse()
+    background = torch.tensor([0, 0, 0], dtype=torch.float32, device="cuda")
+    cameras = [create_camera_from_pose(position, euler_angles) for position, euler_angles in sample_poses(args)]
+    gaussians = load_model(args.checkpoint)
+    num_gaussians = gaussians.get_xyz.shape[0]
+    print(f"Scoring {num_gaussians} Gaussians by {args.score} over {len(cameras)} views")
+
+    if args.score == 'weight':
+        scores = accumulated_weights(gaussians, pipeline, background, cameras)
+    else:
+        with torch.no_grad():
+            scores = importance_scores(gaussians)
+    keep = select_splats(scores.detach(), args.keep_fraction, args.min_score).cpu().numpy()
+
+    # Write the kept rows of the original file, in their original order
+    vertices = PlyData.read(args.checkpoint).elements[0]
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    PlyData([PlyElement.describe(vertices.data[np.sort(keep)], 'vertex')]).write(args.output)
+
+    # Compare against the original model
+    images, render_time = render_images(gaussians, pipeline, background, cameras, args.num_repeats)
+    del gaussians
+    pruned_images, pruned_render_time = render_images(load_model(args.output), pipeline, background, cameras, args.num_repeats)
+    psnrs = [psnr(pruned_image, image) for pruned_image, image in zip(pruned_images, images)]
+    finite_psnrs = [value for value in psnrs if value != float('inf')]
+    report = {
+        'checkpoint': args.checkpoint,
+        'output': args.output,
+        'score': args.score,
+        'num_views': len(cameras),
+        'gaussians': {'before': num_gaussians, 'after': len(keep)},
+        'file_size_bytes': {'before': os.path.getsize(args.checkpoint), 'after': os.path.getsize(args.output)},
+        'render_time_ms': {'before': render_time * 1000, 'after': pruned_render_time * 1000},
+        'speedup': render_time / pruned_render_time,
+        'identical_views': len(psnrs) - len(finite_psnrs),
+        'min_psnr': min(finite_psnrs) if finite_psnrs else None,
+        'mean_psnr': float(np.mean(finite_psnrs)) if finite_psnrs else None,
+    }
+    print(json.dumps(report, indent=2))
+    if args.report is not None:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,117 @@
+"""
+Fan-out of rendered frames to any number of viewers, e.g., to mirror the GSplat view in the PyGame viewer,
+monitoring dashboards or recorders, without rendering the same frame once per viewer.
+
+Frames rendered for requests with a `stream` ID are published on an XPUB socket under the topic
+`<stream>/<tier>`, where the tier selects the resolution and compression (see `PUBLISH_TIERS`). Subscribers
+should subscribe to the topic followed by a null byte (to avoid matching other tiers or streams by prefix),
+and set `ZMQ_CONFLATE` so that only the latest frame is kept. The XPUB socket reports the subscriptions,
+so only the tiers that have subscribers are downscaled and encoded. Slow subscribers never block the
+renderer, since frames beyond the (low) send high-water mark are dropped for that subscriber only.
+
+Each published message is a single frame (as required by `ZMQ_CONFLATE`), and consists of the topic, a null
+byte, the length of the JSON header (uint32), the header, and the images. The header contains the metadata
+of the request, the shape, dtype and encoded size of each image of each view, and the compression of the
+images (None or `zlib`). The PyGame viewer has its own copy of the decoder, since it runs in a separate
+container without the renderer sources.
+"""
+
+import json
+import struct
+import zlib
+
+import numpy as np
+import zmq
+
+PUBLISH_TIERS = {
+    'full': {'scale': 1, 'compression': None},
+    'half': {'scale': 2, 'compression': None},
+    'preview': {'scale': 4, 'compression': 'zlib'},
+}
+
+PUBLISHED_HEADER_LENGTH = struct.Struct('<I')
+
+
+def encode_published_frame(topic, metadata, views, compression=None):
+    """Encode the views of a rendered frame as a single published message, optionally compressed with zlib."""
+    images = []
+    header_views = []
+    for view in views:
+        header_images = []
+        for image_np in view:
+            data = np.ascontiguousarray(image_np).tobytes()
+            if compression == 'zlib':
+                data = zlib.compress(data, 1)
+            header_images.append({'shape': image_np.shape, 'dtype': str(image_np.dtype), 'size': len(data)})
+            images.append(data)
+        header_views.append(header_images)
+    header = json.dumps({'metadata': metadata, 'views': header_views, 'compression': compression}).encode()
+    return b''.join([topic.encode(), b'\0', PUBLISHED_HEADER_LENGTH.pack(len(header)), header] + images)
+
+
+def decode_published_frame(frame):
+    """Decode a published message. Returns the topic, the metadata and a list of image tuples, one per view."""
+    frame = memoryview(frame)
+    topic_end = bytes(frame[:256]).index(b'\0')
+    offset = topic_end + 1
+    (header_length,) = PUBLISHED_HEADER_LENGTH.unpack_from(frame, offset)
+    offset += PUBLISHED_HEADER_LENGTH.size
+    header = json.loads(bytes(frame[offset:offset + header_length]))
+    offset += header_length
+    views = []
+    for header_images in header['views']:
+        view = []
+        for image in header_images:
+            data = frame[offset:offset + image['size']]
+            offset += image['size']
+            if header['compression'] == 'zlib':
+                data = zlib.decompress(data)
+            view.append(np.frombuffer(data, dtype=image['dtype']).reshape(image['shape']))
+        views.append(tuple(view))
+    return bytes(frame[:topic_end]).decode(), header['metadata'], views
+
+
+class FramePublisher:
+    def __init__(self, context, url, send_hwm=2):
+        self.socket = context.socket(zmq.XPUB)
+        # Drop frames for subscribers that fall behind instead of queuing them
+        self.socket.setsockopt(zmq.SNDHWM, send_hwm)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.bind(url)
+        self.subscriptions = set()
+        # Statistics
+        self.published = {tier: 0 for tier in PUBLISH_TIERS}
+
+    def poll_subscriptions(self):
+        """Update the subscribed topics. XPUB reports the first subscription and the last unsubscription of each topic."""
+        while self.socket.poll(0):
+            message = self.socket.recv()
+            if message[:1] == b'\x01':
+                self.subscriptions.add(message[1:])
+            elif message[:1] == b'\x00':
+                self.subscriptions.discard(message[1:])
+
+    def has_subscribers(self, topic):
+        topic = topic.encode() + b'\0'
+        return any(topic.startswith(subscription) for subscription in self.subscriptions)
+
+    def publish(self, stream, metadata, views):
+        """Publish the views of a rendered frame to the subscribers of each tier of the stream."""
+        self.poll_subscriptions()
+        for tier, options in PUBLISH_TIERS.items():
+            topic = f"{stream}/{tier}"
+            if not self.has_subscribers(topic):
+                continue
+            scale = options['scale']
+            tier_views = [tuple(image[::scale, ::scale] for image in view) for view in views]
+            self.socket.send(encode_published_frame(topic, metadata, tier_views, options['compression']))
+            self.published[tier] += 1
+
+    def stats(self):
+        return {
+            'subscriptions': sorted(subscription.decode(errors='replace') for subscription in self.subscriptions),
+            'published': dict(self.published),
+        }
+
+    def close(self):
+        self.socket.close()
@@ -0,0 +1,96 @@
+"""
+Per-request quality tiers, trading image quality for render time.
+
+A request may carry a `quality`, either the name of a tier in `QUALITY_TIERS` or a dict with any of:
+- `sh_degree`: the active degree of the spherical harmonics (0-3), lower degrees drop view-dependent colors
+- `min_opacity`: splats with a lower opacity are skipped
+- `max_splats`: only the most important splats are rendered, ranked by opacity x projected area
+
+The reduced models are built once per tier and cached, so switching between tiers doesn't cost anything per frame.
+"""
+
+import copy
+from collections import OrderedDict
+
+import torch
+
+QUALITY_TIERS = {
+    'high': {'sh_degree': 3, 'min_opacity': 0.0, 'max_splats': None},
+    'medium': {'sh_degree': 1, 'min_opacity': 0.02, 'max_splats': 1_000_000},
+    'low': {'sh_degree': 0, 'min_opacity': 0.05, 'max_splats': 300_000},
+}
+
+# Attributes of `GaussianModel` with one entry per splat
+PER_SPLAT_ATTRIBUTES = ['_xyz', '_features_dc', '_features_rest', '_scaling', '_rotation', '_opacity']
+
+
+def parse_quality(quality, max_sh_degree):
+    """Return the (sh_degree, min_opacity, max_splats) of a request, or raise ValueError if it is invalid."""
+    if isinstance(quality, str):
+        if quality not in QUALITY_TIERS:
+            raise ValueError(f"Unknown quality tier '{quality}', expected one of {list(QUALITY_TIERS)}")
+        # The named tiers also apply to models trained with a lower SH degree
+        quality = {**QUALITY_TIERS[quality], 'sh_degree': min(QUALITY_TIERS[quality]['sh_degree'], max_sh_degree)}
+    sh_degree = quality.get('sh_degree', max_sh_degree)
+    min_opacity = quality.get('min_opacity', 0.0)
+    max_splats = quality.get('max_splats')
+    if not 0 <= sh_degree <= max_sh_degree:
+        raise ValueError(f"SH degree must be between 0 and {max_sh_degree}, got {sh_degree}")
+    if max_splats is not None and max_splats <= 0:
+        raise ValueError(f"Maximum number of splats must be positive, got {max_splats}")
+    return sh_degree, float(min_opacity), max_splats
+
+
+def importance_scores(gaussians):
+    """Opacity times the area of the two largest axes of each splat, a view-independent proxy of its contribution."""
+    scales, _ = torch.sort(gaussians.get_scaling, dim=1, descending=True)
+    return gaussians.get_opacity[:, 0] * scales[:, 0] * scales[:, 1]
+
+
+def select_splats(scores, keep_fraction, min_score=None):
+    """Indices of the best `keep_fraction` of the splats by descending score, minus those scoring <= `min_score`."""
+    keep = torch.argsort(scores, descending=True, stable=True)[:int(round(len(scores) * keep_fraction))]
+    if min_score is not None:
+        keep = keep[scores[keep] > min_score]
+    return keep
+
+
+class QualityTiers:
+    def __init__(self, gaussians, max_cached=8):
+        self.gaussians = gaussians
+        self.max_cached = max_cached
+        with torch.no_grad():
+            # Splat indices from the most to the least important
+            self.order = torch.argsort(importance_scores(gaussians), descending=True)
+            self.sorted_opacity = gaussians.get_opacity[self.order, 0]
+        self._models = OrderedDict()
+
+    def get(self, quality):
+        """Return the (possibly reduced) model to render a request with the given quality."""
+        if quality is None:
+            return self.gaussians
+        key = parse_quality(quality, self.gaussians.max_sh_degree)
+        model = self._models.get(key)
+        if model is not None:
+            self._models.move_to_end(key)
+            return model
+        if len(self._models) >= self.max_cached:
+            self._models.popitem(last=False)
+        model = self._build(*key)
+        self._models[key] = model
+        return model
+
+    def _build(self, sh_degree, min_opacity, max_splats):
+        # Share the tensors with the full model, and only replace the per-splat tensors if splats are dropped
+        model = copy.copy(self.gaussians)
+        model.active_sh_degree = sh_degree
+        if min_opacity <= 0 and (max_splats is None or max_splats >= len(self.order)):
+            return model
+        with torch.no_grad():
+            indices = self.order[self.sorted_opacity >= min_opacity][:max_splats]
+            for name in PER_SPLAT_ATTRIBUTES:
+                setattr(model, name, getattr(self.gaussians, name)[indices])
+            # The derived attributes computed at load time (see `attribute_cache.py`) are also per splat
+            if getattr(self.gaussians, 'cache', None) is not None:
+                model.cache = {name: value[indices] for name, value in self.gaussians.cache.items()}
+        return model
@@ -0,0 +1,241 @@
+"""
+Ray queries against the Gaussian model, e.g., for proximity checks, grasp probes or sparse lidar-like sampling,
+without rasterizing a full frame.
+
+The Gaussians are inserted into a sparse uniform grid, covering the bounding box of 3 standard deviations of
+each Gaussian. Each ray is sampled at half the cell size, and only the Gaussians in the visited cells are
+evaluated. For each ray and Gaussian, the Gaussian is evaluated at its maximum along the ray, and the Gaussians
+are alpha blended front to back in the order of these maxima, similar to the rasterizer. The cost is
+proportional to the number of rays and the number of Gaussians along them, not to the image resolution.
+
+Rays are given in the frame of the model, the same frame as the camera poses of render requests.
+"""
+
+import math
+import sys
+
+import torch
+
+# Assume running in the pre-built gaussian-splatting container
+sys.path.append('/workspace/gaussian-splatting')
+
+# Same thresholds as the rasterizer
+MIN_ALPHA = 1 / 255
+MAX_ALPHA = 0.99
+
+
+def quaternion_to_matrix(quaternions):
+    """
+    Rotation matrices of (N, 4) unit quaternions in (w, x, y, z) order, same as `build_rotation` in
+    gaussian-splatting, which is not imported so that the index can be built without it.
+    """
+    w, x, y, z = quaternions.unbind(dim=1)
+    return torch.stack([
+        1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y),
+        2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x),
+        2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y),
+    ], dim=1).view(-1, 3, 3)
+
+
+class GaussianRaycaster:
+    def __init__(self, gaussians, cell_size=None, max_cells_per_axis=512, max_span=8, chunk_size=1 << 22):
+        """
+        Build the spatial index. Gaussians spanning more than `max_span` cells along an axis are not inserted
+        into the grid, and are evaluated for every ray instead. `chunk_size` bounds the number of ray samples
+        and of ray-Gaussian pairs processed at once, which bounds the temporary memory of a query.
+        """
+        self.gaussians = gaussians
+        self.chunk_size = chunk_size
+        with torch.no_grad():
+            opacity = gaussians.get_opacity[:, 0]
+            valid = torch.nonzero(opacity >= MIN_ALPHA)[:, 0]
+            self.ids = valid
+            self.means = gaussians.get_xyz[valid].detach()
+            self.opacity = opacity[valid].detach()
+            scales = gaussians.get_scaling[valid].detach()
+            rotations = quaternion_to_matrix(gaussians.get_rotation[valid].detach())
+            # Inverse covariance R S^-2 R^T
+            self.precisions = rotations @ torch.diag_embed(1 / scales ** 2) @ rotations.transpose(1, 2)
+            radii = 3 * scales.max(dim=1).values
+
+            bounds_min = (self.means - radii[:, None]).min(dim=0).values
+            bounds_max = (self.means + radii[:, None]).max(dim=0).values
+            if cell_size is None:
+                # Most Gaussians span one or two cells along each axis
+                cell_size = 2 * radii.median().item()
+            cell_size = max(cell_size, (bounds_max - bounds_min).max().item() / max_cells_per_axis)
+            self.cell_size = cell_size
+            self.bounds_min = bounds_min
+            self.bounds_max = bounds_max
+            self.grid_shape = torch.ceil((bounds_max - bounds_min) / cell_size).long().clamp_min(1)
+            self._build_grid(radii, max_span)
+
+    def _cell_keys(self, cells):
+        """Linear index of integer cell coordinates."""
+        return (cells[..., 0] * self.grid_shape[1] + cells[..., 1]) * self.grid_shape[2] + cells[..., 2]
+
+    def _build_grid(self, radii, max_span):
+        cell_min = torch.floor((self.means - radii[:, None] - self.bounds_min) / self.cell_size).long()
+        cell_max = torch.floor((self.means + radii[:, None] - self.bounds_min) / self.cell_size).long()
+        cell_min = torch.minimum(cell_min.clamp_min(0), self.grid_shape - 1)
+        cell_max = torch.minimum(cell_max.clamp_min(0), self.grid_shape - 1)
+        spans = cell_max - cell_min + 1
+        large = (spans > max_span).any(dim=1)
+        # Large Gaussians, e.g., the background, are evaluated for every ray
+        self.large = torch.nonzero(large)[:, 0]
+        small = torch.nonzero(~large)[:, 0]
+        spans, cell_min = spans[small], cell_min[small]
+        counts = spans.prod(dim=1)
+        # Enumerate the cells covered by each Gaussian
+        gaussian = torch.repeat_interleave(small, counts)
+        offset = torch.arange(len(gaussian), device=gaussian.device) - torch.repeat_interleave(torch.cumsum(counts, 0) - counts, counts)
+        spans, cell_min = torch.repeat_interleave(spans, counts, dim=0), torch.repeat_interleave(cell_min, counts, dim=0)
+        cells = cell_min + torch.stack([
+            offset // (spans[:, 1] * spans[:, 2]),
+            offset // spans[:, 2] % spans[:, 1],
+            offset % spans[:, 2],
+        ], dim=1)
+        keys, order = torch.sort(self._cell_keys(cells))
+        # Compressed sparse rows over the occupied cells
+        self.cell_gaussians = gaussian[order]
+        self.cell_keys, counts = torch.unique_consecutive(keys, return_counts=True)
+        self.cell_starts = torch.cumsum(counts, 0) - counts
+        self.cell_counts = counts
+
+    def stats(self):
+        return {
+            'gaussians': len(self.ids),
+            'large_gaussians': len(self.large),
+            'cell_size': self.cell_size,
+            'grid_shape': self.grid_shape.tolist(),
+            'occupied_cells': len(self.cell_keys),
+            'entries': len(self.cell_gaussians),
+        }
+
+    def query(self, origins, directions, max_distance=10.0, color=False):
+        """
+        Cast rays with (R, 3) `origins` and `directions`. Returns the (R,) expected depth along the ray
+        (infinity if nothing is hit), the (R,) accumulated opacity, and the (R, 3) color if `color` is set.
+        """
+        directions = directions / directions.norm(dim=1, keepdim=True)
+        num_steps = max(1, math.ceil(max_distance / (self.cell_size / 2)))
+        rays_per_chunk = max(1, self.chunk_size // num_steps)
+        results = []
+        for i in range(0, len(origins), rays_per_chunk):
+            chunk_origins, chunk_directions = origins[i:i + rays_per_chunk], directions[i:i + rays_per_chunk]
+            ray, cell = self._visited_cells(chunk_origins, chunk_directions, max_distance, num_steps)
+            # The number of ray-Gaussian pairs depends on the occupancy of the visited cells, and is only
+            # bounded by splitting the rays again on the (upper bound of the) number of pairs of each ray
+            pairs = torch.zeros(len(chunk_origins), dtype=torch.long, device=origins.device)
+            pairs.index_add_(0, ray, self.cell_counts[cell])
+            pairs += len(self.large)
+            bounds = torch.searchsorted(ray, torch.arange(len(chunk_origins) + 1, device=ray.device)).tolist()
+            for start, end in self._split_rays(pairs):
+                chunk_ray, chunk_cell = ray[bounds[start]:bounds[end]] - start, cell[bounds[start]:bounds[end]]
+                candidates = self._expand_cells(chunk_ray, chunk_cell, end - start)
+                results.append(self._query_chunk(chunk_origins[start:end], chunk_directions[start:end], *candidates, max_distance, color))
+        return tuple(torch.cat(values) if values[0] is not None else None for values in zip(*results))
+
+    def _split_rays(self, pairs):
+        """Split the rays into consecutive ranges with at most `chunk_size` pairs, or a single ray with more pairs."""
+        cumulative = torch.cumsum(pairs, 0).cpu()
+        ranges = []
+        start = 0
+        while start < len(cumulative):
+            base = cumulative[start - 1].item() if start > 0 else 0
+            end = max(start + 1, torch.searchsorted(cumulative, base + self.chunk_size, right=True).item())
+            ranges.append((start, end))
+            start = end
+        return ranges
+
+    def _candidates(self, origins, directions, max_distance, num_steps):
+        """Return the (ray, Gaussian) pairs of the Gaussians in the cells visited by each ray."""
+        ray, cell = self._visited_cells(origins, directions, max_distance, num_steps)
+        return self._expand_cells(ray, cell, len(origins))
+
+    def _visited_cells(self, origins, directions, max_distance, num_steps):
+        """Return the (ray, occupied cell) pairs of the cells visited by each ray, sorted by ray."""
+        device = origins.device
+        # Clip the rays to the grid bounds, avoiding 0 * inf for axis-aligned rays
+        inv_directions = 1 / torch.where(directions == 0, torch.full_like(directions, 1e-12), directions)
+        t0 = (self.bounds_min - origins) * inv_directions
+        t1 = (self.bounds_max - origins) * inv_directions
+        t_near = torch.minimum(t0, t1).max(dim=1).values.clamp_min(0)
+        t_far = torch.maximum(t0, t1).min(dim=1).values.clamp_max(max_distance)
+        steps = (torch.arange(num_steps, device=device) + 0.5) * (self.cell_size / 2)
+        t = t_near[:, None] + steps[None, :]
+        valid = t <= t_far[:, None]
+        ray, step = torch.nonzero(valid, as_tuple=True)
+        points = origins[ray] + t[ray, step, None] * directions[ray]
+        cells = torch.floor((points - self.bounds_min) / self.cell_size).long()
+        cells = torch.minimum(cells.clamp_min(0), self.grid_shape - 1)
+        keys = self._cell_keys(cells)
+        # Look up the occupied cells
+        num_cells = len(self.cell_keys)
+        index = torch.searchsorted(self.cell_keys, keys).clamp_max(max(num_cells - 1, 0))
+        hit = self.cell_keys[index] == keys if num_cells > 0 else torch.zeros_like(keys, dtype=torch.bool)
+        ray, index = ray[hit], index[hit]
+        # Consecutive samples often fall into the same cell
+        pair_keys = torch.unique(ray * num_cells + index)
+        return pair_keys // max(num_cells, 1), pair_keys % max(num_cells, 1)
+
+    def _expand_cells(self, ray, cell, num_rays):
+        """Return the (ray, Gaussian) pairs of the Gaussians in the given (ray, cell) pairs, and the large Gaussians."""
+        device = ray.device
+        counts = self.cell_counts[cell]
+        ray = torch.repeat_interleave(ray, counts)
+        entry = torch.arange(len(ray), device=device) - torch.repeat_interleave(torch.cumsum(counts, 0) - counts, counts)
+        gaussian = self.cell_gaussians[torch.repeat_interleave(self.cell_starts[cell], counts) + entry]
+        # Add the large Gaussians to every ray
+        ray = torch.cat([ray, torch.arange(num_rays, device=device).repeat_interleave(len(self.large))])
+        gaussian = torch.cat([gaussian, self.large.repeat(num_rays)])
+        # A Gaussian may cover several cells visited by a ray
+        pair_keys = torch.unique(ray * len(self.ids) + gaussian)
+        return pair_keys // len(self.ids), pair_keys % len(self.ids)
+
+    @torch.no_grad()
+    def _query_chunk(self, origins, directions, ray, gaussian, max_distance, color):
+        num_rays = len(origins)
+        # Maximum of each Gaussian along the ray
+        diff = self.means[gaussian] - origins[ray]
+        precision = self.precisions[gaussian]
+        d = directions[ray]
+        d_precision = (d[:, None, :] @ precision)[:, 0]
+        a = (d_precision * d).sum(dim=1)
+        b = (d_precision * diff).sum(dim=1)
+        t = b / a
+        # Evaluate at the offset from the maximum instead of expanding to diff^T P diff - b^2 / a, which cancels
+        # most of the float32 precision for Gaussians far from the origin
+        offset = diff - t[:, None] * d
+        mahalanobis = ((offset[:, None, :] @ precision)[:, 0] * offset).sum(dim=1)
+        alpha = (self.opacity[gaussian] * torch.exp(-0.5 * mahalanobis.clamp_min(0))).clamp_max(MAX_ALPHA)
+        keep = (alpha >= MIN_ALPHA) & (t > 0) & (t <= max_distance)
+        ray, gaussian, t, alpha = ray[keep], gaussian[keep], t[keep], alpha[keep]
+        # Sort front to back within each ray
+        t, order = torch.sort(t)
+        ray, gaussian, alpha = ray[order], gaussian[order], alpha[order]
+        ray, order = torch.sort(ray, stable=True)
+        gaussian, t, alpha = gaussian[order], t[order], alpha[order]
+        # Transmittance in front of each Gaussian, with an exclusive cumulative sum per ray. The sum runs over
+        # all rays of the chunk, so it is accumulated in double precision, otherwise subtracting the sum of the
+        # previous rays cancels most of the significant digits of the later rays
+        log_transmittance = torch.log1p(-alpha).double()
+        exclusive = torch.cumsum(log_transmittance, 0) - log_transmittance
+        counts = torch.bincount(ray, minlength=num_rays)
+        starts = torch.cumsum(counts, 0) - counts
+        weights = alpha * torch.exp(exclusive - exclusive[starts[ray]]).to(alpha.dtype)
+
+        opacity = torch.zeros(num_rays, device=origins.device).index_add_(0, ray, weights)
+        depth = torch.zeros(num_rays, device=origins.device).index_add_(0, ray, weights * t)
+        depth = torch.where(opacity > 0, depth / opacity, torch.full_like(depth, float('inf')))
+        rgb = None
+        if color:
+            # Same view-dependent color as the rasterizer, from the ray origin to the Gaussian
+            from utils.sh_utils import eval_sh
+            model = self.gaussians
+            shs = model.get_features[self.ids[gaussian]].transpose(1, 2).view(-1, 3, (model.max_sh_degree + 1) ** 2)
+            view_directions = self.means[gaussian] - origins[ray]
+            view_directions = view_directions / view_directions.norm(dim=1, keepdim=True)
+            colors = torch.clamp_min(eval_sh(model.active_sh_degree, shs, view_directions) + 0.5, 0.0)
+            rgb = torch.zeros((num_rays, 3), device=origins.device).index_add_(0, ray, weights[:, None] * colors)
+        return depth, opacity, rgb
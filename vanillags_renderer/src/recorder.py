@@ -0,0 +1,78 @@
+"""
+Transparent proxy that records every request and response exchanged with the renderer.
+
+Start the renderer on another socket URL, and start the recorder on the socket URL used by the clients:
+
+    python /src/main.py --socket-url ipc:///tmp/omni-3dgs-extension/vanillags_renderer_recorded
+    python /src/recorder.py --renderer-url ipc:///tmp/omni-3dgs-extension/vanillags_renderer_recorded \
+        --log-dir /tmp/omni-3dgs-extension/logs/session
+
+The log can then be replayed with `replay.py`. The recorder stops on SIGINT or SIGTERM (e.g., `docker stop`),
+after writing the current request and response.
+"""
+
+import argparse
+import signal
+import time
+
+import zmq
+
+from request_log import KIND_REQUEST, KIND_RESPONSE, RequestLogWriter
+
+STOP_SIGNALS = {signal.SIGINT, signal.SIGTERM}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket-url', type=str,
+                        default="ipc:///tmp/omni-3dgs-extension/vanillags_renderer",
+                        help="ZMQ socket URL to bind to")
+    parser.add_argument('--renderer-url', type=str, required=True, help="ZMQ socket URL of the renderer")
+    parser.add_argument('--log-dir', type=str, required=True, help="Directory to write the log to")
+    parser.add_argument('--chunk-size', type=int, default=256, help="Maximum size of each log chunk in MiB")
+    parser.add_argument('--compress', action='store_true', help="Compress the recorded frames with zlib")
+    args = parser.parse_args()
+    return args
+
+def stop(signum, frame):
+    raise KeyboardInterrupt
+
+def main(args):
+    # Stop the same way on SIGTERM as on Ctrl+C, so that the log is closed
+    signal.signal(signal.SIGTERM, stop)
+    context = zmq.Context()
+    receiver = context.socket(zmq.REP)
+    receiver.bind(args.socket_url)
+    renderer = context.socket(zmq.REQ)
+    renderer.connect(args.renderer_url)
+    writer = RequestLogWriter(args.log_dir, args.chunk_size * 1024 * 1024, args.compress)
+
+    print(f"Recording requests to {args.log_dir}...")
+
+    sequence = 0
+    try:
+        while True:
+            request = receiver.recv_multipart()
+            request_time = time.perf_counter_ns()
+            renderer.send_multipart(request)
+            response = renderer.recv_multipart()
+            response_time = time.perf_counter_ns()
+            # Signals are only handled after both records are written and counted, so that stopping never
+            # truncates a record or drops an exchange that the client already received
+            signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+            receiver.send_multipart(response)
+            # Write after replying, so that recording doesn't add latency to the client
+            writer.append(KIND_REQUEST, sequence, request_time, request)
+            writer.append(KIND_RESPONSE, sequence, response_time, response)
+            sequence += 1
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+            if sequence % 100 == 0:
+                print(f"Recorded {sequence} requests")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+        print(f"Recorded {sequence} requests")
+
+if __name__ == "__main__":
+    main(parse_args())
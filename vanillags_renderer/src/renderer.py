@@ -0,0 +1,323 @@
+"""
+Rendering of requests with the gaussian-splatting rasterizer.
+
+Importing this module is slow, since it imports torch and the gaussian-splatting modules, so `main.py`
+only imports it in the background after the socket is bound.
+
+Note that this file is based on the following two references:
+* https://github.com/shumash/gaussian-splatting/blob/1616419cda09a0e0249a6ab6c2d10e44f9e1c2ea/interactive.ipynb
+* https://github.com/graphdeco-inria/gaussian-splatting/tree/54c035f7834b564019656c3e3fcc3646292f727d
+"""
+
+import json
+import math
+import sys
+import time
+import numpy as np
+import torch
+from PIL import Image
+from scipy.spatial.transform import Rotation
+
+from buffer_pool import BufferPool
+from projection import get_tile_projection_matrix
+from protocol import decode_image, encode_views
+from quality import QualityTiers
+from staging import decode_background, download, download_image
+
+# Assume running in the pre-built gaussian-splatting container
+sys.path.append('/workspace/gaussian-splatting')
+
+from gaussian_renderer import render
+from scene.gaussian_model import GaussianModel
+from scene.cameras import Camera as GSCamera
+from utils.graphics_utils import getWorld2View2
+
+from attribute_cache import load_cached_model
+from raycast import GaussianRaycaster
+
+
+class PipelineParamsNoparse:
+    """ Same as PipelineParams but without argument parser. """
+    def __init__(self):
+        self.convert_SHs_python = False
+        self.compute_cov3D_python = False
+        self.debug = False
+        self.antialiasing = False
+
+def get_colmap_pose(position, euler_angles):
+    """Convert a camera pose in Isaac Sim convention to the (R, T) used by gaussian-splatting."""
+    C2W = np.eye(4)
+    C2W[:3, :3] = Rotation.from_euler('xyz', euler_angles).as_matrix()
+    C2W[:3, 3] = position
+    W2C = np.linalg.inv(C2W)
+    ISAAC_SIM_TO_GS_CONVENTION = np.array([
+        [1,  0,  0, 0],
+        [0, -1,  0, 0],
+        [0,  0, -1, 0],
+        [0,  0,  0, 1]
+    ])
+    # Convert from Isaac Sim to GS camera convention
+    # - Isaac Sim: +X Right, +Y Up, -Z Forward
+    #   https://docs.omniverse.nvidia.com/isaacsim/latest/reference_conventions.html#default-camera-axes
+    # - GS/COLMAP: +X Right, -Y Up, +Z Forward
+    #   https://github.com/graphdeco-inria/gaussian-splatting/issues/100#issuecomment-1686463391
+    # This conversion must be done on W2C, not C2W, so as to rotate around the camera center.
+    W2C = ISAAC_SIM_TO_GS_CONVENTION @ W2C
+    # Following the COLMAP convention:
+    # - https://colmap.github.io/format.html#images-txt
+    #   - R is camera to world rotation
+    #   - T is world to camera translation
+    R = W2C[:3, :3].T
+    T = W2C[:3, 3]
+    # Other references:
+    # - https://github.com/graphdeco-inria/gaussian-splatting/blob/54c035f7834b564019656c3e3fcc3646292f727d/utils/graphics_utils.py#L38-L49
+    # - https://github.com/graphdeco-inria/gaussian-splatting/blob/54c035f7834b564019656c3e3fcc3646292f727d/scene/cameras.py#L86-L89
+    # - https://github.com/graphdeco-inria/gaussian-splatting/blob/54c035f7834b564019656c3e3fcc3646292f727d/utils/camera_utils.py#L78-L85
+    #   I think the `W2C` variable in the code above should be renamed to `C2W`? I'm not entirely sure though.
+    # - https://github.com/graphdeco-inria/gaussian-splatting/blob/54c035f7834b564019656c3e3fcc3646292f727d/scene/dataset_readers.py#L239-L247
+    return R, T
+
+def create_camera_from_pose(position, euler_angles, width=1280, height=720, tile=None):
+    # The default width and height is the default resolution of Isaac Sim
+    # If `tile = (x0, y0, x1, y1)` is given, only the pixels in the tile are rendered
+
+    R, T = get_colmap_pose(position, euler_angles)
+
+    # Isaac Sim camera defaults:
+    # - Size: 1280x720
+    # - Focal Length: 18.14756
+    # - Horizontal Aperture: 20.955
+    # - Vertical Aperture: (Value Unused)
+    # - (Calculated) horizontal FoV = math.degrees(2 * math.atan(20.955 / (2 * 18.14756))) = 60
+    # - (Calculated) vertical FoV = math.degrees(2 * math.atan((height / width) * math.tan(math.radians(fov_horizontal) / 2))) = 35.98339777135764
+    # Some useful equations:
+    # - focal_length = width / (2 * math.tan(math.radians(fov_horizontal) / 2))
+    # - focal_length = height / (2 * math.tan(math.radians(fov_vertical) / 2))
+    # - fov_vertical = math.degrees(2 * math.atan(height / (2 * focal_length)))
+    # - fov_horizontal = math.degrees(2 * math.atan(width / (2 * focal_length)))
+    # - fov_horizontal = math.degrees(2 * math.atan(horiz_aperture / (2 * focal_length)))
+    #   Ref: https://forums.developer.nvidia.com/t/change-intrinsic-camera-parameters/180309/6
+    # - aspect_ratio = width / height
+    # - fov_vertical = math.degrees(2 * math.atan((height / width) * math.tan(math.radians(fov_horizontal) / 2)))
+    # Follow the default camera parameters in Isaac Sim
+    fovx = np.radians(60)
+    fovy = np.radians(35.98339777135764)
+
+    if tile is None:
+        tile = (0, 0, width, height)
+    x0, y0, x1, y1 = tile
+    # Keep the focal length of the full image, since the rasterizer derives it from the FoV and the image size
+    tile_fovx = 2 * math.atan(math.tan(fovx / 2) * (x1 - x0) / width)
+    tile_fovy = 2 * math.atan(math.tan(fovy / 2) * (y1 - y0) / height)
+    image = Image.new('RGB', (x1 - x0, y1 - y0))  # fake image
+    camera = GSCamera(
+        resolution=image.size, 
+        colmap_id=0,
+        R=R, 
+        T=T, 
+        FoVx=tile_fovx, 
+        FoVy=tile_fovy,
+        depth_params=None,
+        image=image,
+        invdepthmap=None, 
+        image_name='fake', 
+        uid=0
+    )
+    if tile != (0, 0, width, height):
+        # Shift the frustum to the tile. Note that the rasterizer clamps the projected covariance to 1.3x the
+        # (tile) FoV around the optical axis, which distorts splats in tiles far from the center, see
+        # `get_tile_projection_matrix` for the resulting limit on the number of bands.
+        camera.projection_matrix = get_tile_projection_matrix(camera.znear, camera.zfar, fovx, fovy, width, height, tile).transpose(0, 1).cuda()
+        camera.full_proj_transform = (camera.world_view_transform.unsqueeze(0).bmm(camera.projection_matrix.unsqueeze(0))).squeeze(0)
+    return camera
+
+def update_camera_pose(camera, position, euler_angles):
+    """
+    Move an existing camera to a new pose. Much cheaper than creating a new camera, which allocates
+    (and uploads to the GPU) a fake image with the full resolution.
+    Ref: https://github.com/graphdeco-inria/gaussian-splatting/blob/54c035f7834b564019656c3e3fcc3646292f727d/scene/cameras.py#L86-L89
+    """
+    camera.R, camera.T = get_colmap_pose(position, euler_angles)
+    world_view = getWorld2View2(camera.R, camera.T, camera.trans, camera.scale)
+    # Update the tensors of the camera in place instead of allocating new ones on the GPU every frame
+    camera.world_view_transform.copy_(torch.from_numpy(world_view).transpose(0, 1))
+    torch.matmul(camera.world_view_transform, camera.projection_matrix, out=camera.full_proj_transform)
+    # Invert the 4x4 matrix on the host, since `inverse` on the GPU allocates and synchronizes
+    camera.camera_center.copy_(torch.from_numpy(np.linalg.inv(world_view)[:3, 3].astype(np.float32)))
+
+MAX_CACHED_CAMERAS = 16
+
+def create_camera_from_request(cameras, pose):
+    """Return a camera for the pose of a request, reusing the cameras with the same tile in `cameras`."""
+    tile = tuple(pose['tile']) if 'tile' in pose else None
+    if tile not in cameras:
+        if len(cameras) >= MAX_CACHED_CAMERAS:
+            # Evict the oldest camera, e.g., when the tile size keeps changing
+            cameras.pop(next(iter(cameras)))
+        cameras[tile] = create_camera_from_pose(np.array(pose['position']), np.array(pose['rotation']), tile=tile)
+    else:
+        update_camera_pose(cameras[tile], np.array(pose['position']), np.array(pose['rotation']))
+    return cameras[tile]
+
+def render_view(pool, gaussians, pipeline, background, camera, bg_rgb, bg_depth, tag):
+    """
+    Render a single view and return the RGB image (HWC) and the inverse depth (HW) as NumPy arrays.
+    The arrays are pooled buffers, which are overwritten by the next call with the same tag.
+    """
+    render_res = render(camera, gaussians, pipeline, background, bg_rgb, bg_depth)
+
+    # Convert from CHW (torch) to HWC (numpy)
+    render_np = download_image(pool, render_res["render"], tag)
+    # The "depth" here actually contains the inverse depth
+    # Ref: https://github.com/graphdeco-inria/diff-gaussian-rasterization/blob/9c5c2028f6fbee2be239bc4c9421ff894fe4fbe0/rasterize_points.cu#L123
+    inv_depth_np = download(pool, render_res["depth"][0], tag)
+    return render_np, inv_depth_np
+
+def render_layer(pool, gaussians, pipeline, background, camera, tag):
+    """
+    Render the splats of a single view without background, and return the premultiplied RGB image (HWC),
+    the alpha (HW) and the alpha-weighted inverse depth (HW) as NumPy arrays.
+    The arrays are pooled buffers, which are overwritten by the next call with the same tag.
+
+    The rasterizer only outputs the composited RGB and the inverse depth, so the alpha is rendered in a
+    second pass, and a layer costs about two renders (see `bench_compositing.py --socket-url`).
+    """
+    # Compositing against a black background at infinity results in premultiplied colors
+    bg_rgb = pool.get((3, camera.image_height, camera.image_width), torch.float32, "cuda", tag='layer').fill_(0)
+    bg_depth = pool.get((camera.image_height, camera.image_width), torch.float32, "cuda", tag='layer').fill_(float('inf'))
+    render_res = render(camera, gaussians, pipeline, background, bg_rgb, bg_depth)
+    # Rendering all splats in white results in the accumulated alpha
+    white = pool.get((gaussians.get_xyz.shape[0], 3), torch.float32, "cuda", tag='layer').fill_(1)
+    alpha_res = render(camera, gaussians, pipeline, background, bg_rgb, bg_depth, override_color=white)
+
+    render_np = download_image(pool, render_res["render"], tag)
+    alpha_np = download(pool, alpha_res["render"][0], f"{tag}/alpha")
+    inv_depth_np = download(pool, render_res["depth"][0], f"{tag}/inv_depth")
+    return render_np, alpha_np, inv_depth_np
+
+class RenderState:
+    """Everything that is kept resident between requests."""
+
+    def __init__(self, args):
+        # Load 3DGS model
+        if args.attribute_cache == 'off':
+            self.gaussians = GaussianModel(sh_degree=3)
+            self.gaussians.load_ply(args.checkpoint)
+        else:
+            # Compute the activated attributes and 3D covariances once instead of every frame
+            self.gaussians = load_cached_model(args.checkpoint, persist=args.attribute_cache == 'disk')
+        # Reduced models for requests with a lower quality, ranked by an importance score computed once
+        self.quality_tiers = QualityTiers(self.gaussians)
+        # Spatial index for ray queries, only built on the first query (see `query_request`)
+        self.raycaster = None
+        self.pipeline = PipelineParamsNoparse()
+        # Pass the cached covariances to the rasterizer instead of the scales and rotations
+        self.pipeline.compute_cov3D_python = args.attribute_cache != 'off'
+        self.background = torch.tensor([0, 0, 0], dtype=torch.float32, device="cuda")
+        # Reuse buffers across frames to avoid allocator churn
+        self.pool = BufferPool()
+        self.cameras = {}
+        self.num_frames = 0
+        self.warmup_frames = args.warmup_frames
+
+def render_request(state, metadata, frames):
+    """
+    Render all views of a request, and return the response metadata and a list of image tuples, one per view.
+    The images are pooled buffers, which are overwritten by the next request.
+    """
+    encoding = metadata.get('encoding', 'tiff')
+    # Single-view requests are treated as multi-view requests with a single view
+    poses = metadata['views'] if 'views' in metadata else [metadata]
+    # Layer requests don't carry background images
+    layer = metadata.get('layer', False)
+    frames_per_view = 0 if layer else 2
+    if len(frames) != 1 + frames_per_view * len(poses):
+        raise ValueError(f"Expected {1 + frames_per_view * len(poses)} frames for {len(poses)} views, got {len(frames)}")
+
+    gaussians = state.quality_tiers.get(metadata.get('quality'))
+
+    # Render all views back-to-back with the model kept resident
+    state.pool.next_frame()
+    start_time = time.perf_counter()
+    views = []
+    for i, pose in enumerate(poses):
+        camera = create_camera_from_request(state.cameras, pose)
+        tag = f"view_{i}"
+        if layer:
+            views.append(render_layer(state.pool, gaussians, state.pipeline, state.background, camera, tag))
+            continue
+        bg_rgb, bg_depth = decode_background(state.pool, camera.image_height, camera.image_width, frames[1 + 2 * i], frames[2 + 2 * i], encoding, f"{tag}/bg")
+        views.append(render_view(state.pool, gaussians, state.pipeline, state.background, camera, bg_rgb, bg_depth, tag))
+    render_time = time.perf_counter() - start_time
+
+    state.num_frames += 1
+    if state.num_frames == state.warmup_frames:
+        state.pool.mark_warm()
+    elif state.num_frames > state.warmup_frames and state.pool.allocations_after_warm_up > 0 and state.num_frames % 100 == 0:
+        print(f"Warning: {state.pool.allocations_after_warm_up} buffer allocations after warm-up: {state.pool.stats()}")
+
+    quality = metadata.get('quality')
+    if 'views' in metadata:
+        metadata = {
+            'views': [{'shape': view[0].shape} for view in views],
+            'render_time': render_time,
+        }
+    else:
+        metadata = {'shape': views[0][0].shape}
+    if quality is not None:
+        metadata['num_splats'] = gaussians.get_xyz.shape[0]
+    return metadata, views
+
+def query_request(state, metadata, frames):
+    """
+    Cast the rays of a query request, and return the response metadata and a list with a single tuple of
+    the depth, opacity (and color) of each ray. See `encode_ray_query` in `protocol.py` for the format.
+    """
+    num_rays = metadata['num_rays']
+    if len(frames) != 3:
+        raise ValueError(f"Expected 3 frames for a ray query, got {len(frames)}")
+    # The ray count varies between queries, so don't use the buffer pool of the render loop
+    origins, directions = (
+        torch.from_numpy(decode_image(data, 'raw', (num_rays, 3), np.float32).copy()).cuda()
+        for data in frames[1:]
+    )
+
+    response_metadata = {'num_rays': num_rays}
+    if state.raycaster is None:
+        # Renderers that never receive ray queries don't pay for the index at startup, neither in time nor in memory
+        start_time = time.perf_counter()
+        state.raycaster = GaussianRaycaster(state.gaussians)
+        response_metadata['index_time'] = time.perf_counter() - start_time
+        print(f"Built the ray query index in {response_metadata['index_time']:.2f} s: {state.raycaster.stats()}")
+
+    start_time = time.perf_counter()
+    results = state.raycaster.query(
+        origins, directions, max_distance=metadata.get('max_distance', 10.0), color=metadata.get('color', False))
+    results = tuple(result.cpu().numpy() for result in results if result is not None)
+    response_metadata['query_time'] = time.perf_counter() - start_time
+    return response_metadata, [results]
+
+def encode_response(metadata, views, encoding):
+    # Send metadata first, followed by the compressed render image and inverse depth image of each view
+    # (or the compressed render image, alpha image and inverse depth image for layer requests)
+    return [json.dumps(metadata).encode()] + encode_views(views, encoding)
+
+def handle_render_request(state, metadata, frames):
+    """Render all views of a request, and return the response frames."""
+    response_metadata, views = render_request(state, metadata, frames)
+    return encode_response(response_metadata, views, metadata.get('encoding', 'tiff'))
+
+def warm_up(state, num_renders, width=1280, height=720):
+    """
+    Render a few frames before serving requests, so that the first request doesn't pay for CUDA context
+    initialization, kernel loading and buffer allocations.
+    """
+    metadata = {'position': [0, 0, 0], 'rotation': [0, 0, 0], 'encoding': 'raw'}
+    frames = [
+        json.dumps(metadata).encode(),
+        np.zeros((height, width, 3), dtype=np.uint8),
+        np.full((height, width), float('inf'), dtype=np.float32),
+    ]
+    for _ in range(num_renders):
+        handle_render_request(state, metadata, frames)
+    torch.cuda.synchronize()
@@ -0,0 +1,179 @@
+"""
+Replay a log recorded by `recorder.py` against a renderer, and compare the outputs and the per-frame
+latency against the recording.
+
+Example:
+
+    python /src/replay.py --log-dir /tmp/omni-3dgs-extension/logs/session --fast
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import zmq
+
+from image_metrics import latency_summary, max_abs_diff, psnr
+from protocol import decode_ray_query_response, decode_response, wait_until_ready
+from request_log import read_request_pairs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket-url', type=str,
+                        default="ipc:///tmp/omni-3dgs-extension/vanillags_renderer",
+                        help="ZMQ socket URL to connect to")
+    parser.add_argument('--log-dir', type=str, required=True, help="Directory of the recorded log")
+    parser.add_argument('--fast', action='store_true',
+                        help="Send requests as fast as possible instead of at the original timing")
+    parser.add_argument('--deadlines', type=str, choices=['rebase', 'strip', 'keep'], default='rebase',
+                        help="Shift the `sent_at` and `deadline` of the recorded requests to the replay time, "
+                             "remove them along with `max_age`, or keep them as recorded (see `admission.py`)")
+    parser.add_argument('--min-psnr', type=float, default=40.0,
+                        help="Frames with a lower RGB PSNR than this are reported as mismatches")
+    parser.add_argument('--max-ray-diff', type=float, default=1e-3,
+                        help="Ray queries with a larger difference of the depth, opacity or color of any ray "
+                             "than this are reported as mismatches")
+    parser.add_argument('--report', type=str, default=None, help="Path to write a JSON report to")
+    args = parser.parse_args()
+    return args
+
+def rebase_deadlines(frames, now):
+    """
+    Shift the `sent_at` and `deadline` of a recorded request to `now`, keeping its time budget, since the
+    recorded times have long passed. Absolute deadlines without a `sent_at` cannot be shifted and are removed.
+    """
+    metadata = json.loads(bytes(frames[0]))
+    if 'sent_at' not in metadata and 'deadline' not in metadata:
+        return frames
+    if 'sent_at' in metadata:
+        if 'deadline' in metadata:
+            metadata['deadline'] += now - metadata['sent_at']
+        metadata['sent_at'] = now
+    else:
+        del metadata['deadline']
+    return [json.dumps(metadata).encode()] + list(frames[1:])
+
+def strip_deadlines(frames):
+    """Remove the `sent_at`, `deadline` and `max_age` of a recorded request, so that it is always admitted."""
+    metadata = json.loads(bytes(frames[0]))
+    if not {'sent_at', 'deadline', 'max_age'} & metadata.keys():
+        return frames
+    for key in ('sent_at', 'deadline', 'max_age'):
+        metadata.pop(key, None)
+    return [json.dumps(metadata).encode()] + list(frames[1:])
+
+def compare_views(recorded_views, replayed_views):
+    """Return the minimum RGB PSNR and the maximum difference of the other images over all views."""
+    if len(recorded_views) != len(replayed_views):
+        return -float('inf'), float('inf')
+    min_psnr, max_diff = float('inf'), 0.0
+    for recorded, replayed in zip(recorded_views, replayed_views):
+        if recorded[0].shape != replayed[0].shape:
+            return -float('inf'), float('inf')
+        min_psnr = min(min_psnr, psnr(replayed[0], recorded[0]))
+        for recorded_image, replayed_image in zip(recorded[1:], replayed[1:]):
+            max_diff = max(max_diff, max_abs_diff(replayed_image, recorded_image))
+    return min_psnr, max_diff
+
+def compare_rays(recorded_rays, replayed_rays):
+    """Return the maximum difference of the (depth, opacity, color) of the rays of two ray query responses."""
+    max_diff = 0.0
+    for recorded, replayed in zip(recorded_rays, replayed_rays):
+        if recorded is None and replayed is None:
+            continue
+        if recorded is None or replayed is None or recorded.shape != replayed.shape:
+            return float('inf')
+        # Rays that hit nothing have an infinite depth in both responses
+        max_diff = max(max_diff, max_abs_diff(replayed, recorded))
+    return max_diff
+
+def main(args):
+    context = zmq.Context()
+    # Don't measure the startup of the renderer
+    wait_until_ready(context, args.socket_url)
+    socket = context.socket(zmq.REQ)
+    socket.connect(args.socket_url)
+
+    recorded_latencies = []
+    replayed_latencies = []
+    psnrs = []
+    max_diffs = []
+    ray_diffs = []
+    mismatches = []
+    start_time = None
+    first_timestamp_ns = None
+    for i, (request, response) in enumerate(read_request_pairs(args.log_dir)):
+        if start_time is None:
+            start_time = time.perf_counter()
+            first_timestamp_ns = request.timestamp_ns
+        if not args.fast:
+            # Wait until the original time offset of the request
+            delay = start_time + (request.timestamp_ns - first_timestamp_ns) / 1e9 - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        frames = request.frames
+        if args.deadlines == 'rebase':
+            frames = rebase_deadlines(frames, time.time())
+        elif args.deadlines == 'strip':
+            frames = strip_deadlines(frames)
+        request_time = time.perf_counter()
+        socket.send_multipart(frames)
+        reply = socket.recv_multipart()
+        replayed_latencies.append(time.perf_counter() - request_time)
+        recorded_latencies.append((response.timestamp_ns - request.timestamp_ns) / 1e9)
+
+        request_metadata = json.loads(bytes(request.frames[0]))
+        if request_metadata.get('type') == 'query':
+            # Ray queries return the depth, opacity and color of each ray instead of images
+            recorded_metadata, *recorded_rays = decode_ray_query_response(response.frames)
+            replayed_metadata, *replayed_rays = decode_ray_query_response(reply)
+            if ('error' in recorded_metadata) != ('error' in replayed_metadata):
+                mismatches.append(i)
+                continue
+            if recorded_rays[0] is None and replayed_rays[0] is None:
+                continue
+            ray_diff = compare_rays(recorded_rays, replayed_rays)
+            ray_diffs.append(ray_diff)
+            if ray_diff > args.max_ray_diff:
+                mismatches.append(i)
+            continue
+        recorded_metadata, recorded_views = decode_response(request_metadata, response.frames)
+        replayed_metadata, replayed_views = decode_response(request_metadata, reply)
+        if ('error' in recorded_metadata) != ('error' in replayed_metadata):
+            mismatches.append(i)
+            continue
+        if not recorded_views:
+            continue
+        frame_psnr, frame_max_diff = compare_views(recorded_views, replayed_views)
+        psnrs.append(frame_psnr)
+        max_diffs.append(frame_max_diff)
+        if frame_psnr < args.min_psnr:
+            mismatches.append(i)
+
+    finite_psnrs = [value for value in psnrs if np.isfinite(value)]
+    report = {
+        'frames': len(replayed_latencies),
+        'mode': 'fast' if args.fast else 'original',
+        'recorded_latency': latency_summary(recorded_latencies),
+        'replayed_latency': latency_summary(replayed_latencies),
+        'identical_frames': sum(1 for value in psnrs if value == float('inf')),
+        'min_psnr': min(finite_psnrs) if finite_psnrs else None,
+        'mean_psnr': float(np.mean(finite_psnrs)) if finite_psnrs else None,
+        'max_depth_diff': max(max_diffs) if max_diffs else None,
+        'ray_queries': len(ray_diffs),
+        'max_ray_diff': max(ray_diffs) if ray_diffs else None,
+        'mismatched_frames': mismatches,
+        'replayed_latencies_ms': [latency * 1000 for latency in replayed_latencies],
+    }
+    print(json.dumps({key: value for key, value in report.items() if key != 'replayed_latencies_ms'}, indent=2))
+    if args.report is not None:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    socket.close()
+    context.term()
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,137 @@
+"""
+Compact, chunked log of the multipart messages exchanged with the renderer.
+
+A log is a directory of chunk files (`chunk_000000.log`, `chunk_000001.log`, ...). Each chunk is a sequence
+of records, and each record stores a single multipart message:
+
+    header: magic (4 bytes), kind (uint8), flags (uint8), sequence (uint64), timestamp in ns (int64),
+            number of frames (uint32)
+    frame lengths: one uint64 per frame
+    frame data: the (optionally zlib-compressed) frames, back-to-back
+
+Requests and responses with the same sequence number belong together. Chunks are read through memory maps,
+so replaying a log does not load it into memory as a whole.
+
+Each record is flushed once written, so that the log survives the recorder being killed. A record that was
+only partially written, e.g., when the recorder was killed while writing it, is skipped when reading.
+"""
+
+import json
+import mmap
+import os
+import struct
+import zlib
+from collections import namedtuple
+
+MAGIC = b'GSRL'
+HEADER = struct.Struct('<4sBBQqI')
+LENGTH = struct.Struct('<Q')
+
+KIND_REQUEST = 0
+KIND_RESPONSE = 1
+
+FLAG_COMPRESSED = 1
+
+Record = namedtuple('Record', ['kind', 'sequence', 'timestamp_ns', 'frames'])
+
+
+class RequestLogWriter:
+    def __init__(self, log_dir, chunk_size=256 * 1024 * 1024, compress=False):
+        self.log_dir = log_dir
+        self.chunk_size = chunk_size
+        self.compress = compress
+        os.makedirs(log_dir, exist_ok=True)
+        self._chunk_index = len([name for name in os.listdir(log_dir) if name.endswith('.log')])
+        self._file = None
+        self._open_chunk()
+
+    def _open_chunk(self):
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.log_dir, f"chunk_{self._chunk_index:06d}.log")
+        self._file = open(path, 'ab')
+        self._chunk_index += 1
+
+    def append(self, kind, sequence, timestamp_ns, frames):
+        flags = 0
+        if self.compress:
+            frames = [zlib.compress(frame, 1) for frame in frames]
+            flags |= FLAG_COMPRESSED
+        # Start a new chunk if the current one is full, but never split a record across chunks
+        if self._file.tell() > 0 and self._file.tell() + sum(len(frame) for frame in frames) > self.chunk_size:
+            self._open_chunk()
+        self._file.write(HEADER.pack(MAGIC, kind, flags, sequence, timestamp_ns, len(frames)))
+        for frame in frames:
+            self._file.write(LENGTH.pack(len(frame)))
+        for frame in frames:
+            self._file.write(frame)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _skip_truncated_record(chunk_name, offset):
+    print(f"Skipping the truncated record at the end of {chunk_name} at offset {offset}, e.g., from an interrupted recording")
+
+
+def read_request_log(log_dir):
+    """Iterate over the records of a log in order. The frames are memoryviews into the memory-mapped chunks."""
+    chunk_names = sorted(name for name in os.listdir(log_dir) if name.endswith('.log'))
+    for chunk_name in chunk_names:
+        with open(os.path.join(log_dir, chunk_name), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                continue
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        offset = 0
+        while offset < len(data):
+            record_offset = offset
+            if offset + HEADER.size > len(data):
+                _skip_truncated_record(chunk_name, record_offset)
+                break
+            magic, kind, flags, sequence, timestamp_ns, num_frames = HEADER.unpack_from(data, offset)
+            if magic != MAGIC:
+                raise ValueError(f"Corrupted record in {chunk_name} at offset {offset}")
+            offset += HEADER.size
+            if offset + num_frames * LENGTH.size > len(data):
+                _skip_truncated_record(chunk_name, record_offset)
+                break
+            lengths = [LENGTH.unpack_from(data, offset + i * LENGTH.size)[0] for i in range(num_frames)]
+            offset += num_frames * LENGTH.size
+            if offset + sum(lengths) > len(data):
+                _skip_truncated_record(chunk_name, record_offset)
+                break
+            frames = []
+            for length in lengths:
+                frame = data[offset:offset + length]
+                if flags & FLAG_COMPRESSED:
+                    frame = zlib.decompress(frame)
+                frames.append(frame)
+                offset += length
+            yield Record(kind, sequence, timestamp_ns, frames)
+
+
+def read_request_pairs(log_dir):
+    """Iterate over (request, response) record pairs. Requests without a recorded response are skipped."""
+    requests = {}
+    for record in read_request_log(log_dir):
+        if record.kind == KIND_REQUEST:
+            requests[record.sequence] = record
+        elif record.sequence in requests:
+            yield requests.pop(record.sequence), record
+
+
+def read_camera_poses(log_dir):
+    """
+    Return the camera poses of the recorded requests in order, as (position, rotation) pairs, e.g., to
+    benchmark with a recorded camera path. Tiles and requests without poses are skipped.
+    """
+    poses = []
+    for record in read_request_log(log_dir):
+        if record.kind != KIND_REQUEST:
+            continue
+        metadata = json.loads(bytes(record.frames[0]))
+        for pose in metadata.get('views', [metadata]):
+            if 'position' in pose and 'tile' not in pose:
+                poses.append((pose['position'], pose['rotation']))
+    return poses
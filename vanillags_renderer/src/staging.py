@@ -0,0 +1,50 @@
+"""
+Transfers of the request and response images between the host and the GPU through the buffer pool.
+
+The background images of a request are decoded into pooled pinned host buffers and uploaded to pooled CUDA
+tensors, and the rendered images are converted and downloaded into pooled buffers in the same way, so that
+the render loop doesn't allocate new buffers every frame (see `buffer_pool.py`). This module doesn't depend
+on the gaussian-splatting modules, so that it can be tested on its own, and on the CPU with `device="cpu"`,
+in which case the host buffers are not pinned.
+"""
+
+import numpy as np
+import torch
+
+from protocol import decode_image
+
+
+def decode_background(pool, height, width, bg_rgb_data, bg_depth_data, encoding, tag, device="cuda"):
+    """Decode the background RGB and depth frames of a request into pooled CUDA tensors."""
+    pin_memory = torch.device(device).type == "cuda"
+    bg_rgb_np = decode_image(bg_rgb_data, encoding, (height, width, 3), np.uint8)  # HWC
+    bg_depth_np = decode_image(bg_depth_data, encoding, (height, width), np.float32)
+    # Stage in pinned host memory, then upload to the GPU
+    bg_rgb_host = pool.get((height, width, 3), torch.uint8, pin_memory=pin_memory, tag=tag)
+    bg_depth_host = pool.get((height, width), torch.float32, pin_memory=pin_memory, tag=tag)
+    np.copyto(bg_rgb_host.numpy(), bg_rgb_np)
+    np.copyto(bg_depth_host.numpy(), bg_depth_np)
+    bg_rgb_u8 = pool.get((height, width, 3), torch.uint8, device, tag=tag)
+    bg_rgb = pool.get((3, height, width), torch.float32, device, tag=tag)
+    bg_depth = pool.get((height, width), torch.float32, device, tag=tag)
+    bg_rgb_u8.copy_(bg_rgb_host, non_blocking=True)
+    bg_depth.copy_(bg_depth_host, non_blocking=True)
+    torch.div(bg_rgb_u8.permute(2, 0, 1), 255, out=bg_rgb)  # Convert HWC to CHW
+    return bg_rgb, bg_depth
+
+
+def download(pool, tensor, tag):
+    """Copy a CUDA tensor into a pooled pinned host buffer, and return it as a NumPy array."""
+    host = pool.get(tensor.shape, tensor.dtype, pin_memory=tensor.is_cuda, tag=tag)
+    host.copy_(tensor)
+    return host.numpy()
+
+
+def download_image(pool, image, tag):
+    """Convert a (3, H, W) float CUDA image in [0, 1] to (H, W, 3) uint8, and download it as a NumPy array."""
+    height, width = image.shape[1:]
+    scaled = pool.get((height, width, 3), torch.float32, image.device, tag=tag)
+    torch.mul(image.permute(1, 2, 0), 255, out=scaled)  # Convert CHW to HWC
+    image_u8 = pool.get((height, width, 3), torch.uint8, image.device, tag=tag)
+    image_u8.copy_(scaled)  # Truncates, same as `.to(torch.uint8)`
+    return download(pool, image_u8, tag)
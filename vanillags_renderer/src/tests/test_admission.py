@@ -0,0 +1,77 @@
+import unittest
+
+from admission import AdmissionController
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdmissionController(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.controller = AdmissionController(max_queue_depth=2, clock=self.clock)
+
+    def test_pop_in_admission_order(self):
+        for identity in (b'a', b'b'):
+            self.assertIsNone(self.controller.admit(identity, [], {}))
+        self.assertEqual([self.controller.pop()[0].identity for _ in range(2)], [b'a', b'b'])
+
+    def test_full_queue_is_overloaded(self):
+        self.controller.admit(b'a', [], {})
+        self.controller.admit(b'b', [], {})
+        response = self.controller.admit(b'c', [], {})
+        self.assertEqual(response['status'], 'overloaded')
+        self.assertEqual(response['queue_depth'], 2)
+        self.assertEqual(self.controller.stats()['rejected'], 1)
+
+    def test_expired_on_arrival(self):
+        self.controller.admit(b'a', [], {})
+        self.controller.admit(b'b', [], {})
+        # Expired requests are reported as expired even if the queue is also full
+        for metadata in ({'deadline': self.clock.now - 0.1}, {'sent_at': self.clock.now - 1.0, 'max_age': 0.5}):
+            response = self.controller.admit(b'c', [], metadata)
+            self.assertEqual(response['status'], 'expired')
+            self.assertEqual(response['retry_after'], 0)
+        self.assertEqual(self.controller.stats()['expired'], 2)
+        self.assertEqual(self.controller.stats()['rejected'], 0)
+
+    def test_unreachable_deadline_is_overloaded(self):
+        self.controller.record_render_time(0.1)
+        self.controller.admit(b'a', [], {})
+        # Finishes after the request ahead, at now + 0.2
+        self.assertEqual(self.controller.admit(b'b', [], {'deadline': self.clock.now + 0.15})['status'], 'overloaded')
+        self.assertIsNone(self.controller.admit(b'b', [], {'deadline': self.clock.now + 0.25}))
+
+    def test_expired_while_queued(self):
+        self.controller.record_render_time(0.1)
+        self.controller.admit(b'a', [], {'sent_at': self.clock.now, 'max_age': 0.5})
+        self.controller.admit(b'b', [], {'deadline': self.clock.now + 1.0})
+        self.clock.now += 0.45
+        request, response = self.controller.pop()
+        self.assertEqual(request.identity, b'a')
+        self.assertEqual(response['status'], 'expired')
+        request, response = self.controller.pop()
+        self.assertEqual(request.identity, b'b')
+        self.assertIsNone(response)
+
+    def test_deadline_is_earliest_of_deadline_and_max_age(self):
+        metadata = {'deadline': 1001.0, 'sent_at': 1000.0, 'max_age': 0.5}
+        self.assertEqual(self.controller.get_deadline(metadata, 1000.2), 1000.5)
+        self.assertEqual(self.controller.get_deadline({'max_age': 0.5}, 1000.2), 1000.7)
+        self.assertIsNone(self.controller.get_deadline({}, 1000.2))
+
+    def test_render_time_moving_average(self):
+        controller = AdmissionController(smoothing=0.5, clock=self.clock)
+        controller.record_render_time(0.1)
+        controller.record_render_time(0.2)
+        self.assertAlmostEqual(controller.render_time, 0.15)
+        self.assertEqual(controller.stats()['served'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import ast
+import os
+import unittest
+
+import numpy as np
+import torch
+
+import buffer_pool
+from buffer_pool import BufferPool
+from protocol import encode_views
+from staging import decode_background, download, download_image
+
+EXTENSION_BUFFER_POOL = os.path.join(
+    os.path.dirname(__file__), '..', '..', '..',
+    'extension', 'exts', 'omni.gsplat.viewport', 'omni', 'gsplat', 'viewport', 'buffer_pool.py')
+
+
+def without_docstring(path):
+    """Return the code of a module without its docstring."""
+    with open(path) as f:
+        module = ast.parse(f.read())
+    module.body = module.body[1:] if ast.get_docstring(module) is not None else module.body
+    return ast.unparse(module)
+
+
+class TestBufferPool(unittest.TestCase):
+    def test_buffers_are_reused(self):
+        pool = BufferPool()
+        buffer = pool.get((72, 128), torch.float32, tag="view_0")
+        self.assertIs(pool.get((72, 128), torch.float32, tag="view_0"), buffer)
+        self.assertIsNot(pool.get((72, 128), torch.float32, tag="view_1"), buffer)
+        self.assertEqual(pool.stats()['hits'], 1)
+
+    def test_idle_buffers_are_freed(self):
+        pool = BufferPool(max_idle_frames=2)
+        used = pool.get((1,), torch.float32, tag="used")
+        pool.get((2,), torch.float32, tag="idle")
+        for _ in range(3):
+            pool.next_frame()
+            self.assertIs(pool.get((1,), torch.float32, tag="used"), used)
+        self.assertEqual(pool.stats()['buffers'], 1)
+        self.assertEqual(pool.stats()['allocated_bytes'], 4)
+
+    def test_buffers_are_kept_however_many_are_used_per_frame(self):
+        pool = BufferPool(max_idle_frames=1)
+        for _ in range(3):
+            pool.next_frame()
+            for i in range(1000):
+                pool.get((1,), torch.float32, tag=f"view_{i}")
+        self.assertEqual(pool.allocations, 1000)
+
+    @unittest.skipUnless(os.path.exists(EXTENSION_BUFFER_POOL), "The extension is not mounted in the renderer container")
+    def test_same_as_extension(self):
+        self.assertEqual(without_docstring(buffer_pool.__file__), without_docstring(EXTENSION_BUFFER_POOL))
+
+
+class TestStaging(unittest.TestCase):
+    height, width = 72, 128
+    # On the CPU, unless CUDA is available
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _request_frames(self, rng, encoding):
+        bg_rgb = rng.integers(0, 256, (self.height, self.width, 3), dtype=np.uint8)
+        bg_depth = rng.uniform(1, 10, (self.height, self.width)).astype(np.float32)
+        return bg_rgb, bg_depth, encode_views([(bg_rgb, bg_depth)], encoding)
+
+    def _render_frame(self, pool, rng, num_views=1, encoding='raw'):
+        """Go through the same staging as `render_request`, with the background standing in for the render."""
+        pool.next_frame()
+        for i in range(num_views):
+            bg_rgb, bg_depth, frames = self._request_frames(rng, encoding)
+            rgb, depth = decode_background(pool, self.height, self.width, *frames, encoding, f"view_{i}/bg", self.device)
+            np.testing.assert_allclose(rgb.permute(1, 2, 0).cpu().numpy() * 255, bg_rgb, atol=1e-3)
+            np.testing.assert_array_equal(depth.cpu().numpy(), bg_depth)
+            render_np = download_image(pool, rgb, f"view_{i}")
+            inv_depth_np = download(pool, 1 / depth, f"view_{i}")
+            np.testing.assert_array_equal(render_np, (rgb.permute(1, 2, 0) * 255).to(torch.uint8).cpu().numpy())
+            np.testing.assert_allclose(inv_depth_np, 1 / bg_depth, rtol=1e-6)
+
+    def _buffers_per_view(self):
+        # 5 buffers to stage the background and 4 to download the render on CUDA, fewer on the CPU, where the
+        # host and device buffers are the same
+        pool = BufferPool()
+        self._render_frame(pool, np.random.default_rng(0))
+        return pool.allocations
+
+    def test_no_allocations_after_warm_up(self):
+        # More than the viewport and up to 8 robot cameras, since fewer buffers are used per view on the CPU
+        num_views = 16
+        pool = BufferPool()
+        rng = np.random.default_rng(0)
+        self._render_frame(pool, rng, num_views)
+        pool.mark_warm()
+        for _ in range(10):
+            self._render_frame(pool, rng, num_views)
+        self.assertEqual(pool.allocations_after_warm_up, 0)
+        self.assertEqual(pool.allocations, self._buffers_per_view() * num_views)
+
+    def test_buffers_of_removed_views_are_freed(self):
+        pool = BufferPool(max_idle_frames=2)
+        rng = np.random.default_rng(1)
+        self._render_frame(pool, rng, num_views=8)
+        for _ in range(3):
+            self._render_frame(pool, rng, num_views=2)
+        self.assertEqual(pool.stats()['buffers'], self._buffers_per_view() * 2)
+
+    def test_tiff_background(self):
+        self._render_frame(BufferPool(), np.random.default_rng(2), encoding='tiff')
+
+
+if __name__ == "__main__":
+    unittest.main()
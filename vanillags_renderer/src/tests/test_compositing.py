@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from compositing import composite_layers, layer_depth
+
+SHAPE = (4, 5)
+
+
+def constant_layer(color, alpha, depth):
+    """A layer with the same premultiplied color, alpha and depth at every pixel."""
+    rgb = np.broadcast_to(np.asarray(color, dtype=np.float32) * alpha, (*SHAPE, 3))
+    return rgb, np.full(SHAPE, alpha, dtype=np.float32), np.full(SHAPE, alpha / depth, dtype=np.float32)
+
+
+def composite(layers, bg_color=(0, 1, 0), bg_depth=np.inf):
+    rgbs, alphas, inv_depths = (np.stack(images) for images in zip(*layers))
+    bg_rgb = np.broadcast_to(np.asarray(bg_color, dtype=np.float32), (*SHAPE, 3))
+    return composite_layers(rgbs, alphas, inv_depths, bg_rgb, np.full(SHAPE, bg_depth, dtype=np.float32))
+
+
+class TestCompositeLayers(unittest.TestCase):
+    def test_layer_depth(self):
+        alpha = np.array([0.5, 0.0, 0.5], dtype=np.float32)
+        inv_depth = np.array([0.25, 0.0, 0.0], dtype=np.float32)
+        np.testing.assert_array_equal(layer_depth(alpha, inv_depth), [2.0, np.inf, np.inf])
+
+    def test_single_layer_over_background(self):
+        rgb, inv_depth = composite([constant_layer((1, 0, 0), 0.25, 2.0)])
+        np.testing.assert_allclose(rgb, np.broadcast_to([0.25, 0.75, 0], (*SHAPE, 3)), rtol=1e-6)
+        np.testing.assert_allclose(inv_depth, 0.25 / 2.0)
+
+    def test_front_layer_occludes_regardless_of_order(self):
+        front = constant_layer((1, 0, 0), 0.5, 1.0)
+        back = constant_layer((0, 0, 1), 1.0, 3.0)
+        expected_rgb = np.broadcast_to([0.5, 0, 0.5], (*SHAPE, 3))
+        expected_inv_depth = 0.5 / 1.0 + 0.5 * (1.0 / 3.0)
+        for layers in ([front, back], [back, front]):
+            rgb, inv_depth = composite(layers)
+            np.testing.assert_allclose(rgb, expected_rgb, rtol=1e-6)
+            np.testing.assert_allclose(inv_depth, expected_inv_depth, rtol=1e-6)
+
+    def test_per_pixel_order(self):
+        # Layer A is in front on the left half, and layer B on the right half
+        depth_a = np.where(np.arange(SHAPE[1]) < 2, 1.0, 3.0) * np.ones(SHAPE)
+        layer_a = (np.broadcast_to(np.float32([1, 0, 0]), (*SHAPE, 3)), np.ones(SHAPE, np.float32), (1 / depth_a).astype(np.float32))
+        layer_b = constant_layer((0, 0, 1), 1.0, 2.0)
+        rgb, _ = composite([layer_a, layer_b])
+        self.assertTrue((rgb[:, :2] == [1, 0, 0]).all())
+        self.assertTrue((rgb[:, 2:] == [0, 0, 1]).all())
+
+    def test_background_occludes_layers_behind_it(self):
+        rgb, inv_depth = composite([constant_layer((1, 0, 0), 1.0, 2.0), constant_layer((0, 0, 1), 0.5, 0.5)], bg_depth=1.0)
+        # Only the layer in front of the background is blended over it
+        np.testing.assert_allclose(rgb, np.broadcast_to([0, 0.5, 0.5], (*SHAPE, 3)), rtol=1e-6)
+        np.testing.assert_allclose(inv_depth, 0.5 / 0.5, rtol=1e-6)
+
+    def test_empty_layers_show_background(self):
+        rgb, inv_depth = composite([constant_layer((1, 0, 0), 0.0, 1.0)] * 2, bg_color=(0.2, 0.4, 0.6))
+        np.testing.assert_allclose(rgb, np.broadcast_to([0.2, 0.4, 0.6], (*SHAPE, 3)), rtol=1e-6)
+        np.testing.assert_array_equal(inv_depth, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
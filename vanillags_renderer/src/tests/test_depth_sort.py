@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+
+from depth_sort import IncrementalDepthSorter, is_sorted, view_depths
+
+
+def orbit(num_frames, step=np.radians(1)):
+    """Camera poses orbiting the origin on a small circle, looking around slowly."""
+    for i in range(num_frames):
+        angle = step * i
+        yield np.array([0.5 * np.cos(angle), 0.0, 0.5 * np.sin(angle)]), np.array([0.0, angle, 0.0])
+
+
+class TestIncrementalDepthSorter(unittest.TestCase):
+    def setUp(self):
+        self.xyz = np.random.default_rng(0).normal(size=(5000, 3))
+
+    def _assert_sorted(self, order, position, euler_angles):
+        np.testing.assert_array_equal(np.sort(order), np.arange(len(self.xyz)))
+        self.assertTrue(is_sorted(view_depths(self.xyz, position, euler_angles)[order]))
+
+    def test_view_depths(self):
+        xyz = np.array([[0, 0, -2], [0, 0, 1], [3, 0, 0]])
+        np.testing.assert_allclose(view_depths(xyz, np.zeros(3), np.zeros(3)), [2, -1, 0])
+        # Turned by 90 degrees around Y, so the camera looks along -X
+        np.testing.assert_allclose(view_depths(xyz, np.zeros(3), [0, np.pi / 2, 0]), [0, 0, -3], atol=1e-12)
+
+    def test_small_pose_changes_stay_sorted(self):
+        for method in ('timsort', 'passes'):
+            sorter = IncrementalDepthSorter(method=method)
+            for position, euler_angles in orbit(20):
+                self._assert_sorted(sorter.sort(self.xyz, position, euler_angles), position, euler_angles)
+            self.assertEqual(sorter.stats()['full_sorts'], 1)
+            self.assertEqual(sorter.stats()['incremental_sorts'], 19)
+
+    def test_large_pose_changes_sort_from_scratch(self):
+        sorter = IncrementalDepthSorter()
+        poses = [(np.zeros(3), np.zeros(3)), (np.array([1.0, 0, 0]), np.zeros(3)), (np.array([1.0, 0, 0]), np.array([0, np.pi, 0]))]
+        for position, euler_angles in poses:
+            self._assert_sorted(sorter.sort(self.xyz, position, euler_angles), position, euler_angles)
+        self.assertEqual(sorter.stats()['full_sorts'], 3)
+        self.assertEqual(sorter.stats()['incremental_sorts'], 0)
+
+    def test_passes_fall_back_to_full_repair(self):
+        # A single pass cannot repair the order after a rotation just below the threshold
+        sorter = IncrementalDepthSorter(method='passes', max_passes=1)
+        for position, euler_angles in orbit(3, step=np.radians(4)):
+            self._assert_sorted(sorter.sort(self.xyz, position, euler_angles), position, euler_angles)
+        self.assertEqual(sorter.stats()['incremental_sorts'], 2)
+        self.assertGreater(sorter.stats()['fallbacks'], 0)
+
+    def test_new_point_count_sorts_from_scratch(self):
+        sorter = IncrementalDepthSorter()
+        sorter.sort(self.xyz, np.zeros(3), np.zeros(3))
+        self.xyz = self.xyz[:100]
+        self._assert_sorted(sorter.sort(self.xyz, np.zeros(3), np.zeros(3)), np.zeros(3), np.zeros(3))
+        self.assertEqual(sorter.stats()['full_sorts'], 2)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            IncrementalDepthSorter(method='bubble')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from partition import kd_partition
+
+
+class TestKdPartition(unittest.TestCase):
+    def test_every_gaussian_in_exactly_one_partition(self):
+        xyz = np.random.default_rng(0).normal(size=(1000, 3))
+        for num_partitions in (1, 2, 3, 4, 5, 8):
+            partitions = kd_partition(xyz, np.arange(len(xyz)), num_partitions)
+            self.assertEqual(len(partitions), num_partitions)
+            np.testing.assert_array_equal(np.sort(np.concatenate(partitions)), np.arange(len(xyz)))
+
+    def test_balanced_sizes(self):
+        xyz = np.random.default_rng(1).normal(size=(1001, 3))
+        for num_partitions in (2, 3, 4, 7):
+            sizes = [len(indices) for indices in kd_partition(xyz, np.arange(len(xyz)), num_partitions)]
+            self.assertLessEqual(max(sizes) - min(sizes), num_partitions)
+
+    def test_split_along_largest_extent(self):
+        rng = np.random.default_rng(2)
+        # Elongated along Y, so both splits of four partitions are along Y and the partitions are slabs
+        xyz = rng.uniform(-1, 1, size=(800, 3)) * [1, 10, 1]
+        partitions = kd_partition(xyz, np.arange(len(xyz)), 4)
+        partitions.sort(key=lambda indices: xyz[indices, 1].min())
+        for lower, upper in zip(partitions[:-1], partitions[1:]):
+            self.assertLessEqual(xyz[lower, 1].max(), xyz[upper, 1].min())
+
+    def test_subset_of_indices(self):
+        xyz = np.random.default_rng(3).normal(size=(100, 3))
+        indices = np.arange(0, 100, 3)
+        partitions = kd_partition(xyz, indices, 2)
+        np.testing.assert_array_equal(np.sort(np.concatenate(partitions)), indices)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from profiling import Profiler
+
+
+def render(num_splats=1000):
+    return sum(i * i for i in range(num_splats))
+
+
+def render_frame(profiler):
+    profiler.begin_frame()
+    render()
+    return profiler.end_frame()
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        stack = contextlib.ExitStack()
+        self.addCleanup(stack.close)
+        self.output_root = stack.enter_context(tempfile.TemporaryDirectory())
+        self.profiler = Profiler(self.output_root)
+        # Silence the progress messages
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+    def test_start_stop_summary(self):
+        status = self.profiler.handle({'type': 'profile', 'action': 'start', 'frames': 10})
+        self.assertTrue(status['profiling'])
+        self.assertEqual(status['max_frames'], 10)
+        self.assertTrue(status['output_dir'].startswith(self.output_root))
+        self.assertIn('error', self.profiler.handle({'action': 'start'}))
+        for _ in range(3):
+            self.assertIsNone(render_frame(self.profiler))
+        self.assertEqual(self.profiler.handle({'action': 'status'})['frames'], 3)
+
+        summary = self.profiler.handle({'action': 'stop'})
+        self.assertFalse(self.profiler.active)
+        self.assertEqual(summary['frames'], 3)
+        self.assertGreater(summary['duration'], 0)
+        self.assertTrue(any('(render)' in hot_spot['function'] for hot_spot in summary['python_hot_spots']))
+        with open(os.path.join(summary['output_dir'], 'summary.json')) as f:
+            self.assertEqual(json.load(f), summary)
+        for name in ['python.prof', 'python_top.txt']:
+            self.assertTrue(os.path.exists(os.path.join(summary['output_dir'], name)))
+        self.assertIn('error', self.profiler.handle({'action': 'stop'}))
+
+    def test_stops_after_max_frames(self):
+        self.profiler.handle({'action': 'start', 'frames': 2})
+        self.assertIsNone(render_frame(self.profiler))
+        summary = render_frame(self.profiler)
+        self.assertFalse(self.profiler.active)
+        self.assertEqual(summary['frames'], 2)
+        self.assertEqual(self.profiler.status()['frames'], 2)
+
+    def test_invalid_requests(self):
+        for metadata in [{'action': 'start', 'frames': 0}, {'action': 'start', 'frames': 1.5}, {'action': 'pause'},
+                         {'action': 'stop'}]:
+            with self.subTest(metadata=metadata):
+                self.assertIn('error', self.profiler.handle(metadata))
+                self.assertFalse(self.profiler.active)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import math
+import unittest
+
+import numpy as np
+import torch
+
+from projection import get_tile_projection_matrix
+
+
+def get_projection_matrix(znear, zfar, fovx, fovy):
+    """Reference copy of `getProjectionMatrix` in gaussian-splatting (`utils/graphics_utils.py`)."""
+    tan_half_fovy = math.tan(fovy / 2)
+    tan_half_fovx = math.tan(fovx / 2)
+    top = tan_half_fovy * znear
+    bottom = -top
+    right = tan_half_fovx * znear
+    left = -right
+    P = torch.zeros(4, 4)
+    z_sign = 1.0
+    P[0, 0] = 2.0 * znear / (right - left)
+    P[1, 1] = 2.0 * znear / (top - bottom)
+    P[0, 2] = (right + left) / (right - left)
+    P[1, 2] = (top + bottom) / (top - bottom)
+    P[3, 2] = z_sign
+    P[2, 2] = z_sign * zfar / (zfar - znear)
+    P[2, 3] = -(zfar * znear) / (zfar - znear)
+    return P
+
+
+def project_to_pixels(P, points, width, height):
+    """Project (N, 3) camera-space points to pixel coordinates, as `ndc2Pix` in the rasterizer."""
+    clip = torch.cat([points, torch.ones(len(points), 1, dtype=points.dtype)], dim=1) @ P.to(points.dtype).T
+    ndc = clip[:, :2] / clip[:, 3:]
+    x = ((ndc[:, 0] + 1) * width - 1) * 0.5
+    y = ((ndc[:, 1] + 1) * height - 1) * 0.5
+    return torch.stack([x, y], dim=1)
+
+
+def project_covariance(mean, covariance, focal, tan_half_fov):
+    """
+    Reference copy of `computeCov2D` in diff-gaussian-rasterization (`cuda_rasterizer/forward.cu`), returning
+    the (2, 2) covariance in pixels of a camera-space Gaussian, without the low-pass filter.
+    """
+    limit = 1.3 * tan_half_fov
+    x, y, z = mean.tolist()
+    x = min(max(x / z, -limit[0]), limit[0]) * z
+    y = min(max(y / z, -limit[1]), limit[1]) * z
+    J = torch.tensor([[focal[0] / z, 0, -focal[0] * x / z ** 2], [0, focal[1] / z, -focal[1] * y / z ** 2]],
+                     dtype=torch.float64)
+    return J @ covariance @ J.T
+
+
+class TestTileProjection(unittest.TestCase):
+    width, height = 1280, 720
+    fovx, fovy = np.radians(60), np.radians(35.98339777135764)
+    znear, zfar = 0.01, 100.0
+
+    def _points(self, seed=0, num_points=1000):
+        # Points in front of the camera, covering (and exceeding) the full view frustum
+        generator = torch.Generator().manual_seed(seed)
+        z = torch.rand(num_points, generator=generator, dtype=torch.float64) * 10 + 0.5
+        x = (torch.rand(num_points, generator=generator, dtype=torch.float64) * 2.4 - 1.2) * math.tan(self.fovx / 2) * z
+        y = (torch.rand(num_points, generator=generator, dtype=torch.float64) * 2.4 - 1.2) * math.tan(self.fovy / 2) * z
+        return torch.stack([x, y, z], dim=1)
+
+    def test_full_tile_matches_gaussian_splatting(self):
+        P = get_tile_projection_matrix(self.znear, self.zfar, self.fovx, self.fovy, self.width, self.height,
+                                       (0, 0, self.width, self.height))
+        expected = get_projection_matrix(self.znear, self.zfar, self.fovx, self.fovy)
+        torch.testing.assert_close(P, expected)
+
+    def test_tiles_match_crops_of_full_frame(self):
+        points = self._points()
+        full = project_to_pixels(get_projection_matrix(self.znear, self.zfar, self.fovx, self.fovy),
+                                 points, self.width, self.height)
+        for tile in [(0, 0, 1280, 240), (0, 240, 1280, 720), (640, 360, 1280, 720), (100, 50, 300, 700)]:
+            x0, y0, x1, y1 = tile
+            P = get_tile_projection_matrix(self.znear, self.zfar, self.fovx, self.fovy, self.width, self.height, tile)
+            pixels = project_to_pixels(P, points, x1 - x0, y1 - y0)
+            torch.testing.assert_close(pixels, full - torch.tensor([x0, y0], dtype=full.dtype), atol=1e-3, rtol=0)
+
+    def test_depth_is_unchanged(self):
+        full = get_projection_matrix(self.znear, self.zfar, self.fovx, self.fovy)
+        P = get_tile_projection_matrix(self.znear, self.zfar, self.fovx, self.fovy, self.width, self.height,
+                                       (0, 300, 1280, 600))
+        torch.testing.assert_close(P[2:], full[2:])
+
+    def test_band_distortion(self):
+        # Check the distortion documented in `get_tile_projection_matrix`
+        tan_half_fov = np.tan([self.fovx / 2, self.fovy / 2])
+        focal = (self.width / (2 * tan_half_fov[0]), self.height / (2 * tan_half_fov[1]))
+        # Splats at the top row, in the middle of the frame horizontally
+        mean = torch.tensor([0, -tan_half_fov[1] * 5, 5], dtype=torch.float64)
+        isotropic = torch.eye(3, dtype=torch.float64) * 0.01 ** 2
+        # Elongated along the view direction
+        elongated = torch.diag(torch.tensor([1e-8, 1e-8, 0.5 ** 2], dtype=torch.float64))
+        for num_bands, isotropic_scale, elongated_scale in [(1, 1.0, 1.0), (2, 0.972, 0.65), (3, 0.960, 0.433),
+                                                            (4, 0.956, 0.325), (8, 0.952, 0.163)]:
+            with self.subTest(num_bands=num_bands):
+                # The rasterizer gets the FoV of the band, see `create_camera_from_pose` in `renderer.py`
+                band_tan_half_fov = tan_half_fov / [1, num_bands]
+                for covariance, scale in [(isotropic, isotropic_scale), (elongated, elongated_scale)]:
+                    expected = project_covariance(mean, covariance, focal, tan_half_fov)
+                    band = project_covariance(mean, covariance, focal, band_tan_half_fov)
+                    self.assertAlmostEqual((band[1, 1] / expected[1, 1]).sqrt().item(), scale, places=3)
+                    torch.testing.assert_close(band[0, 0], expected[0, 0])
+                # The rows closer to the center than 1.3 / N of the half height are not distorted
+                row = mean * torch.tensor([1, 1.3 / num_bands * 0.999, 1], dtype=torch.float64)
+                torch.testing.assert_close(project_covariance(row, elongated, focal, band_tan_half_fov),
+                                           project_covariance(row, elongated, focal, tan_half_fov))
+
+
+if __name__ == "__main__":
+    unittest.main()
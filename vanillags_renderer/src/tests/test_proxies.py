@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import zmq
+
+import composite_proxy
+import tile_proxy
+from protocol import decode_response, decode_views, encode_views
+
+WIDTH, HEIGHT = 16, 8
+
+
+def serve(url, reply):
+    """Answer the requests on `url` in a background thread with `reply(metadata, frames)`, like a renderer."""
+    socket = zmq.Context.instance().socket(zmq.REP)
+    socket.bind(url)
+
+    def loop():
+        while True:
+            frames = socket.recv_multipart()
+            metadata = json.loads(frames[0])
+            response_metadata, views = reply(metadata, frames[1:])
+            socket.send_multipart([json.dumps(response_metadata).encode()] + encode_views(views, metadata.get('encoding', 'tiff')))
+
+    threading.Thread(target=loop, daemon=True).start()
+
+
+def start_proxy(module, url, renderer_urls):
+    args = argparse.Namespace(socket_url=url, renderer_urls=renderer_urls, width=WIDTH, height=HEIGHT,
+                              smoothing=0.2, timeout=5.0)
+    threading.Thread(target=module.main, args=(args,), daemon=True).start()
+
+
+class TestProxies(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.socket = zmq.Context.instance().socket(zmq.REQ)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.setsockopt(zmq.RCVTIMEO, 10000)
+        self.addCleanup(self.socket.close)
+        rng = np.random.default_rng(0)
+        self.bg_rgb = rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+        self.bg_depth = rng.uniform(1, 3, (HEIGHT, WIDTH)).astype(np.float32)
+
+    def _url(self, name):
+        return f"ipc://{os.path.join(self.directory.name, name)}"
+
+    def _request(self, metadata):
+        self.socket.send_multipart([json.dumps(metadata).encode()] + encode_views([(self.bg_rgb, self.bg_depth)], metadata['encoding']))
+        return decode_response(metadata, self.socket.recv_multipart())
+
+    def test_tile_proxy_round_trip(self):
+        def reply(metadata, frames):
+            _, y0, _, y1 = metadata['tile']
+            ((bg_rgb, bg_depth),) = decode_views(frames, encoding=metadata['encoding'], shape=(y1 - y0, WIDTH))
+            # Derive the band from the background, so that the stitched result can be checked
+            return {'shape': bg_rgb.shape}, [(255 - bg_rgb, 1 / bg_depth)]
+
+        renderer_urls = [self._url(f"renderer_{i}") for i in range(3)]
+        for url in renderer_urls:
+            serve(url, reply)
+        start_proxy(tile_proxy, self._url("proxy"), renderer_urls)
+        self.socket.connect(self._url("proxy"))
+        for encoding in ('raw', 'tiff'):
+            metadata, ((rgb, inv_depth),) = self._request({'position': [0, 0, 0], 'rotation': [0, 0, 0], 'encoding': encoding})
+            self.assertEqual(metadata['shape'], [HEIGHT, WIDTH, 3])
+            np.testing.assert_array_equal(rgb, 255 - self.bg_rgb)
+            np.testing.assert_array_equal(inv_depth, 1 / self.bg_depth)
+
+    def test_composite_proxy_round_trip(self):
+        def layer(color, depth, mask):
+            def reply(metadata, frames):
+                self.assertTrue(metadata['layer'])
+                self.assertEqual(frames, [])
+                rgb = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+                rgb[mask] = color
+                alpha = mask.astype(np.float32)
+                return {'shape': rgb.shape}, [(rgb, alpha, alpha / depth)]
+            return reply
+
+        left = np.zeros((HEIGHT, WIDTH), dtype=bool)
+        left[:, :WIDTH // 2] = True
+        renderer_urls = [self._url("renderer_0"), self._url("renderer_1")]
+        # The second partition is in front of the first one, but only covers the left half
+        serve(renderer_urls[0], layer([255, 0, 0], 2.0, np.ones((HEIGHT, WIDTH), dtype=bool)))
+        serve(renderer_urls[1], layer([0, 0, 255], 1.0, left))
+        start_proxy(composite_proxy, self._url("proxy"), renderer_urls)
+        self.socket.connect(self._url("proxy"))
+        # The top row of the background is in front of both partitions
+        self.bg_depth[:] = 3.0
+        self.bg_depth[0] = 0.5
+        for encoding in ('raw', 'tiff'):
+            metadata, ((rgb, inv_depth),) = self._request({'position': [0, 0, 0], 'rotation': [0, 0, 0], 'encoding': encoding})
+            self.assertEqual(metadata['shape'], [HEIGHT, WIDTH, 3])
+            np.testing.assert_array_equal(rgb[0], self.bg_rgb[0])
+            self.assertTrue((rgb[1:, :WIDTH // 2] == [0, 0, 255]).all())
+            self.assertTrue((rgb[1:, WIDTH // 2:] == [255, 0, 0]).all())
+            np.testing.assert_array_equal(inv_depth[0], 0)
+            np.testing.assert_allclose(inv_depth[1:, :WIDTH // 2], 1.0)
+            np.testing.assert_allclose(inv_depth[1:, WIDTH // 2:], 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import types
+import unittest
+
+import torch
+
+from quality import importance_scores, select_splats
+
+
+class TestImportanceScores(unittest.TestCase):
+    def test_opacity_times_largest_area(self):
+        gaussians = types.SimpleNamespace(
+            get_opacity=torch.tensor([[0.5], [1.0], [0.1]]),
+            get_scaling=torch.tensor([[1.0, 2.0, 0.01], [0.1, 0.1, 0.1], [3.0, 0.01, 4.0]]),
+        )
+        # The smallest axis is ignored, so that flat splats score by their visible area
+        torch.testing.assert_close(importance_scores(gaussians), torch.tensor([1.0, 0.01, 1.2]))
+
+
+class TestSelectSplats(unittest.TestCase):
+    def setUp(self):
+        self.scores = torch.tensor([0.3, 0.0, 0.9, 0.1, 0.5, 0.0, 0.7, 0.2, 0.0, 0.4])
+
+    def test_keep_fraction(self):
+        self.assertEqual(select_splats(self.scores, 0.3).tolist(), [2, 6, 4])
+        self.assertEqual(select_splats(self.scores, 0.0).tolist(), [])
+        # Ties are broken by the original order
+        self.assertEqual(select_splats(self.scores, 1.0).tolist(), [2, 6, 4, 9, 0, 7, 3, 1, 5, 8])
+
+    def test_min_score(self):
+        # Unseen splats are removed, even within the kept fraction
+        self.assertEqual(select_splats(self.scores, 1.0, min_score=0.0).tolist(), [2, 6, 4, 9, 0, 7, 3])
+        self.assertEqual(select_splats(self.scores, 0.5, min_score=0.35).tolist(), [2, 6, 4, 9])
+        self.assertEqual(select_splats(self.scores, 0.2, min_score=0.0).tolist(), [2, 6])
+
+
+if __name__ == "__main__":
+    unittest.main()
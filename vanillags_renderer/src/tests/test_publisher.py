@@ -0,0 +1,63 @@
+import importlib.util
+import os
+import unittest
+
+import numpy as np
+
+from publisher import PUBLISH_TIERS, decode_published_frame, encode_published_frame
+
+VIEWER_DECODER = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'pygame_viewer', 'published_frame.py')
+
+
+def rendered_views(num_views=2, shape=(8, 16)):
+    rng = np.random.default_rng(0)
+    return [
+        (rng.integers(0, 256, (*shape, 3), dtype=np.uint8), rng.uniform(0.1, 1, shape).astype(np.float32))
+        for _ in range(num_views)
+    ]
+
+
+class TestPublishedFrame(unittest.TestCase):
+    def _assert_views_equal(self, decoded, views):
+        self.assertEqual(len(decoded), len(views))
+        for decoded_view, view in zip(decoded, views):
+            self.assertEqual(len(decoded_view), len(view))
+            for decoded_image, image in zip(decoded_view, view):
+                self.assertEqual(decoded_image.dtype, image.dtype)
+                np.testing.assert_array_equal(decoded_image, image)
+
+    def test_round_trip(self):
+        metadata = {'stream': 'viewport', 'frame': 3}
+        for compression in {options['compression'] for options in PUBLISH_TIERS.values()}:
+            with self.subTest(compression=compression):
+                # Strided views, as published for the downscaled tiers
+                views = [tuple(image[::2, ::2] for image in view) for view in rendered_views()]
+                frame = encode_published_frame('viewport/half', metadata, views, compression)
+                topic, decoded_metadata, decoded = decode_published_frame(frame)
+                self.assertEqual(topic, 'viewport/half')
+                self.assertEqual(decoded_metadata, metadata)
+                self._assert_views_equal(decoded, views)
+
+    def test_topic_is_null_terminated(self):
+        frame = encode_published_frame('viewport/full', {}, rendered_views(1))
+        # Subscribers subscribe to the topic followed by a null byte, so that tiers don't match by prefix
+        self.assertTrue(frame.startswith(b'viewport/full\0'))
+
+    @unittest.skipUnless(os.path.exists(VIEWER_DECODER), "The PyGame viewer is not mounted in the renderer container")
+    def test_viewer_decodes_published_frames(self):
+        # The viewer runs in its own container, and has its own copy of the decoder
+        spec = importlib.util.spec_from_file_location('published_frame', VIEWER_DECODER)
+        viewer = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(viewer)
+        metadata = {'stream': 'viewport'}
+        views = rendered_views()
+        for compression in {options['compression'] for options in PUBLISH_TIERS.values()}:
+            with self.subTest(compression=compression):
+                frame = encode_published_frame('viewport/preview', metadata, views, compression)
+                decoded_metadata, decoded = viewer.decode_published_frame(frame)
+                self.assertEqual(decoded_metadata, metadata)
+                self._assert_views_equal(decoded, views)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+
+import torch
+
+from quality import PER_SPLAT_ATTRIBUTES, QUALITY_TIERS, QualityTiers, parse_quality
+
+
+class FakeGaussians:
+    """The attributes of `GaussianModel` used by the quality tiers, with the same activations."""
+
+    def __init__(self, num_splats, max_sh_degree=3):
+        generator = torch.Generator().manual_seed(0)
+        self.max_sh_degree = max_sh_degree
+        self.active_sh_degree = max_sh_degree
+        self._xyz = torch.randn((num_splats, 3), generator=generator)
+        self._features_dc = torch.randn((num_splats, 1, 3), generator=generator)
+        self._features_rest = torch.randn((num_splats, (max_sh_degree + 1) ** 2 - 1, 3), generator=generator)
+        self._scaling = torch.randn((num_splats, 3), generator=generator) - 4
+        self._rotation = torch.randn((num_splats, 4), generator=generator)
+        self._opacity = torch.randn((num_splats, 1), generator=generator) * 3
+        self.cache = {'covariance': torch.randn((num_splats, 6), generator=generator)}
+
+    @property
+    def get_scaling(self):
+        return torch.exp(self._scaling)
+
+    @property
+    def get_opacity(self):
+        return torch.sigmoid(self._opacity)
+
+
+def splat_ids(model):
+    """Identify the splats of a reduced model by their (unique) positions."""
+    return {tuple(position) for position in model._xyz.tolist()}
+
+
+class TestParseQuality(unittest.TestCase):
+    def test_tiers(self):
+        for name, tier in QUALITY_TIERS.items():
+            with self.subTest(tier=name):
+                self.assertEqual(
+                    parse_quality(name, 3), (tier['sh_degree'], tier['min_opacity'], tier['max_splats']))
+
+    def test_dict_defaults_to_full_quality(self):
+        self.assertEqual(parse_quality({}, 3), (3, 0.0, None))
+        self.assertEqual(parse_quality({'max_splats': 10}, 2), (2, 0.0, 10))
+        self.assertEqual(parse_quality({'sh_degree': 0, 'min_opacity': 0.1}, 3), (0, 0.1, None))
+
+    def test_invalid_quality(self):
+        for quality in ['ultra', {'sh_degree': 4}, {'sh_degree': -1}, {'max_splats': 0}]:
+            with self.subTest(quality=quality), self.assertRaises(ValueError):
+                parse_quality(quality, 3)
+
+    def test_tiers_clamp_the_sh_degree(self):
+        # The model may have been trained with a lower degree than the tier
+        self.assertEqual(parse_quality('high', 2)[0], 2)
+        self.assertEqual(parse_quality('medium', 0)[0], 0)
+
+
+class TestQualityTiers(unittest.TestCase):
+    def setUp(self):
+        self.gaussians = FakeGaussians(1000)
+        self.tiers = QualityTiers(self.gaussians, max_cached=2)
+
+    def test_full_quality_is_the_model(self):
+        self.assertIs(self.tiers.get(None), self.gaussians)
+        model = self.tiers.get('high')
+        self.assertEqual(model.active_sh_degree, 3)
+        # Nothing is dropped, so the tensors are shared with the full model
+        for name in PER_SPLAT_ATTRIBUTES:
+            self.assertIs(getattr(model, name), getattr(self.gaussians, name))
+
+    def test_lower_tiers_are_monotonic_subsets(self):
+        previous_ids = splat_ids(self.gaussians)
+        for quality in [{'min_opacity': 0.02}, {'min_opacity': 0.05}, {'min_opacity': 0.05, 'max_splats': 300},
+                        {'min_opacity': 0.05, 'max_splats': 100}]:
+            with self.subTest(quality=quality):
+                model = self.tiers.get(quality)
+                ids = splat_ids(model)
+                self.assertLess(len(ids), len(previous_ids))
+                self.assertTrue(ids <= previous_ids)
+                self.assertGreaterEqual(model.get_opacity.min().item(), quality['min_opacity'])
+                for name in PER_SPLAT_ATTRIBUTES:
+                    self.assertEqual(getattr(model, name).shape[0], len(ids))
+                self.assertEqual(model.cache['covariance'].shape[0], len(ids))
+                previous_ids = ids
+        # The full model is left untouched
+        self.assertEqual(self.gaussians._xyz.shape[0], 1000)
+
+    def test_max_splats_keeps_the_most_important(self):
+        model = self.tiers.get({'max_splats': 100})
+        self.assertEqual(model._xyz.shape[0], 100)
+        scales, _ = torch.sort(self.gaussians.get_scaling, dim=1, descending=True)
+        scores = self.gaussians.get_opacity[:, 0] * scales[:, 0] * scales[:, 1]
+        kept = torch.zeros(1000, dtype=torch.bool)
+        kept[torch.topk(scores, 100).indices] = True
+        self.assertEqual(splat_ids(model), {tuple(position) for position in self.gaussians._xyz[kept].tolist()})
+
+    def test_models_are_cached(self):
+        low = self.tiers.get('low')
+        self.assertIs(self.tiers.get('low'), low)
+        # Equivalent qualities share the same model
+        self.assertIs(self.tiers.get(dict(QUALITY_TIERS['low'])), low)
+        self.tiers.get('medium')
+        self.tiers.get('high')
+        # Only the most recently used models are kept
+        self.assertIsNot(self.tiers.get('low'), low)
+
+
+if __name__ == "__main__":
+    unittest.main()
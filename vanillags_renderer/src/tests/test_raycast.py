@@ -0,0 +1,156 @@
+import math
+import unittest
+from types import SimpleNamespace
+
+import torch
+from scipy.spatial.transform import Rotation
+
+from raycast import MAX_ALPHA, MIN_ALPHA, GaussianRaycaster, quaternion_to_matrix
+
+
+def random_gaussians(num_gaussians, seed=0, max_opacity=0.08):
+    """
+    Activated attributes of random Gaussians. With opacities up to 0.08, the Gaussians only reach the alpha
+    threshold within 2.5 standard deviations, well inside the 3 standard deviations covered by the grid.
+    """
+    generator = torch.Generator().manual_seed(seed)
+    rotations = torch.randn(num_gaussians, 4, generator=generator, dtype=torch.float32)
+    return SimpleNamespace(
+        get_xyz=torch.rand(num_gaussians, 3, generator=generator, dtype=torch.float32) * 4 - 2,
+        get_scaling=torch.rand(num_gaussians, 3, generator=generator, dtype=torch.float32) * 0.1 + 0.02,
+        get_rotation=rotations / rotations.norm(dim=1, keepdim=True),
+        get_opacity=torch.rand(num_gaussians, 1, generator=generator, dtype=torch.float32) * max_opacity,
+    )
+
+
+def brute_force_query(gaussians, origins, directions, max_distance):
+    """Blend all Gaussians along each ray, one ray at a time, without the grid, in double precision."""
+    origins, directions = origins.double(), directions.double()
+    directions = directions / directions.norm(dim=1, keepdim=True)
+    rotations = quaternion_to_matrix(gaussians.get_rotation.double())
+    precisions = rotations @ torch.diag_embed(1 / gaussians.get_scaling.double() ** 2) @ rotations.transpose(1, 2)
+    means, opacities_ = gaussians.get_xyz.double(), gaussians.get_opacity[:, 0].double()
+    depths, opacities = [], []
+    for origin, direction in zip(origins, directions):
+        diff = means - origin
+        a = torch.einsum('i,nij,j->n', direction, precisions, direction)
+        b = torch.einsum('i,nij,nj->n', direction, precisions, diff)
+        t = b / a
+        mahalanobis = torch.einsum('ni,nij,nj->n', diff, precisions, diff) - b ** 2 / a
+        alpha = (opacities_ * torch.exp(-0.5 * mahalanobis.clamp_min(0))).clamp_max(MAX_ALPHA)
+        keep = (alpha >= MIN_ALPHA) & (t > 0) & (t <= max_distance)
+        t, order = torch.sort(t[keep])
+        alpha = alpha[keep][order]
+        transmittance = torch.cat([torch.ones(1, dtype=torch.float64), torch.cumprod(1 - alpha, 0)[:-1]])
+        weights = transmittance * alpha
+        opacity = weights.sum().item()
+        depths.append((weights * t).sum().item() / opacity if opacity > 0 else math.inf)
+        opacities.append(opacity)
+    return torch.tensor(depths, dtype=torch.float64), torch.tensor(opacities, dtype=torch.float64)
+
+
+class TestGaussianRaycaster(unittest.TestCase):
+    def _rays(self, num_rays, seed=1):
+        generator = torch.Generator().manual_seed(seed)
+        origins = torch.rand(num_rays, 3, generator=generator, dtype=torch.float32) * 6 - 3
+        # Aim at random points inside the Gaussians, plus a few axis-aligned rays
+        targets = torch.rand(num_rays, 3, generator=generator, dtype=torch.float32) * 3 - 1.5
+        directions = targets - origins
+        directions[:4] = torch.tensor([[1, 0, 0], [0, -1, 0], [0, 0, 1], [0, 0, -1]], dtype=torch.float32)
+        origins[:4] = torch.tensor([[-3, 0.1, 0.2], [0.3, 3, -0.1], [0.2, 0.1, -3], [-0.2, -0.3, 3]], dtype=torch.float32)
+        return origins, directions
+
+    def _assert_matches_brute_force(self, raycaster, gaussians, max_distance=10.0, num_rays=64):
+        origins, directions = self._rays(num_rays)
+        depth, opacity, rgb = raycaster.query(origins, directions, max_distance=max_distance)
+        expected_depth, expected_opacity = brute_force_query(gaussians, origins, directions, max_distance)
+        self.assertIsNone(rgb)
+        hit = expected_opacity > 0
+        # Most rays hit something, so that the comparison is meaningful
+        self.assertGreater(hit.sum().item(), len(origins) // 2)
+        # Up to the float32 precision of the raycaster, which must not degrade with the number of rays
+        torch.testing.assert_close(opacity.double(), expected_opacity, atol=1e-5, rtol=1e-5)
+        torch.testing.assert_close(torch.isinf(depth), ~hit)
+        torch.testing.assert_close(depth[hit].double(), expected_depth[hit], atol=1e-4, rtol=1e-5)
+        self._assert_candidates_cover_contributions(raycaster, gaussians, origins, directions, max_distance)
+
+    def _assert_candidates_cover_contributions(self, raycaster, gaussians, origins, directions, max_distance):
+        """Every Gaussian above the alpha threshold along a ray must be in a cell visited by the ray."""
+        directions = directions / directions.norm(dim=1, keepdim=True)
+        num_steps = max(1, math.ceil(max_distance / (raycaster.cell_size / 2)))
+        ray, gaussian = raycaster._candidates(origins, directions, max_distance, num_steps)
+        candidates = set(zip(ray.tolist(), raycaster.ids[gaussian].tolist()))
+        means = gaussians.get_xyz.double()
+        rotations = quaternion_to_matrix(gaussians.get_rotation.double())
+        precisions = rotations @ torch.diag_embed(1 / gaussians.get_scaling.double() ** 2) @ rotations.transpose(1, 2)
+        for i, (origin, direction) in enumerate(zip(origins.double(), directions.double())):
+            diff = means - origin
+            a = torch.einsum('i,nij,j->n', direction, precisions, direction)
+            b = torch.einsum('i,nij,nj->n', direction, precisions, diff)
+            mahalanobis = torch.einsum('ni,nij,nj->n', diff, precisions, diff) - b ** 2 / a
+            alpha = gaussians.get_opacity[:, 0].double() * torch.exp(-0.5 * mahalanobis.clamp_min(0))
+            t = b / a
+            # Leave a margin for the float32 precision of the raycaster
+            contributing = torch.nonzero((alpha >= 1.01 * MIN_ALPHA) & (t > 0) & (t <= max_distance))[:, 0]
+            self.assertTrue(all((i, j) in candidates for j in contributing.tolist()), f"Ray {i} misses Gaussians")
+
+    def test_quaternion_to_matrix(self):
+        quaternions = torch.randn(10, 4, dtype=torch.float64)
+        quaternions /= quaternions.norm(dim=1, keepdim=True)
+        # SciPy uses (x, y, z, w) order
+        expected = Rotation.from_quat(quaternions[:, [1, 2, 3, 0]].numpy()).as_matrix()
+        torch.testing.assert_close(quaternion_to_matrix(quaternions), torch.from_numpy(expected))
+
+    def test_matches_brute_force(self):
+        gaussians = random_gaussians(2000)
+        self._assert_matches_brute_force(GaussianRaycaster(gaussians), gaussians)
+
+    def test_large_gaussians_match_brute_force(self):
+        # With small cells, most Gaussians span too many cells and are evaluated for every ray
+        gaussians = random_gaussians(500, seed=2)
+        raycaster = GaussianRaycaster(gaussians, cell_size=0.05, max_span=4)
+        self.assertGreater(raycaster.stats()['large_gaussians'], 0)
+        self._assert_matches_brute_force(raycaster, gaussians)
+
+    def test_chunks_and_max_distance(self):
+        gaussians = random_gaussians(1000, seed=3)
+        # Only a few rays per chunk
+        raycaster = GaussianRaycaster(gaussians, chunk_size=2000)
+        self._assert_matches_brute_force(raycaster, gaussians, max_distance=3.0)
+
+    def test_many_opaque_rays_in_one_chunk(self):
+        # The transmittance of all rays of a chunk is accumulated at once, which must not lose the precision
+        # of the later rays, even with many rays and Gaussians along each ray
+        gaussians = random_gaussians(2000, seed=5, max_opacity=0.3)
+        raycaster = GaussianRaycaster(gaussians)
+        self._assert_matches_brute_force(raycaster, gaussians, num_rays=6000)
+
+    def test_chunks_bound_the_ray_gaussian_pairs(self):
+        gaussians = random_gaussians(2000, seed=6)
+        raycaster = GaussianRaycaster(gaussians, chunk_size=5000)
+        origins, directions = self._rays(500)
+        directions = directions / directions.norm(dim=1, keepdim=True)
+        num_steps = max(1, math.ceil(10.0 / (raycaster.cell_size / 2)))
+        ray, cell = raycaster._visited_cells(origins, directions, 10.0, num_steps)
+        pairs = torch.zeros(len(origins), dtype=torch.long).index_add_(0, ray, raycaster.cell_counts[cell])
+        # Far more pairs per ray than samples per ray, so that chunking on the samples alone is not enough
+        self.assertGreater(pairs.sum().item(), 4 * len(origins) * num_steps)
+        ranges = raycaster._split_rays(pairs)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(origins))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+        for start, end in ranges:
+            self.assertTrue(end - start == 1 or pairs[start:end].sum().item() <= raycaster.chunk_size)
+        self._assert_matches_brute_force(raycaster, gaussians, num_rays=500)
+
+    def test_ray_missing_the_grid(self):
+        gaussians = random_gaussians(100, seed=4)
+        raycaster = GaussianRaycaster(gaussians)
+        depth, opacity, _ = raycaster.query(torch.tensor([[10.0, 10, 10]], dtype=torch.float32), torch.tensor([[1.0, 0, 0]], dtype=torch.float32))
+        self.assertTrue(torch.isinf(depth).all())
+        self.assertEqual(opacity.item(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
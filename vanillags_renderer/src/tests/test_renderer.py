@@ -0,0 +1,29 @@
+import unittest
+
+import numpy as np
+import torch
+
+try:
+    import renderer
+except ImportError:
+    # The gaussian-splatting modules are only available in the renderer container
+    renderer = None
+
+
+@unittest.skipUnless(renderer is not None and torch.cuda.is_available(), "Requires gaussian-splatting and CUDA")
+class TestUpdateCameraPose(unittest.TestCase):
+    def test_matches_new_camera_in_place(self):
+        for tile in (None, (0, 240, 1280, 480)):
+            camera = renderer.create_camera_from_pose(np.zeros(3), np.zeros(3), tile=tile)
+            tensors = [camera.world_view_transform, camera.full_proj_transform, camera.camera_center]
+            position, euler_angles = np.array([0.3, -0.2, 1.5]), np.array([0.1, 0.4, -0.3])
+            renderer.update_camera_pose(camera, position, euler_angles)
+            expected = renderer.create_camera_from_pose(position, euler_angles, tile=tile)
+            for name, tensor in zip(['world_view_transform', 'full_proj_transform', 'camera_center'], tensors):
+                # Updated in place, without allocating new tensors
+                self.assertIs(getattr(camera, name), tensor)
+                torch.testing.assert_close(tensor, getattr(expected, name), atol=1e-5, rtol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import zmq
+
+import replay
+from protocol import encode_ray_query, encode_views
+from replay import rebase_deadlines, strip_deadlines
+from request_log import KIND_REQUEST, KIND_RESPONSE, RequestLogWriter
+
+
+def request_frames(metadata):
+    return [json.dumps(metadata).encode(), b'rgb', b'depth']
+
+
+class TestReplayDeadlines(unittest.TestCase):
+    def test_rebase_keeps_time_budget(self):
+        frames = rebase_deadlines(request_frames({'sent_at': 100.0, 'max_age': 0.5, 'deadline': 100.3}), 5000.0)
+        metadata = json.loads(frames[0])
+        self.assertEqual(metadata['sent_at'], 5000.0)
+        self.assertEqual(metadata['max_age'], 0.5)
+        self.assertAlmostEqual(metadata['deadline'], 5000.3)
+        self.assertEqual(frames[1:], [b'rgb', b'depth'])
+
+    def test_rebase_drops_absolute_deadline_without_sent_at(self):
+        frames = rebase_deadlines(request_frames({'deadline': 100.3, 'max_age': 0.5}), 5000.0)
+        self.assertEqual(json.loads(frames[0]), {'max_age': 0.5})
+
+    def test_strip(self):
+        frames = strip_deadlines(request_frames({'position': [0, 0, 0], 'sent_at': 100.0, 'max_age': 0.5}))
+        self.assertEqual(json.loads(frames[0]), {'position': [0, 0, 0]})
+
+    def test_requests_without_deadlines_are_unchanged(self):
+        frames = request_frames({'position': [0, 0, 0]})
+        self.assertIs(rebase_deadlines(frames, 5000.0), frames)
+        self.assertIs(strip_deadlines(frames), frames)
+
+
+
+def serve(url, responses):
+    """Answer pings and the requests on `url` in a background thread, like a renderer, with `responses[type]`."""
+    socket = zmq.Context.instance().socket(zmq.REP)
+    socket.bind(url)
+
+    def loop():
+        while True:
+            metadata = json.loads(socket.recv_multipart()[0])
+            if metadata.get('type') == 'ping':
+                socket.send_json({'state': 'ready', 'progress': 1.0})
+            else:
+                socket.send_multipart(responses[metadata.get('type', 'render')])
+
+    threading.Thread(target=loop, daemon=True).start()
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        rng = np.random.default_rng(0)
+        rgb = rng.integers(0, 256, (8, 16, 3), dtype=np.uint8)
+        inv_depth = rng.uniform(0.1, 1, (8, 16)).astype(np.float32)
+        self.render_request = [json.dumps({'position': [0, 0, 0], 'rotation': [0, 0, 0], 'encoding': 'raw'}).encode()] + \
+            [bytes(frame) for frame in encode_views([(rgb, inv_depth)], 'raw')]
+        self.render_response = [json.dumps({'shape': rgb.shape}).encode()] + \
+            [bytes(frame) for frame in encode_views([(rgb, inv_depth)], 'raw')]
+        origins = rng.uniform(-1, 1, (5, 3)).astype(np.float32)
+        self.query_request = [bytes(frame) for frame in encode_ray_query(origins, -origins)]
+        # The first ray hits nothing
+        self.depth = np.array([np.inf, 1, 2, 3, 4], dtype=np.float32)
+        self.opacity = np.array([0, 0.5, 0.6, 0.7, 0.8], dtype=np.float32)
+
+    def _query_response(self, depth):
+        return [json.dumps({'num_rays': len(depth)}).encode(), depth.tobytes(), self.opacity.tobytes()]
+
+    def _replay(self, replayed_depth):
+        log_dir = os.path.join(self.directory, 'session')
+        writer = RequestLogWriter(log_dir)
+        exchanges = [(self.render_request, self.render_response), (self.query_request, self._query_response(self.depth))]
+        for sequence, (request, response) in enumerate(exchanges):
+            writer.append(KIND_REQUEST, sequence, sequence * 1000, request)
+            writer.append(KIND_RESPONSE, sequence, sequence * 1000 + 500, response)
+        writer.close()
+        url = f"ipc://{os.path.join(self.directory, 'renderer')}"
+        serve(url, {'render': self.render_response, 'query': self._query_response(replayed_depth)})
+        report = os.path.join(self.directory, 'report.json')
+        with contextlib.redirect_stdout(io.StringIO()):
+            replay.main(argparse.Namespace(
+                socket_url=url, log_dir=log_dir, fast=True, deadlines='rebase', min_psnr=40.0, max_ray_diff=1e-3,
+                report=report,
+            ))
+        with open(report) as f:
+            return json.load(f)
+
+    def test_replay_with_ray_query(self):
+        report = self._replay(self.depth)
+        self.assertEqual(report['frames'], 2)
+        self.assertEqual(report['identical_frames'], 1)
+        self.assertEqual(report['ray_queries'], 1)
+        self.assertEqual(report['max_ray_diff'], 0.0)
+        self.assertEqual(report['mismatched_frames'], [])
+
+    def test_mismatched_ray_query(self):
+        depth = self.depth.copy()
+        depth[2] += 0.1
+        report = self._replay(depth)
+        self.assertAlmostEqual(report['max_ray_diff'], 0.1, places=5)
+        self.assertEqual(report['mismatched_frames'], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import contextlib
+import io
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import zmq
+
+from request_log import (
+    HEADER, KIND_REQUEST, KIND_RESPONSE, LENGTH, RequestLogWriter, read_camera_poses, read_request_log,
+    read_request_pairs,
+)
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def request(metadata, *images):
+    return [json.dumps(metadata).encode(), *images]
+
+
+class TestRequestLog(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.log_dir = os.path.join(self.directory, 'session')
+
+    def _write(self, records, **kwargs):
+        writer = RequestLogWriter(self.log_dir, **kwargs)
+        for record in records:
+            writer.append(*record)
+        writer.close()
+
+    def test_round_trip(self):
+        records = [
+            (KIND_REQUEST, 0, 100, request({'position': [0, 0, 0]}, b'rgb' * 100, b'')),
+            (KIND_RESPONSE, 0, 250, [b'{}', bytes(range(256))]),
+        ]
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                self.log_dir = os.path.join(self.directory, f'session_{compress}')
+                self._write(records, compress=compress)
+                read = [(r.kind, r.sequence, r.timestamp_ns, [bytes(f) for f in r.frames]) for r in read_request_log(self.log_dir)]
+                self.assertEqual(read, records)
+
+    def test_records_are_not_split_across_chunks(self):
+        records = [(KIND_REQUEST, i, i, [bytes([i]) * 40]) for i in range(10)]
+        self._write(records, chunk_size=100)
+        self.assertGreater(len(os.listdir(self.log_dir)), 1)
+        self.assertEqual([bytes(r.frames[0]) for r in read_request_log(self.log_dir)], [r[3][0] for r in records])
+
+    def test_appends_new_chunks_to_existing_log(self):
+        self._write([(KIND_REQUEST, 0, 0, [b'a'])])
+        self._write([(KIND_REQUEST, 1, 1, [b'b'])])
+        self.assertEqual([r.sequence for r in read_request_log(self.log_dir)], [0, 1])
+
+    def test_pairs_skip_unanswered_requests(self):
+        self._write([
+            (KIND_REQUEST, 0, 0, [b'first']),
+            (KIND_REQUEST, 1, 1, [b'unanswered']),
+            (KIND_REQUEST, 2, 2, [b'second']),
+            (KIND_RESPONSE, 2, 3, [b'second reply']),
+            (KIND_RESPONSE, 0, 4, [b'first reply']),
+        ])
+        pairs = [(bytes(req.frames[0]), bytes(res.frames[0])) for req, res in read_request_pairs(self.log_dir)]
+        self.assertEqual(pairs, [(b'second', b'second reply'), (b'first', b'first reply')])
+
+    def test_read_camera_poses(self):
+        self._write([
+            (KIND_REQUEST, 0, 0, request({'position': [1, 2, 3], 'rotation': [0, 0, 1]}, b'rgb', b'depth')),
+            (KIND_RESPONSE, 0, 1, request({'shape': [1, 1, 3]})),
+            (KIND_REQUEST, 1, 2, request({'type': 'ping'})),
+            (KIND_REQUEST, 2, 3, request({'views': [
+                {'position': [4, 5, 6], 'rotation': [0, 1, 0]},
+                {'position': [7, 8, 9], 'rotation': [1, 0, 0], 'tile': [0, 0, 640, 360]},
+            ]})),
+        ])
+        self.assertEqual(read_camera_poses(self.log_dir), [([1, 2, 3], [0, 0, 1]), ([4, 5, 6], [0, 1, 0])])
+
+    def test_corrupted_record(self):
+        self._write([(KIND_REQUEST, 0, 0, [b'a'])])
+        path = os.path.join(self.log_dir, os.listdir(self.log_dir)[0])
+        with open(path, 'r+b') as f:
+            f.write(b'XXXX')
+        with self.assertRaises(ValueError):
+            list(read_request_log(self.log_dir))
+
+    def test_truncated_tail(self):
+        self._write([(KIND_REQUEST, 0, 0, [b'first']), (KIND_REQUEST, 1, 1, [b'second', b'frame'])])
+        path = os.path.join(self.log_dir, os.listdir(self.log_dir)[0])
+        with open(path, 'rb') as f:
+            data = f.read()
+        first_size = HEADER.size + LENGTH.size + len(b'first')
+        # Cut the second record in its header, its frame lengths and its frame data
+        for size in (first_size + 3, first_size + HEADER.size + LENGTH.size, len(data) - 1):
+            with self.subTest(size=size):
+                with open(path, 'wb') as f:
+                    f.write(data[:size])
+                with contextlib.redirect_stdout(io.StringIO()) as output:
+                    self.assertEqual([bytes(r.frames[0]) for r in read_request_log(self.log_dir)], [b'first'])
+                self.assertIn("truncated", output.getvalue())
+
+    def test_records_after_a_truncated_chunk(self):
+        # The recorder was killed, and restarted on the same log
+        self._write([(KIND_REQUEST, 0, 0, [b'first']), (KIND_REQUEST, 1, 1, [b'second'])])
+        path = os.path.join(self.log_dir, os.listdir(self.log_dir)[0])
+        os.truncate(path, os.path.getsize(path) - 1)
+        self._write([(KIND_REQUEST, 2, 2, [b'third'])])
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual([r.sequence for r in read_request_log(self.log_dir)], [0, 2])
+
+
+class TestRecorder(unittest.TestCase):
+    def test_sigterm_closes_the_log(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        renderer_url = f"ipc://{os.path.join(directory.name, 'renderer')}"
+        socket_url = f"ipc://{os.path.join(directory.name, 'recorder')}"
+        log_dir = os.path.join(directory.name, 'session')
+        context = zmq.Context.instance()
+        renderer = context.socket(zmq.REP)
+        renderer.setsockopt(zmq.LINGER, 0)
+        renderer.setsockopt(zmq.RCVTIMEO, 10000)
+        renderer.bind(renderer_url)
+        self.addCleanup(renderer.close)
+        recorder = subprocess.Popen(
+            [sys.executable, os.path.join(SOURCE_DIR, 'recorder.py'), '--socket-url', socket_url,
+             '--renderer-url', renderer_url, '--log-dir', log_dir],
+            cwd=SOURCE_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        self.addCleanup(recorder.kill)
+        client = context.socket(zmq.REQ)
+        client.setsockopt(zmq.LINGER, 0)
+        client.setsockopt(zmq.RCVTIMEO, 10000)
+        client.connect(socket_url)
+        self.addCleanup(client.close)
+        for i in range(3):
+            client.send_multipart(request({'position': [i, 0, 0]}))
+            renderer.send_multipart([renderer.recv_multipart()[0], b'reply'])
+            client.recv_multipart()
+        recorder.send_signal(signal.SIGTERM)
+        output, _ = recorder.communicate(timeout=10)
+        self.assertEqual(recorder.returncode, 0, output)
+        self.assertIn(b"Recorded 3 requests", output)
+        pairs = list(read_request_pairs(log_dir))
+        self.assertEqual([json.loads(bytes(req.frames[0]))['position'][0] for req, _ in pairs], [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import unittest
+
+from startup import FAILED, READY, STARTING, StartupProgress
+
+PHASES = ['importing', 'loading_model', 'warming_up']
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestStartupProgress(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.startup = StartupProgress(PHASES, clock=self.clock)
+        # Silence the progress messages
+        stack = contextlib.ExitStack()
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        self.addCleanup(stack.close)
+
+    def test_status_transitions(self):
+        status = self.startup.status()
+        self.assertEqual(status['state'], STARTING)
+        self.assertEqual(status['progress'], 0.0)
+        self.assertFalse(self.startup.ready)
+
+        self.startup.begin('importing', "Importing torch")
+        self.clock.now += 2.0
+        self.startup.begin('loading_model')
+        status = self.startup.status()
+        self.assertEqual(status['state'], 'loading_model')
+        self.assertAlmostEqual(status['progress'], 1 / 3)
+        self.assertEqual(status['message'], '')
+        self.assertEqual(status['timings'], {'importing': 2.0})
+        self.assertEqual(self.startup.not_ready_response()['status'], 'loading')
+        self.assertEqual(self.startup.not_ready_response()['state'], 'loading_model')
+
+        self.clock.now += 5.0
+        self.startup.begin('warming_up')
+        self.clock.now += 1.0
+        self.startup.finish('result')
+        status = self.startup.status()
+        self.assertTrue(self.startup.ready)
+        self.assertEqual(status['state'], READY)
+        self.assertEqual(status['progress'], 1.0)
+        self.assertEqual(status['elapsed'], 8.0)
+        self.assertEqual(status['timings'], {'importing': 2.0, 'loading_model': 5.0, 'warming_up': 1.0})
+        self.assertNotIn('error', status)
+        self.assertEqual(self.startup.result, 'result')
+        self.assertEqual(
+            self.startup.summary(), "Ready in 8.00 s (importing: 2.00 s, loading_model: 5.00 s, warming_up: 1.00 s)")
+
+    def test_failure_is_reported(self):
+        self.startup.begin('importing')
+        self.clock.now += 1.0
+        self.startup.begin('loading_model')
+        self.clock.now += 3.0
+        self.startup.fail(FileNotFoundError("splat.ply"))
+        status = self.startup.status()
+        self.assertFalse(self.startup.ready)
+        self.assertEqual(status['state'], FAILED)
+        self.assertEqual(status['error'], "splat.ply")
+        # The failed phase is still timed, to show how long it took to fail
+        self.assertEqual(status['timings'], {'importing': 1.0, 'loading_model': 3.0})
+        # Clients are told not to retry
+        self.assertEqual(
+            self.startup.not_ready_response(), {'status': FAILED, 'error': "Renderer failed to start: splat.ply"})
+
+
+if __name__ == "__main__":
+    unittest.main()
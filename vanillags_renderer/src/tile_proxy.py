@@ -0,0 +1,142 @@
+"""
+Sort-first tiled rendering across multiple renderer instances.
+
+The proxy speaks the same protocol as `main.py`. Each request is split into horizontal bands (tiles spanning
+the full image width), which are rendered in parallel by several renderer instances and stitched back
+together. The band heights are balanced by the measured per-row cost of each renderer instance. The splats far
+from the center are distorted with more than one band, so use at most 2 renderer instances unless
+`check_tiles.py` passes on the scene (see `get_tile_projection_matrix` in `projection.py`).
+
+Example with two renderer processes on the same machine:
+
+    python /src/main.py --socket-url ipc:///tmp/omni-3dgs-extension/vanillags_renderer_0
+    python /src/main.py --socket-url ipc:///tmp/omni-3dgs-extension/vanillags_renderer_1
+    python /src/tile_proxy.py --renderer-urls \
+        ipc:///tmp/omni-3dgs-extension/vanillags_renderer_0 \
+        ipc:///tmp/omni-3dgs-extension/vanillags_renderer_1
+"""
+
+import argparse
+import json
+
+import numpy as np
+import zmq
+
+from protocol import combine_status, connect, decode_views, encode_views, request_all
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket-url', type=str,
+                        default="ipc:///tmp/omni-3dgs-extension/vanillags_renderer",
+                        help="ZMQ socket URL to bind to")
+    parser.add_argument('--renderer-urls', type=str, nargs='+', required=True,
+                        help="ZMQ socket URLs of the renderer instances")
+    parser.add_argument('--width', type=int, default=1280, help="Full image width")
+    parser.add_argument('--height', type=int, default=720, help="Full image height")
+    parser.add_argument('--smoothing', type=float, default=0.2,
+                        help="Smoothing factor of the exponential moving average of the per-row cost")
+    parser.add_argument('--timeout', type=float, default=5.0, help="Timeout in seconds for each renderer")
+    args = parser.parse_args()
+    return args
+
+class TileBalancer:
+    """Split the image rows across renderers in inverse proportion to their measured per-row cost."""
+
+    def __init__(self, num_renderers, smoothing=0.2):
+        self.smoothing = smoothing
+        # Start with equal costs, i.e., equal band heights
+        self.row_costs = np.ones(num_renderers)
+        self.measured = np.zeros(num_renderers, dtype=bool)
+
+    def split(self, height):
+        """Return a list of (y0, y1) row ranges, one per renderer. Every renderer gets at least one row."""
+        throughputs = 1 / self.row_costs
+        rows = np.maximum(1, np.floor(height * throughputs / throughputs.sum())).astype(int)
+        # Assign the remaining rows to the fastest renderers
+        for i in np.argsort(self.row_costs)[:max(0, height - rows.sum())]:
+            rows[i] += 1
+        bounds = np.concatenate([[0], np.cumsum(rows)])
+        bounds[-1] = height
+        return [(int(bounds[i]), int(bounds[i + 1])) for i in range(len(rows))]
+
+    def update(self, index, num_rows, elapsed):
+        row_cost = elapsed / num_rows
+        if not self.measured[index]:
+            self.row_costs[index] = row_cost
+            self.measured[index] = True
+        else:
+            self.row_costs[index] += self.smoothing * (row_cost - self.row_costs[index])
+
+def main(args):
+    context = zmq.Context()
+    receiver = context.socket(zmq.REP)
+    receiver.bind(args.socket_url)
+    renderers = [connect(context, url) for url in args.renderer_urls]
+    balancer = TileBalancer(len(renderers), args.smoothing)
+
+    print(f"Tile proxy ready for requests, splitting across {len(renderers)} renderers...")
+
+    while True:
+        try:
+            frames = receiver.recv_multipart()
+            metadata = json.loads(frames[0])
+            if metadata.get('type') in ('ping', 'status'):
+                # Only ready when all renderers are ready
+                results, _ = request_all(renderers, [frames] * len(renderers), args.timeout)
+                statuses = []
+                for i, socket in enumerate(list(renderers)):
+                    if socket not in results:
+                        socket.close()
+                        renderers[i] = connect(context, args.renderer_urls[i])
+                        statuses.append(None)
+                    else:
+                        statuses.append(json.loads(results[socket][0]))
+                receiver.send_json(combine_status(statuses))
+                continue
+            if 'views' in metadata:
+                raise ValueError("Multi-view requests are not supported by the tile proxy")
+            # Forward the request with the same encoding, and reply with it
+            encoding = metadata.get('encoding', 'tiff')
+            ((bg_rgb_np, bg_depth_np),) = decode_views(frames[1:], encoding=encoding, shape=(args.height, args.width))
+
+            # Send a band to each renderer in parallel
+            bands = balancer.split(args.height)
+            requests = [
+                [json.dumps({**metadata, 'tile': [0, y0, args.width, y1]}).encode()] +
+                encode_views([(bg_rgb_np[y0:y1], bg_depth_np[y0:y1])], encoding)
+                for y0, y1 in bands
+            ]
+            results, elapsed = request_all(renderers, requests, args.timeout)
+
+            # Stitch the bands together
+            render_np = np.empty((args.height, args.width, 3), dtype=np.uint8)
+            inv_depth_np = np.empty((args.height, args.width), dtype=np.float32)
+            errors = []
+            for i, (socket, (y0, y1)) in enumerate(zip(renderers, bands)):
+                if socket not in results:
+                    # Reconnect, since a REQ socket cannot send again before receiving the reply
+                    socket.close()
+                    renderers[i] = connect(context, args.renderer_urls[i])
+                    errors.append(f"{args.renderer_urls[i]} timed out")
+                    continue
+                tile_metadata = json.loads(results[socket][0])
+                if 'error' in tile_metadata:
+                    errors.append(f"{args.renderer_urls[i]}: {tile_metadata['error']}")
+                    continue
+                ((tile_render_np, tile_inv_depth_np),) = decode_views(
+                    results[socket][1:], encoding=encoding, shape=(y1 - y0, args.width))
+                render_np[y0:y1] = tile_render_np
+                inv_depth_np[y0:y1] = tile_inv_depth_np
+                balancer.update(i, y1 - y0, elapsed[socket])
+            if errors:
+                raise RuntimeError('; '.join(errors))
+
+            receiver.send_json({'shape': render_np.shape}, zmq.SNDMORE)
+            receiver.send_multipart(encode_views([(render_np, inv_depth_np)], encoding))
+        except Exception as e:
+            print(f"Error during tiled rendering: {e}")
+            receiver.send_json({'error': str(e)})
+
+if __name__ == "__main__":
+    main(parse_args())